@@ -1,11 +1,10 @@
 import streamlit as st
 import os
 import json
+from datetime import datetime, timezone
 from src.config import Config
-from src.retrieval.embedder import Embedder
-from src.retrieval.vector_index import VectorIndex
-from src.generation.llm_generator import LLMGenerator
-from src.pipeline.rag_pipeline import RAGPipeline
+from src.pipeline.startup import BackgroundLoader, build_pipeline
+from src.retrieval.filters import SearchFilter
 
 # --- Page Config ---
 st.set_page_config(page_title="FinReg AI", layout="wide", initial_sidebar_state="expanded")
@@ -45,20 +44,40 @@ st.markdown("""
 # --- Pipeline Initialization ---
 @st.cache_resource
 def initialize_pipeline():
-    """Initializes and caches the RAG pipeline."""
+    """
+    Starts loading the RAG pipeline in the background and caches the loader, so
+    the page renders while the model loads and the indexes connect.
+    """
     config = Config()
-    embedder = Embedder(config.embedding_model)
-    vector_index = VectorIndex(config.pinecone_config)
-    llm_generator = LLMGenerator(api_key=config.groq_api_key, model=config.llm_model)
-    return RAGPipeline(embedder, vector_index, llm_generator, config.top_k_retrieval), config
+    return BackgroundLoader(lambda: build_pipeline(config), "RAG pipeline"), config
 
-pipeline, config = initialize_pipeline()
+pipeline_loader, config = initialize_pipeline()
 
 # --- Sidebar ---
 with st.sidebar:
     st.image("https://placehold.co/400x200/0B0F19/60A5FA?text=FinReg+AI", use_column_width=True)
     st.info(" Rag Powered!! assistant for Indian financial regulations.")
     
+    st.markdown("---")
+    with st.expander("Search filters"):
+        selected_sources = st.multiselect("Regulator", [s.upper() for s in config.monitoring_config.rss_feeds])
+        selected_types = st.multiselect(
+            "Document type", ["circular", "notification", "master_direction", "press_release", "speech", "order", "other"])
+        published_since = st.date_input("Published since", value=None)
+    search_filter = SearchFilter(
+        sources=selected_sources or None,
+        doc_types=selected_types or None,
+        published_after=int(datetime.combine(published_since, datetime.min.time(), tzinfo=timezone.utc).timestamp())
+        if published_since else None,
+    )
+    if not pipeline_loader.ready.is_set():
+        st.caption("Loading models and indexes...")
+    elif not pipeline_loader.failed:
+        cache_stats = pipeline_loader.wait().cache_stats()
+        st.caption(f"Cache hit rate: embeddings {cache_stats['embedding']['hit_rate']:.0%}, "
+                   f"keyword search {cache_stats['bm25']['hit_rate']:.0%}, "
+                   f"answers {cache_stats['answer']['hit_rate']:.0%}")
+
     st.markdown("---")
     st.markdown("### 🔴 Latest Ingestions Summary")
     
@@ -112,17 +131,42 @@ if query := st.chat_input("Ask a question..."):
         st.markdown(query)
 
     with st.chat_message("assistant"):
-        with st.spinner("Searching and generating answer..."):
-            result = pipeline.execute(query, chat_history=st.session_state.messages)
-            answer = result['answer']
-            sources = result['sources']
-            
-            response_content = answer
-            if sources:
-                response_content += "\n\n**Sources:**\n"
-                for source in sources:
-                    response_content += f"- [{source['title']}]({source['url']})\n"
-            
-            st.markdown(response_content)
-            st.session_state.messages.append({"role": "assistant", "content": response_content})
+        if not pipeline_loader.ready.is_set():
+            with st.spinner("Loading models and indexes..."):
+                pipeline_loader.ready.wait()
+        if pipeline_loader.failed:
+            st.error("The assistant failed to start; check the logs and restart the app.")
+            st.stop()
+        pipeline = pipeline_loader.wait()
+        events = pipeline.stream_execute(query, chat_history=st.session_state.messages, search_filter=search_filter)
+        with st.spinner("Searching..."):
+            # Retrieval finishes before the first token, so the sources are known up front.
+            sources = next(events)['sources']
+
+        sources_content = ""
+        if sources:
+            sources_content = "\n\n**Sources:**\n"
+            for source in sources:
+                sources_content += f"- [{source['title']}]({source['url']})\n"
+
+        # The answer streams into a container placed above the sources, which show right away.
+        answer_container = st.container()
+        if sources_content:
+            st.markdown(sources_content)
+        done = {}
+
+        def answer_tokens():
+            for event in events:
+                if event['type'] == 'token':
+                    yield event['text']
+                elif event['type'] == 'done':
+                    done.update(event)
 
+        answer = answer_container.write_stream(answer_tokens())
+        timings = done.get('timings', {})
+        if done.get('cached'):
+            st.caption("Answered from cache")
+        elif not done.get('failed') and timings.get('time_to_first_token_ms') is not None:
+            st.caption(f"First token after {timings['time_to_first_token_ms'] / 1000:.1f}s, "
+                       f"answer in {timings['generation_ms'] / 1000:.1f}s")
+        st.session_state.messages.append({"role": "assistant", "content": answer + sources_content})
@@ -1,8 +1,8 @@
-import time
 import logging
 from src.config import Config
 from data_ingestion.kafka_producer import RegulatoryDataProducer
 from data_ingestion.regulatory_monitor import RegulatoryMonitor
+from streaming.kafka_consumer import wait_for_kafka
 
 # Configure logging to provide timestamps and severity levels
 logging.basicConfig(
@@ -19,12 +19,11 @@ def main():
     logging.info("Starting the Regulatory Data Monitoring service...")
     config = Config()
 
-    # A brief delay to ensure the Kafka broker is fully up and running in Docker Compose.
-    logging.info("Waiting for Kafka to be ready...")
-    time.sleep(15)
-
     producer = None  # Initialize producer to None
     try:
+        # Start as soon as the broker answers rather than after a fixed delay.
+        wait_for_kafka(config.kafka_config.bootstrap_servers, config.kafka_config.startup_timeout_seconds)
+
         # Initialize the Kafka producer to send messages
         producer = RegulatoryDataProducer(
             bootstrap_servers=config.kafka_config.bootstrap_servers
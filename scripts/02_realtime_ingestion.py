@@ -1,12 +1,13 @@
-import time
 import logging
 from src.config import Config
-from src.retrieval.embedder import Embedder
-from src.retrieval.vector_index import VectorIndex
-from streaming.kafka_consumer import RegulatoryDataConsumer
+from src.retrieval.embedding_backend import create_embedder
+from src.retrieval.embedding_cache import CachedEmbedder, EmbeddingCache
+from src.retrieval.vector_backend import create_vector_index
+from streaming.kafka_consumer import RegulatoryDataConsumer, wait_for_kafka
 from streaming.document_processor import RealTimeDocumentProcessor
 from streaming.vector_updater import RealTimeVectorUpdater
 from src.retrieval.keyword_index import KeywordIndex
+from src.retrieval.document_store import DocumentStore
 from data_ingestion.kafka_producer import RegulatoryDataProducer
 
 # Configure logging for this specific service
@@ -26,11 +27,19 @@ class IngestionPipeline:
         self.config = config
         self.processor = RealTimeDocumentProcessor()
         
-        embedder = Embedder(config.embedding_model)
-        vector_index = VectorIndex(config.pinecone_config)
+        base_embedder = create_embedder(config, bulk=True)
+        # Unchanged chunks of re-emitted feed items are served from the cache, not the model
+        embedder = CachedEmbedder(
+            base_embedder,
+            EmbeddingCache(config.embedding_cache_path, base_embedder.model_id, config.embedding_cache_max_entries)
+        )
+        vector_index = create_vector_index(config)
+        vector_index.warmup()
         
         self.updater = RealTimeVectorUpdater(vector_index, embedder)
-        self.keyword_updater = KeywordIndex()
+        self.keyword_updater = KeywordIndex(document_store=DocumentStore(config.document_store_path))
+        # Physically drop tombstoned chunks of re-ingested documents in the background
+        self.keyword_updater.start_background_compaction()
         
         # Initialize a Kafka producer to send messages to the summarizer
         self.producer = RegulatoryDataProducer(config.kafka_config.bootstrap_servers)
@@ -47,10 +56,31 @@ class IngestionPipeline:
         chunks, full_text = self.processor.process_update(update_data)
         
         if chunks:
-            # Update the primary search indexes (Vector DB and Keyword Index)
+            # Unchanged re-ingestions stop here.
+            document_id = self.processor.document_id_for(url)
+            if self.keyword_updater.is_current(document_id, chunks):
+                logging.info(f"Document content unchanged, skipping updates: {url}")
+                return
+
+            # Write the vectors first. The keyword index and document store only take the new
+            # chunk set once every vector is in, so after a failure the document still reads
+            # as changed and the next ingestion of it retries the upsert.
             logging.info(f"Document chunked successfully. Updating databases with {len(chunks)} chunks.")
-            self.updater.update_vectors(chunks)
-            self.keyword_updater.update_index(chunks)
+            upserted = self.updater.update_vectors(chunks)
+            if not upserted.succeeded:
+                logging.error(f"{len(upserted.failed_ids)} chunks of {url} could not be written to the vector "
+                              f"index; leaving the document unchanged so it is retried on re-ingestion.")
+                return
+
+            # Replace the document's previous chunk set (if any) in the keyword index and
+            # document store, then remove vectors of chunks that no longer exist
+            replaced = self.keyword_updater.replace_document(document_id, chunks)
+            undeleted = self.updater.delete_vectors(replaced.stale_chunk_ids)
+            if undeleted:
+                # The chunks are already gone from the document store, so these vectors only
+                # take up query slots before hydration drops them; they need removing by hand.
+                logging.error(f"{len(undeleted)} stale vectors of {url} could not be deleted from the vector "
+                              f"index: {undeleted}")
             
             # --- TRIGGER SUMMARIZER ---
             # After successful processing, send a message to the new topic
@@ -73,8 +103,7 @@ def main():
     logging.info("Starting the Real-Time Ingestion Service...")
     config = Config()
 
-    logging.info("Waiting for services to be ready...")
-    time.sleep(20)
+    wait_for_kafka(config.kafka_config.bootstrap_servers, config.kafka_config.startup_timeout_seconds)
     
     pipeline = IngestionPipeline(config)
     
@@ -6,10 +6,13 @@ from pathlib import Path
 from typing import List, Dict, Any
 
 from src.config import Config
-from src.retrieval.embedder import Embedder
-from src.retrieval.vector_index import VectorIndex
+from src.retrieval.embedding_backend import create_embedder
+from src.retrieval.embedding_cache import CachedEmbedder, EmbeddingCache
+from src.retrieval.vector_backend import create_vector_index
+from src.retrieval.document_store import DocumentStore
+from src.retrieval.file_lock import atomic_write_bytes
 from src.generation.llm_generator import LLMGenerator
-from streaming.kafka_consumer import RegulatoryDataConsumer
+from streaming.kafka_consumer import RegulatoryDataConsumer, wait_for_kafka
 
 # Configure logging for this specific service
 logging.basicConfig(
@@ -24,8 +27,14 @@ class SummarizationPipeline:
     """
     def __init__(self, config: Config):
         self.config = config
-        self.embedder = Embedder(config.embedding_model)
-        self.vector_index = VectorIndex(config.pinecone_config)
+        base_embedder = create_embedder(config)
+        self.embedder = CachedEmbedder(
+            base_embedder,
+            EmbeddingCache(config.embedding_cache_path, base_embedder.model_id, config.embedding_cache_max_entries)
+        )
+        self.vector_index = create_vector_index(config)
+        self.vector_index.warmup()
+        self.document_store = DocumentStore(config.document_store_path)
         self.llm_generator = LLMGenerator(config.groq_api_key, config.llm_model)
         self.summaries_path = Path(config.summaries_file_path)
         # Ensure the 'artifacts' directory exists
@@ -44,9 +53,11 @@ class SummarizationPipeline:
                 return []
 
     def _save_summaries(self, summaries: List[Dict[str, Any]]):
-        """Saves the updated list of summaries to the JSON file."""
-        with open(self.summaries_path, 'w') as f:
-            json.dump(summaries, f, indent=4)
+        """
+        Saves the updated list of summaries to the JSON file. The file is replaced
+        atomically so the UI never reads a half-written list.
+        """
+        atomic_write_bytes(self.summaries_path, json.dumps(summaries, indent=4).encode('utf-8'))
 
     def process_document(self, message: Dict[str, Any]):
         """
@@ -64,13 +75,17 @@ class SummarizationPipeline:
         logging.info(f"Processing document for summary: {title}")
 
         # 1. Find related older documents by searching with the new document's title
-        title_embedding = self.embedder.generate_embeddings([title])[0]
-        search_results = self.vector_index.query(title_embedding, top_k=3)
+        title_embedding = self.embedder.generate_embeddings([title])
+        search_results = []
+        if len(title_embedding):
+            search_results = self.vector_index.query(title_embedding[0], top_k=3, include_metadata=False)
         
-        # Filter out the document itself from the search results to get only older context
+        # Filter out the document itself from the search results to get only older context,
+        # reading the chunk text from the shared document store by id.
+        stored = self.document_store.get_by_chunk_ids([res['id'] for res in search_results])
         old_docs_texts = [
-            res['metadata']['text'] for res in search_results 
-            if res['metadata'].get('url') != url
+            doc['text'] for doc in stored
+            if doc is not None and doc['metadata'].get('url') != url
         ]
         
         # 2. Generate the summary using the LLM
@@ -97,8 +112,7 @@ def main():
     """
     logging.info("Starting the Summarization Service...")
     config = Config()
-    # Wait a bit longer to ensure the processor has time to start
-    time.sleep(25)
+    wait_for_kafka(config.kafka_config.bootstrap_servers, config.kafka_config.startup_timeout_seconds)
     
     pipeline = SummarizationPipeline(config)
     
@@ -0,0 +1,33 @@
+import logging
+from src.config import Config
+from src.retrieval.embedding_backend import create_embedder
+from src.retrieval.embedding_service import EmbeddingService
+
+# Configure logging for this specific service
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - [EmbeddingService] - %(message)s'
+)
+
+def main():
+    """
+    Loads the embedding model once and serves it over HTTP with micro-batching,
+    so the UI, ingestion and summarizer containers (EMBEDDING_BACKEND=remote)
+    share one model and their concurrent requests share forward passes.
+    """
+    config = Config()
+    if config.embedding_backend == "remote":
+        raise ValueError("The embedding service needs a local backend; set EMBEDDING_BACKEND to 'torch' or 'onnx'.")
+    # The service batches requests itself, so the model is not wrapped twice.
+    config.embedding_service_config.micro_batching = False
+
+    service = EmbeddingService(create_embedder(config), config.embedding_service_config)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Embedding service stopped by user.")
+    finally:
+        service.shutdown()
+
+if __name__ == "__main__":
+    main()
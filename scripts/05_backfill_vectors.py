@@ -0,0 +1,73 @@
+import time
+import logging
+import argparse
+from pathlib import Path
+from src.config import Config
+from src.retrieval.document_store import DocumentStore
+from src.retrieval.embedding_backend import create_embedder
+from src.retrieval.embedding_cache import CachedEmbedder, EmbeddingCache
+from src.retrieval.vector_backend import create_vector_index
+from streaming.vector_updater import RealTimeVectorUpdater
+
+# Configure logging for this specific script
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - [VectorBackfill] - %(message)s'
+)
+
+def failed_pages(store: DocumentStore, chunk_ids: list, page_size: int):
+    """Yields the stored chunks with the given ids, `page_size` chunks at a time."""
+    for i in range(0, len(chunk_ids), page_size):
+        yield [chunk for chunk in store.get_by_chunk_ids(chunk_ids[i:i + page_size]) if chunk]
+
+def main():
+    """
+    Re-embeds every chunk in the document store and upserts the vectors, e.g.
+    after switching embedding models or vector backends. Set
+    EMBEDDING_BULK_WORKERS to embed across several processes. Ids that still
+    fail after the retries are saved, and --retry-failed re-embeds just those.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--page-size", type=int, default=2048, help="Chunks read, embedded and upserted per step")
+    parser.add_argument("--failed-ids-path", default="artifacts/backfill_failed_ids.txt",
+                        help="Where the ids of chunks that could not be upserted are saved")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Only re-embed the chunks saved as failed by the previous run")
+    args = parser.parse_args()
+
+    config = Config()
+    store = DocumentStore(config.document_store_path)
+    base_embedder = create_embedder(config, bulk=True)
+    embedder = CachedEmbedder(
+        base_embedder,
+        EmbeddingCache(config.embedding_cache_path, base_embedder.model_id, config.embedding_cache_max_entries)
+    )
+    updater = RealTimeVectorUpdater(create_vector_index(config), embedder)
+
+    failed_ids_path = Path(args.failed_ids_path)
+    if args.retry_failed:
+        retry_ids = failed_ids_path.read_text(encoding="utf-8").split() if failed_ids_path.exists() else []
+        total, pages = len(retry_ids), failed_pages(store, retry_ids, args.page_size)
+        logging.info(f"Retrying {total} chunks saved as failed in '{failed_ids_path}'.")
+    else:
+        total, pages = store.count(), store.iter_chunks(batch_size=args.page_size)
+
+    done, failed_ids = 0, []
+    started = time.perf_counter()
+    for chunks in pages:
+        failed_ids.extend(updater.update_vectors(chunks).failed_ids)
+        done += len(chunks)
+        elapsed = time.perf_counter() - started
+        logging.info(f"Backfilled {done}/{total} chunks ({done / elapsed:.1f} chunks/s).")
+
+    if failed_ids:
+        failed_ids_path.parent.mkdir(parents=True, exist_ok=True)
+        failed_ids_path.write_text("\n".join(failed_ids) + "\n", encoding="utf-8")
+        logging.warning(f"{len(failed_ids)} chunks could not be upserted; their ids are saved in "
+                        f"'{failed_ids_path}'. Re-run with --retry-failed to retry them.")
+    elif failed_ids_path.exists():
+        failed_ids_path.unlink()
+    logging.info(f"Backfill complete: {done - len(failed_ids)} vectors written, {len(failed_ids)} failed.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import json
+import time
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+from src.config import Config
+from src.pipeline.startup import build_pipeline
+from src.pipeline.query_cache import load_queries
+
+# Configure logging for this specific script
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - [BatchAnswers] - %(message)s'
+)
+
+def main():
+    """
+    Answers a file of questions, one per line, in one batch, e.g. a nightly
+    regression set, and writes one JSON line per question with its answer,
+    sources and stage timings, in input order.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("questions", help="Text file with one question per line; '#' starts a comment")
+    parser.add_argument("--output", default="artifacts/batch_answers.jsonl")
+    args = parser.parse_args()
+
+    config = Config()
+    questions = load_queries(args.questions)
+    if not questions:
+        logging.error(f"No questions found in '{args.questions}'.")
+        return
+    pipeline = build_pipeline(config)
+
+    started = time.perf_counter()
+    results = pipeline.execute_many(questions, max_concurrency=config.llm_max_concurrency,
+                                    requests_per_minute=config.llm_requests_per_minute)
+    elapsed = time.perf_counter() - started
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        for question, result in zip(questions, results):
+            f.write(json.dumps({"question": question, **result}, ensure_ascii=False) + "\n")
+
+    logging.info(f"Answered {len(questions)} questions in {elapsed:.1f}s "
+                 f"({sum(r['cached'] for r in results)} from cache); results written to '{output}'.")
+    for stage in ("embedding_ms", "keyword_ms", "vector_ms", "generation_ms", "total_ms"):
+        values = [r['timings'][stage] for r in results if stage in r['timings']]
+        if values:
+            logging.info(f"{stage}: p50 {np.percentile(values, 50):.0f}, p95 {np.percentile(values, 95):.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import time
+import logging
+import argparse
+import numpy as np
+from src.config import Config
+from src.pipeline.startup import build_pipeline
+from src.pipeline.query_cache import load_queries
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - [AnswerLatencyBenchmark] - %(message)s'
+)
+
+def main():
+    """
+    Compares when a user first sees an answer: after the whole non-streaming
+    response arrives with `execute`, or at the first streamed token with
+    `stream_execute`. Sends real requests to the Groq API.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--num-queries", type=int, default=5)
+    args = parser.parse_args()
+
+    config = Config()
+    pipeline = build_pipeline(config)
+    queries = load_queries(config.warmup_queries_path)[:args.num_queries]
+
+    blocking_ms, sources_ms, first_token_ms, streamed_ms = [], [], [], []
+    for query in queries:
+        started = time.perf_counter()
+        pipeline.execute(query)
+        blocking_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        for event in pipeline.stream_execute(query):
+            if event['type'] == 'sources':
+                sources_ms.append((time.perf_counter() - started) * 1000)
+            elif event['type'] == 'done':
+                streamed_ms.append((time.perf_counter() - started) * 1000)
+                timings = event['timings']
+                if not event['failed'] and timings['time_to_first_token_ms'] is not None:
+                    first_token_ms.append(timings['retrieval_ms'] + timings['time_to_first_token_ms'])
+
+    print(f"{len(queries)} queries with {config.llm_model}\n")
+    print(f"{'':<28}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, timings in [("execute, full answer", blocking_ms), ("stream, sources shown", sources_ms),
+                          ("stream, first token", first_token_ms), ("stream, full answer", streamed_ms)]:
+        if timings:
+            print(f"{name:<28}{np.percentile(timings, 50):>10.0f}{np.percentile(timings, 95):>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import time
+import logging
+import argparse
+import numpy as np
+from itertools import groupby
+from typing import List
+from src.config import Config
+from src.retrieval.document_store import DocumentStore
+from src.retrieval.embedding_backend import create_embedder
+from src.retrieval.bulk_embedder import BulkEmbedder
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - [BulkEmbeddingBenchmark] - %(message)s'
+)
+
+def stored_chunks(config: Config, limit: int) -> List[dict]:
+    """Returns up to `limit` stored chunks in ingestion order."""
+    chunks = []
+    for page in DocumentStore(config.document_store_path).iter_chunks():
+        chunks.extend(page)
+        if len(chunks) >= limit:
+            break
+    return chunks[:limit]
+
+def synthetic_chunks(count: int, rng: np.random.Generator) -> List[dict]:
+    """Builds documents of up to 1000-character chunks, each ending with a short tail, like the splitter does."""
+    words = "the reserve bank directs regulated entities to comply with revised norms on lending kyc and payments".split()
+    chunks, document = [], 0
+    while len(chunks) < count:
+        sizes = [1000] * int(rng.integers(1, 12)) + [int(rng.integers(20, 1000))]
+        for i, size in enumerate(sizes):
+            text = " ".join(rng.choice(words, size // 5))[:size]
+            chunks.append({'id': f"doc{document}_{i}", 'text': text})
+        document += 1
+    return chunks[:count]
+
+def per_document_throughput(embedder, chunks: List[dict]) -> float:
+    """The current ingestion path: one embedding call per document, chunks in arrival order."""
+    started = time.perf_counter()
+    for _, document_chunks in groupby(chunks, key=lambda chunk: chunk['id'].rsplit("_", 1)[0]):
+        embedder.generate_embeddings([chunk['text'] for chunk in document_chunks])
+    return len(chunks) / (time.perf_counter() - started)
+
+def bulk_throughput(embedder, chunks: List[dict]) -> float:
+    started = time.perf_counter()
+    embedder.generate_embeddings([chunk['text'] for chunk in chunks])
+    return len(chunks) / (time.perf_counter() - started)
+
+def main():
+    """
+    Measures embedding throughput in chunks/sec for the current per-document
+    path and for length-bucketed bulk embedding across worker processes.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--num-chunks", type=int, default=2000)
+    parser.add_argument("--workers", default="1,2,4", help="Worker counts to compare")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    config = Config()
+    chunks = stored_chunks(config, args.num_chunks)
+    if len(chunks) < args.num_chunks:
+        chunks = synthetic_chunks(args.num_chunks, np.random.default_rng(0))
+    texts = [chunk['text'] for chunk in chunks]
+    print(f"{len(chunks)} chunks, {np.mean([len(t) for t in texts]):.0f} characters on average")
+
+    embedder = create_embedder(config)
+    embedder.generate_embeddings(texts[:args.batch_size])  # Load lazily initialized model state
+    baseline = per_document_throughput(embedder, chunks)
+    reference = embedder.generate_embeddings(texts)
+    print(f"\n{'path':<24}{'chunks/s':>12}{'speedup':>10}{'min cos':>10}")
+    print(f"{'per document':<24}{baseline:>12.1f}{1.0:>10.2f}{1.0:>10.4f}")
+
+    config.bulk_embedding_config.batch_size = args.batch_size
+    for workers in [int(w) for w in args.workers.split(",")]:
+        config.bulk_embedding_config.num_workers = workers
+        bulk = BulkEmbedder(config)
+        bulk.generate_embeddings(texts[:workers * args.batch_size])  # Wait until every worker has loaded the model
+        throughput = bulk_throughput(bulk, chunks)
+        embeddings = bulk.generate_embeddings(texts)
+        cosines = (embeddings * reference).sum(axis=1) / (
+            np.linalg.norm(embeddings, axis=1) * np.linalg.norm(reference, axis=1))
+        print(f"{f'bulk, {workers} workers':<24}{throughput:>12.1f}{throughput / baseline:>10.2f}{cosines.min():>10.4f}")
+        bulk.close()
+
+if __name__ == "__main__":
+    main()
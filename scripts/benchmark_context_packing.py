@@ -0,0 +1,78 @@
+import time
+import logging
+import argparse
+import numpy as np
+from src.config import Config
+from src.pipeline.startup import build_pipeline
+from src.pipeline.query_cache import load_queries
+from src.generation.context_packer import PASSAGE_SEPARATOR, ContextPacker, _chunk_text
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - [ContextPackingBenchmark] - %(message)s'
+)
+
+def time_completion(llm_generator, prompt: str) -> float:
+    """Sends one prompt to the Groq API and returns the round trip in milliseconds."""
+    started = time.perf_counter()
+    llm_generator.client.chat.completions.create(
+        messages=[{"role": "user", "content": prompt}],
+        model=llm_generator.model,
+        temperature=0.1,
+        max_tokens=1024
+    )
+    return (time.perf_counter() - started) * 1000
+
+def main():
+    """
+    Compares the prompt context built from the retrieved chunks of each warm-up
+    query: every chunk joined as retrieved, against the packed context with
+    neighbouring chunks merged and the token budget applied. With --live, both
+    prompts are sent to the Groq API to compare generation latency.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--token-budget", type=int, default=None,
+                        help="Defaults to CONTEXT_TOKEN_BUDGET")
+    parser.add_argument("--live", action="store_true", help="Time Groq completions for both prompts")
+    args = parser.parse_args()
+
+    config = Config()
+    pipeline = build_pipeline(config)
+    llm_generator = pipeline.llm_generator
+    packer = ContextPacker(args.token_budget or config.context_token_budget,
+                           count_tokens=llm_generator.context_packer.count_tokens)
+    queries = load_queries(config.warmup_queries_path)
+
+    naive_tokens, packed_tokens, kept, naive_ms, packed_ms = [], [], [], [], []
+    for query in queries:
+        chunks = pipeline.retrieve(query)
+        if not chunks:
+            continue
+        naive = PASSAGE_SEPARATOR.join(_chunk_text(chunk) for chunk in chunks if _chunk_text(chunk))
+        packed = packer.pack(chunks)
+        naive_tokens.append(packer.count_tokens(naive))
+        packed_tokens.append(packed.tokens)
+        kept.append(len(packed.chunk_ids) / len(chunks))
+
+        if args.live:
+            llm_generator.context_packer = packer
+            prompt = llm_generator._build_prompt(query, chunks)
+            naive_ms.append(time_completion(llm_generator, prompt.replace(packed.text, naive)))
+            packed_ms.append(time_completion(llm_generator, prompt))
+
+    if not naive_tokens:
+        print("No query retrieved any chunks.")
+        return
+    print(f"{len(naive_tokens)} queries, top_k={config.top_k_retrieval}, budget={packer.token_budget} tokens\n")
+    print(f"{'context tokens':<22}{'p50':>10}{'p95':>10}{'mean':>10}")
+    for name, values in [("unpacked", naive_tokens), ("packed", packed_tokens)]:
+        print(f"{name:<22}{np.percentile(values, 50):>10.0f}{np.percentile(values, 95):>10.0f}{np.mean(values):>10.0f}")
+    print(f"\ntokens saved: {1 - sum(packed_tokens) / sum(naive_tokens):.1%}, "
+          f"chunks kept: {np.mean(kept):.1%}")
+    if naive_ms:
+        print(f"\n{'generation ms':<22}{'p50':>10}{'p95':>10}")
+        for name, values in [("unpacked", naive_ms), ("packed", packed_ms)]:
+            print(f"{name:<22}{np.percentile(values, 50):>10.0f}{np.percentile(values, 95):>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import time
+import logging
+import argparse
+import numpy as np
+from typing import List
+from src.config import Config
+from src.retrieval.document_store import DocumentStore
+from src.retrieval.embedding_backend import create_embedder
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - [EmbedderBenchmark] - %(message)s'
+)
+
+QUERIES = [
+    "digital lending guidelines",
+    "KYC master direction",
+    "What is the net worth requirement for payment aggregators?",
+    "SEBI circular on cyber resilience for stock brokers",
+    "UPI transaction limits",
+]
+
+def corpus(config: Config, num_texts: int) -> List[str]:
+    """Returns up to `num_texts` stored chunks, padded with repeated queries if the store is small."""
+    store = DocumentStore(config.document_store_path)
+    texts = [doc['text'] for doc in store.get_many(list(range(1, num_texts + 1))) if doc]
+    while len(texts) < num_texts:
+        texts.append(QUERIES[len(texts) % len(QUERIES)] * 20)
+    return texts
+
+def measure(embedder, texts: List[str], num_queries: int):
+    """Returns single-query latencies in ms, bulk throughput in texts/s and the bulk embeddings."""
+    embedder.generate_embeddings(QUERIES)  # Warm up lazy initialization and caches
+    latencies = []
+    for i in range(num_queries):
+        started = time.perf_counter()
+        embedder.generate_embeddings([QUERIES[i % len(QUERIES)]])
+        latencies.append((time.perf_counter() - started) * 1000)
+    started = time.perf_counter()
+    embeddings = embedder.generate_embeddings(texts)
+    throughput = len(texts) / (time.perf_counter() - started)
+    return np.array(latencies), throughput, embeddings
+
+def main():
+    """
+    Compares the PyTorch and ONNX Runtime (fp32 and int8) embedding backends on
+    CPU: single-query latency, bulk throughput over stored chunks, and cosine
+    similarity of the ONNX embeddings to the PyTorch ones.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--num-texts", type=int, default=512)
+    parser.add_argument("--num-queries", type=int, default=50)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    args = parser.parse_args()
+
+    config = Config()
+    texts = corpus(config, args.num_texts)
+    print(f"{'backend':<12}{'p50 ms':>10}{'p95 ms':>10}{'texts/s':>12}{'min cos':>10}")
+    reference = None
+    for backend in args.backends.split(","):
+        config.embedding_backend = backend.split("-")[0]
+        config.onnx_embedder_config.quantized = backend.endswith("int8")
+        latencies, throughput, embeddings = measure(create_embedder(config), texts, args.num_queries)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        if reference is None:
+            reference = embeddings
+        min_cosine = (reference * embeddings).sum(axis=1).min()
+        print(f"{backend:<12}{np.percentile(latencies, 50):>10.2f}{np.percentile(latencies, 95):>10.2f}"
+              f"{throughput:>12.1f}{min_cosine:>10.4f}")
+
+if __name__ == "__main__":
+    main()
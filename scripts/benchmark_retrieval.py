@@ -0,0 +1,71 @@
+import time
+import logging
+import argparse
+import numpy as np
+from src.config import Config
+from src.retrieval.embedding_backend import create_embedder
+from src.retrieval.vector_backend import create_vector_index
+from src.pipeline.rag_pipeline import RAGPipeline
+from src.pipeline.query_cache import load_queries
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - [RetrievalBenchmark] - %(message)s'
+)
+
+def with_latency(query, latency_ms: float):
+    """Delays every vector query, to model the network round trip of a hosted index on a local one."""
+    def delayed(*args, **kwargs):
+        time.sleep(latency_ms / 1000)
+        return query(*args, **kwargs)
+    return delayed
+
+def main():
+    """
+    Compares hybrid retrieval with the keyword and semantic branches run one after
+    the other against running them concurrently, with the query caches cleared
+    before every query so each one pays for BM25, embedding and the vector search.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--rounds", type=int, default=3, help="Passes over the query list")
+    parser.add_argument("--vector-latency-ms", type=float, default=0.0,
+                        help="Added to every vector query, e.g. 50 to approximate Pinecone from a local index")
+    args = parser.parse_args()
+
+    config = Config()
+    vector_index = create_vector_index(config)
+    vector_index.warmup()
+    if args.vector_latency_ms:
+        vector_index.query = with_latency(vector_index.query, args.vector_latency_ms)
+    pipeline = RAGPipeline(create_embedder(config), vector_index, None, config.top_k_retrieval)
+    queries = load_queries(config.warmup_queries_path)
+    pipeline.retrieve(queries[0])  # Load lazily initialized model and index state
+
+    keyword_ms, semantic_ms, sequential_ms, concurrent_ms = [], [], [], []
+    for _ in range(args.rounds):
+        for query in queries:
+            for cache in (pipeline._embedding_cache, pipeline._bm25_cache):
+                cache.clear()
+            started = time.perf_counter()
+            _, keyword = pipeline._timed(pipeline._keyword_search, query, None)
+            _, semantic = pipeline._timed(pipeline._semantic_search, query, None)
+            sequential_ms.append((time.perf_counter() - started) * 1000)
+            keyword_ms.append(keyword)
+            semantic_ms.append(semantic)
+
+            for cache in (pipeline._embedding_cache, pipeline._bm25_cache):
+                cache.clear()
+            started = time.perf_counter()
+            pipeline.retrieve(query)
+            concurrent_ms.append((time.perf_counter() - started) * 1000)
+
+    print(f"{len(queries)} queries x {args.rounds} rounds, top_k={config.top_k_retrieval}\n")
+    print(f"{'':<14}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, timings in [("keyword", keyword_ms), ("semantic", semantic_ms),
+                          ("sequential", sequential_ms), ("concurrent", concurrent_ms)]:
+        print(f"{name:<14}{np.percentile(timings, 50):>10.2f}{np.percentile(timings, 95):>10.2f}")
+    print(f"\nconcurrent / max(branch) p50: "
+          f"{np.percentile(concurrent_ms, 50) / np.percentile(np.maximum(keyword_ms, semantic_ms), 50):.2f}")
+
+if __name__ == "__main__":
+    main()
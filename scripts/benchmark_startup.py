@@ -0,0 +1,90 @@
+import sys
+import json
+import time
+import runpy
+import argparse
+import importlib
+import subprocess
+import statistics
+
+QUERY = "What are the KYC requirements for digital lending?"
+
+# Each entry point is measured by what it imports at start-up and the work it must
+# finish before it can serve: answer a query's retrieval, or embed and index a chunk.
+ENTRY_POINTS = {
+    # The UI script itself needs a Streamlit runtime, so import what it imports.
+    "streamlit-app": {"modules": ["src.config", "src.pipeline.startup", "src.retrieval.filters"], "ready": "query"},
+    "regulatory-monitor": {"script": "scripts/01_ingest_data.py", "ready": None},
+    "realtime-processor": {"script": "scripts/02_realtime_ingestion.py", "ready": "embed"},
+    "summarizer-service": {"script": "scripts/03_summarizer.py", "ready": "embed"},
+    "embedding-service": {"script": "scripts/04_embedding_service.py", "ready": "embed"},
+}
+
+def first_query() -> None:
+    from src.config import Config
+    from src.pipeline.startup import build_pipeline
+    build_pipeline(Config()).retrieve(QUERY)
+
+def first_embedding() -> None:
+    from src.config import Config
+    from src.retrieval.embedding_backend import create_embedder
+    from src.retrieval.vector_backend import create_vector_index
+    config = Config()
+    embedder = create_embedder(config)
+    create_vector_index(config).warmup()
+    embedder.generate_embeddings([QUERY])
+
+def run_child(name: str):
+    """Measures one entry point in this fresh interpreter and prints the timings as JSON."""
+    entry = ENTRY_POINTS[name]
+    started = time.perf_counter()
+    if "script" in entry:
+        runpy.run_path(entry["script"], run_name="startup_benchmark")  # Imports without calling main()
+    else:
+        for module in entry["modules"]:
+            importlib.import_module(module)
+    imported = time.perf_counter()
+    heavy = [module for module in ("torch", "sentence_transformers", "langchain", "groq", "pinecone", "onnxruntime")
+             if module in sys.modules]
+    if entry["ready"] == "query":
+        first_query()
+    elif entry["ready"] == "embed":
+        first_embedding()
+    ready = time.perf_counter()
+    print(json.dumps({"import_s": imported - started, "ready_s": ready - started, "heavy": heavy}))
+
+def main():
+    """
+    Measures start-up cost per entry point, each in a fresh interpreter: the time
+    to import the entry point (when the UI can render), and the time until it can
+    serve its first request (the UI's first retrieval, or a service's first
+    embedding), including model loading and index connection.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--entry-points", default=",".join(ENTRY_POINTS))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(args.child)
+        return
+
+    print(f"{'entry point':<22}{'process s':>11}{'import s':>10}{'first req s':>13}  heavy modules after import")
+    for name in args.entry_points.split(","):
+        results, walls = [], []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            completed = subprocess.run([sys.executable, __file__, "--child", name], capture_output=True, text=True)
+            walls.append(time.perf_counter() - started)
+            if completed.returncode != 0:
+                print(f"{name:<22}failed: {completed.stderr.strip().splitlines()[-1]}")
+                break
+            results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        if len(results) < args.runs:
+            continue
+        ready = statistics.median(r["ready_s"] for r in results) if ENTRY_POINTS[name]["ready"] else float("nan")
+        print(f"{name:<22}{statistics.median(walls):>11.2f}{statistics.median(r['import_s'] for r in results):>10.2f}"
+              f"{ready:>13.2f}  {', '.join(results[0]['heavy']) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import numpy as np
+from typing import List
+from src.config import LocalVectorConfig
+from src.retrieval.local_vector_index import LocalVectorIndex
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - [VectorBenchmark] - %(message)s'
+)
+
+def synthetic_vectors(num_vectors: int, dimension: int, rng: np.random.Generator, num_topics: int = 200) -> np.ndarray:
+    """Draws vectors around random topic centres, which clusters them roughly like sentence embeddings."""
+    topics = rng.normal(size=(num_topics, dimension))
+    return topics[rng.integers(0, num_topics, num_vectors)] + rng.normal(scale=1.5, size=(num_vectors, dimension))
+
+def stored_chunk_vectors(config_path: str, limit: int) -> np.ndarray:
+    """Embeds up to `limit` chunks from the document store with the configured embedding model."""
+    from src.config import Config
+    from src.retrieval.document_store import DocumentStore
+    from src.retrieval.embedding_backend import create_embedder
+    config = Config()
+    store = DocumentStore(config_path or config.document_store_path)
+    texts = [doc['text'] for doc in store.get_many(list(range(1, limit + 1))) if doc]
+    return create_embedder(config).generate_embeddings(texts)
+
+def build_index(path: str, vectors: np.ndarray, **options) -> LocalVectorIndex:
+    index = LocalVectorIndex(LocalVectorConfig(path=path, dimension=vectors.shape[1], **options))
+    for start in range(0, len(vectors), 10000):
+        index.upsert_vectors([
+            {'id': str(i), 'values': vectors[i], 'metadata': {}}
+            for i in range(start, min(start + 10000, len(vectors)))
+        ])
+    return index
+
+def run_queries(index: LocalVectorIndex, queries: np.ndarray, top_k: int):
+    started = time.perf_counter()
+    results = [[int(m['id']) for m in index.query(q, top_k=top_k)] for q in queries]
+    return results, len(queries) / (time.perf_counter() - started)
+
+def recall_at_k(truth: List[List[int]], results: List[List[int]], top_k: int) -> float:
+    return sum(len(set(t) & set(r)) for t, r in zip(truth, results)) / (top_k * len(truth))
+
+def main():
+    """
+    Compares the IVF and quantized local vector indexes against exact search on
+    the same data, reporting recall@k and single-query throughput for a range of
+    nprobe values and for int8/binary codes with full-precision rescoring.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--num-vectors", type=int, default=100000)
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0, help="IVF lists; 0 picks about sqrt(n)")
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32,64")
+    parser.add_argument("--quantization", default="int8,binary", help="Quantizations to compare; empty to skip")
+    parser.add_argument("--memmap", action="store_true", help="Memory-map the vectors instead of loading them")
+    parser.add_argument("--from-document-store", nargs="?", const="", default=None, metavar="DB_PATH",
+                        help="Embed stored chunks instead of generating synthetic vectors")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.from_document_store is not None:
+        vectors = stored_chunk_vectors(args.from_document_store, args.num_vectors + args.num_queries)
+        rng.shuffle(vectors)
+        vectors, queries = vectors[args.num_queries:], vectors[:args.num_queries]
+    else:
+        vectors = synthetic_vectors(args.num_vectors + args.num_queries, args.dimension, rng)
+        vectors, queries = vectors[args.num_queries:], vectors[:args.num_queries]
+    vectors, queries = vectors.astype(np.float32), queries.astype(np.float32)
+
+    workdir = tempfile.mkdtemp(prefix="vector_benchmark_")
+    try:
+        print(f"Indexing {len(vectors)} vectors of dimension {vectors.shape[1]}...")
+        exact = build_index(f"{workdir}/exact", vectors, use_memmap=args.memmap)
+        started = time.perf_counter()
+        ivf = build_index(f"{workdir}/ivf", vectors, use_memmap=args.memmap, ann="ivf",
+                          ivf_nlist=args.nlist, ivf_min_rows=len(vectors) + 1)
+        ivf.compact(train=True)
+        print(f"IVF index with {len(ivf._centroids)} lists built in {time.perf_counter() - started:.1f}s")
+
+        truth, exact_qps = run_queries(exact, queries, args.top_k)
+        print(f"\n{'search':<16}{'recall@' + str(args.top_k):>12}{'QPS':>12}{'speedup':>10}")
+        print(f"{'exact':<16}{1.0:>12.3f}{exact_qps:>12.1f}{1.0:>10.1f}")
+        for nprobe in [int(n) for n in args.nprobe.split(",")]:
+            ivf.nprobe = nprobe
+            results, qps = run_queries(ivf, queries, args.top_k)
+            print(f"{'ivf nprobe=' + str(nprobe):<16}{recall_at_k(truth, results, args.top_k):>12.3f}"
+                  f"{qps:>12.1f}{qps / exact_qps:>10.1f}")
+
+        quantizations = [q for q in args.quantization.split(",") if q]
+        if quantizations:
+            print(f"\n{'search':<16}{'recall@' + str(args.top_k):>12}{'QPS':>12}{'resident MB':>14}")
+            print(f"{'float32':<16}{1.0:>12.3f}{exact_qps:>12.1f}{vectors.nbytes / 2**20:>14.1f}")
+        for quantization in quantizations:
+            index = build_index(f"{workdir}/{quantization}", vectors, quantization=quantization)
+            results, qps = run_queries(index, queries, args.top_k)
+            print(f"{quantization:<16}{recall_at_k(truth, results, args.top_k):>12.3f}"
+                  f"{qps:>12.1f}{index._codes.nbytes / 2**20:>14.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import json
+import time
+import base64
+import argparse
+import tracemalloc
+import numpy as np
+
+def measure(fn, repeats: int):
+    """Returns the best wall time in ms and the peak traced allocation in MB of `fn`."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak / 1e6
+
+def main():
+    """
+    Compares the old Python-list vector path with the float32 array path at each
+    hand-off between the encoder and the index: encoder output, upsert into the
+    index matrix, the embedding service wire format, and query conversion.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--num-vectors", type=int, default=2000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--num-queries", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    encoded = rng.standard_normal((args.num_vectors, args.dimension)).astype(np.float32)
+    as_lists = encoded.tolist()
+    ids = [f"doc_{i}" for i in range(args.num_vectors)]
+    queries = list(encoded[:args.num_queries])
+    query_lists = [query.tolist() for query in queries]
+    wire_lists = json.dumps({"embeddings": as_lists})
+    wire_array = json.dumps({"embeddings": base64.b64encode(encoded.astype("<f4").tobytes()).decode("ascii")})
+
+    stages = [
+        ("encoder output", lambda: encoded.tolist(), lambda: np.ascontiguousarray(encoded, dtype=np.float32)),
+        ("upsert to matrix",
+         lambda: np.asarray([{'id': i, 'values': v}['values'] for i, v in zip(ids, as_lists)], dtype=np.float32),
+         lambda: np.asarray([{'id': i, 'values': v}['values'] for i, v in zip(ids, encoded)], dtype=np.float32)),
+        ("service encode", lambda: json.dumps({"embeddings": encoded.tolist()}),
+         lambda: json.dumps({"embeddings": base64.b64encode(encoded.astype("<f4").tobytes()).decode("ascii")})),
+        ("service decode", lambda: np.asarray(json.loads(wire_lists)["embeddings"], dtype=np.float32),
+         lambda: np.frombuffer(base64.b64decode(json.loads(wire_array)["embeddings"]), dtype="<f4")
+         .reshape(args.num_vectors, args.dimension)),
+        ("query conversion", lambda: [np.asarray(q, dtype=np.float32) for q in query_lists],
+         lambda: [np.asarray(q, dtype=np.float32) for q in queries]),
+    ]
+    print(f"{args.num_vectors} vectors of dimension {args.dimension}, {len(queries)} queries")
+    print(f"list payload {len(wire_lists) / 1e6:.1f} MB, array payload {len(wire_array) / 1e6:.1f} MB\n")
+    print(f"{'stage':<20}{'list ms':>10}{'array ms':>10}{'list MB':>10}{'array MB':>10}")
+    for name, list_path, array_path in stages:
+        list_ms, list_mb = measure(list_path, args.repeats)
+        array_ms, array_mb = measure(array_path, args.repeats)
+        print(f"{name:<20}{list_ms:>10.2f}{array_ms:>10.2f}{list_mb:>10.2f}{array_mb:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import sys
+import json
+import logging
+import argparse
+import torch
+from pathlib import Path
+from sentence_transformers import SentenceTransformer
+from sentence_transformers.models import Pooling
+from src.config import Config
+from src.retrieval.document_store import DocumentStore
+from src.retrieval.onnx_embedder import (FP32_TOLERANCE, INT8_TOLERANCE, MODEL_FILE, QUANTIZED_MODEL_FILE,
+                                         SETTINGS_FILE, OnnxEmbedder)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - [OnnxExport] - %(message)s'
+)
+
+# Query-like texts checked alongside stored chunks (and on their own if the store is empty).
+SAMPLE_TEXTS = [
+    "Master Direction on Know Your Customer (KYC) for regulated entities",
+    "Guidelines on digital lending",
+    "SEBI circular on cyber security and cyber resilience framework for stock brokers",
+    "Reserve Bank of India press release: monetary policy statement",
+    "What are the net worth requirements for payment aggregators?",
+    "UPI",
+]
+
+class TokenEmbeddings(torch.nn.Module):
+    """Wraps the transformer so it returns only the token embeddings, the part exported to ONNX."""
+    def __init__(self, auto_model):
+        super().__init__()
+        self.auto_model = auto_model
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        return self.auto_model(input_ids=input_ids, attention_mask=attention_mask,
+                               token_type_ids=token_type_ids).last_hidden_state
+
+def export(model_name: str, output_dir: Path, quantize: bool):
+    """Exports the transformer of a sentence-transformers model, its tokenizer and pooling settings."""
+    model = SentenceTransformer(model_name, device="cpu")
+    pooling = next(module for module in model if isinstance(module, Pooling))
+    # sentence-transformers 3.x reports the mode through a method; newer releases as an attribute.
+    if (getattr(pooling, "pooling_mode", None) or pooling.get_pooling_mode_str()) != "mean":
+        raise ValueError(f"{model_name} does not use mean pooling, which is the only mode the ONNX backend implements.")
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer = model.tokenizer
+    tokenizer.save_pretrained(output_dir)
+    with open(output_dir / SETTINGS_FILE, "w", encoding="utf-8") as f:
+        json.dump({
+            'model_name': model_name,
+            'max_length': model.max_seq_length,
+            'pad_token': tokenizer.pad_token,
+            'pad_id': tokenizer.pad_token_id,
+        }, f, indent=2)
+
+    sample = tokenizer(SAMPLE_TEXTS[:2], padding=True, return_tensors="pt")
+    names = ['input_ids', 'attention_mask', 'token_type_ids']
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(model[0].auto_model).eval(),
+            tuple(sample[name] for name in names),
+            str(output_dir / MODEL_FILE),
+            input_names=names,
+            output_names=['token_embeddings'],
+            dynamic_axes={**{name: {0: 'batch', 1: 'sequence'} for name in names},
+                          'token_embeddings': {0: 'batch', 1: 'sequence'}},
+            opset_version=14,
+        )
+    logging.info(f"Exported {model_name} to {output_dir / MODEL_FILE}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(output_dir / MODEL_FILE), str(output_dir / QUANTIZED_MODEL_FILE), weight_type=QuantType.QInt8)
+        logging.info(f"Wrote dynamically int8-quantized model to {output_dir / QUANTIZED_MODEL_FILE}")
+    return model
+
+def check_parity(model, config, texts, quantized: bool, tolerance: float) -> bool:
+    """Embeds the texts with both backends and checks that every pair is within the cosine tolerance."""
+    expected = model.encode(texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+    config.quantized = quantized
+    actual = OnnxEmbedder(config).generate_embeddings(texts)
+    cosines = (expected * actual).sum(axis=1)
+    passed = bool(cosines.min() >= tolerance)
+    logging.info(f"{'int8' if quantized else 'fp32'} ONNX vs PyTorch over {len(texts)} texts: "
+                 f"min cosine {cosines.min():.6f}, mean {cosines.mean():.6f} "
+                 f"(tolerance {tolerance}) -> {'OK' if passed else 'FAILED'}")
+    return passed
+
+def main():
+    """
+    Exports the configured embedding model to ONNX for the `onnx` embedding
+    backend, optionally with a dynamically int8-quantized copy, and verifies that
+    its embeddings match the PyTorch model within a cosine tolerance.
+    """
+    config = Config()
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--model", default=config.embedding_model)
+    parser.add_argument("--output-dir", default=config.onnx_embedder_config.model_dir)
+    parser.add_argument("--quantize", action="store_true", help="Also write a dynamically int8-quantized model")
+    parser.add_argument("--parity-texts", type=int, default=200,
+                        help="Stored chunks to compare embeddings on (sample sentences if the store is empty)")
+    args = parser.parse_args()
+
+    model = export(args.model, Path(args.output_dir), args.quantize)
+    store = DocumentStore(config.document_store_path)
+    texts = [doc['text'] for doc in store.get_many(list(range(1, args.parity_texts + 1))) if doc]
+    texts = texts + SAMPLE_TEXTS
+
+    onnx_config = config.onnx_embedder_config
+    onnx_config.model_dir = args.output_dir
+    passed = check_parity(model, onnx_config, texts, quantized=False, tolerance=FP32_TOLERANCE)
+    if args.quantize:
+        passed = check_parity(model, onnx_config, texts, quantized=True, tolerance=INT8_TOLERANCE) and passed
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,8 @@ class KafkaConfig:
     ingestion_topic: str = "regulatory-updates"
     processed_documents_topic: str = "processed-documents"
     group_id: str = "rag-fintech-processor"
+    # How long services wait for a broker at start-up before giving up
+    startup_timeout_seconds: float = 120.0
 
 @dataclass
 class MonitoringConfig:
@@ -30,6 +32,76 @@ class PineconeConfig:
     index_name: str
     dimension: int
     metric: str
+    # Upsert batches sent concurrently; bulk ingestion throughput scales with this
+    upsert_max_workers: int = 4
+    # Retries per failed batch, with exponential backoff starting at upsert_backoff_seconds
+    upsert_max_retries: int = 3
+    upsert_backoff_seconds: float = 0.5
+    # Keep each request under Pinecone's 2 MB limit. Vectors carry only the filter fields as
+    # metadata (text lives in the DocumentStore), so the serialized values dominate the size
+    upsert_max_request_bytes: int = 2 * 1024 * 1024
+
+@dataclass
+class LocalVectorConfig:
+    """Dataclass for the on-disk local vector index used instead of Pinecone."""
+    path: str = "artifacts/vector_index"
+    dimension: int = 384
+    metric: str = "cosine"
+    # Map the vector file instead of reading it into memory, sharing the page cache across processes
+    use_memmap: bool = False
+    # Rewrite the index once this fraction of its rows belongs to replaced or deleted vectors
+    compact_dead_ratio: float = 0.5
+    compact_min_rows: int = 1000
+    # "none" for exact search or "ivf" for an inverted-file approximate index
+    ann: str = "none"
+    # Number of IVF lists; 0 picks about sqrt(n) when the index is trained
+    ivf_nlist: int = 0
+    # Lists scanned per query: higher means better recall and slower queries
+    ivf_nprobe: int = 8
+    # Below this many vectors an exact scan is fast enough, so no centroids are trained
+    ivf_min_rows: int = 10000
+    # Retrain the centroids once the index has grown by this factor since the last training
+    ivf_retrain_growth: float = 2.0
+    # "none", "int8" (4x smaller) or "binary" (32x smaller) in-memory codes, rescored at full precision
+    quantization: str = "none"
+    # Candidates rescored per requested result; 0 uses the quantization's default
+    rescore_factor: int = 0
+
+@dataclass
+class OnnxEmbedderConfig:
+    """Dataclass for the ONNX Runtime embedding backend, which runs without torch."""
+    # Written by scripts/export_onnx_embedder.py: model.onnx, model_int8.onnx, tokenizer and settings
+    model_dir: str = "artifacts/onnx/all-MiniLM-L6-v2"
+    # Use the dynamically int8-quantized export: faster on CPU, slightly less exact
+    quantized: bool = False
+    # Threads used inside one operator (0 uses every CPU) and across independent operators
+    intra_op_threads: int = 0
+    inter_op_threads: int = 1
+    batch_size: int = 64
+
+@dataclass
+class EmbeddingServiceConfig:
+    """Dataclass for micro-batched embedding, in-process or through the shared embedding service."""
+    # Coalesce concurrent in-process embedding calls into shared forward passes
+    micro_batching: bool = False
+    # A batch is sent once it holds this many texts, or once its first request has waited max_wait_ms
+    max_batch_size: int = 64
+    max_wait_ms: float = 5.0
+    # Where scripts/04_embedding_service.py listens, and where the "remote" backend finds it
+    host: str = "0.0.0.0"
+    port: int = 8090
+    url: str = "http://embedding-service:8090"
+    timeout_seconds: float = 30.0
+    # How long clients wait for the service to load its model at start-up
+    startup_timeout_seconds: float = 120.0
+
+@dataclass
+class BulkEmbeddingConfig:
+    """Dataclass for multi-process embedding of ingestion and backfill batches."""
+    # Worker processes, each loading its own copy of the model; 0 embeds in-process
+    num_workers: int = 0
+    # Texts per forward pass; each pass holds texts of similar length, so little padding is computed
+    batch_size: int = 32
 
 class Config:
     """Main configuration class for the entire application."""
@@ -37,27 +109,82 @@ class Config:
         # --- API Keys ---
         self.groq_api_key: str = os.getenv("GROQ_API_KEY")
         pinecone_api_key = os.getenv("PINECONE_API_KEY")
+        # "pinecone" (default) or "local" for the on-disk index, which needs no Pinecone key
+        self.vector_backend: str = os.getenv("VECTOR_BACKEND", "pinecone").lower()
 
-        if not all([self.groq_api_key, pinecone_api_key]):
-            raise ValueError("API keys for Groq and Pinecone must be set in the .env file.")
+        if not self.groq_api_key:
+            raise ValueError("API key for Groq must be set in the .env file.")
+        if self.vector_backend == "pinecone" and not pinecone_api_key:
+            raise ValueError("API key for Pinecone must be set in the .env file (or set VECTOR_BACKEND=local).")
 
         # --- Model & RAG Settings ---
         self.embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+        # "torch" (SentenceTransformer), "onnx" (ONNX Runtime, no torch import at runtime)
+        # or "remote" (the shared embedding service)
+        self.embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "torch").lower()
         self.llm_model: str = "llama-3.1-8b-instant"
+        # Tokens of retrieved context sent with each question
+        self.context_token_budget: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
+        # Bounds for batch question answering (RAGPipeline.execute_many) against the Groq API
+        self.llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+        self.llm_requests_per_minute: float = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
         self.top_k_retrieval: int = 5
         
         # --- NEW: Path for generated summaries ---
         self.summaries_file_path: str = "artifacts/latest_summaries.json"
+        # Chunk text and metadata shared by the keyword index, RAG pipeline and summarizer
+        self.document_store_path: str = "artifacts/documents.db"
+        # Embeddings keyed by (model, normalized text), shared by the ingestion and summarizer services
+        self.embedding_cache_path: str = "artifacts/embedding_cache.db"
+        self.embedding_cache_max_entries: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+        # In-process LRU of query embeddings and BM25 results held by the RAG pipeline
+        self.query_cache_size: int = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+        # Frequent questions, one per line, pre-computed when the app starts
+        self.warmup_queries_path: str = os.getenv("WARMUP_QUERIES_PATH", "config/warmup_queries.txt")
+        # Per-branch limits for hybrid retrieval; a branch that overruns is left out of the fusion
+        self.keyword_search_timeout_seconds: float = float(os.getenv("KEYWORD_SEARCH_TIMEOUT", "3"))
+        self.semantic_search_timeout_seconds: float = float(os.getenv("SEMANTIC_SEARCH_TIMEOUT", "5"))
+        # Answers reused for similar questions that retrieve the same chunks; 0 disables the cache
+        self.answer_cache_size: int = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+        self.answer_cache_similarity: float = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
 
         # --- Component Configurations ---
         self.pinecone_config = PineconeConfig(
             api_key=pinecone_api_key,
             index_name=os.getenv("PINECONE_INDEX_NAME", "fintech-regulatory-rag"),
             dimension=384, 
-            metric="cosine"
+            metric="cosine",
+            upsert_max_workers=int(os.getenv("PINECONE_UPSERT_WORKERS", "4"))
+        )
+        self.onnx_embedder_config = OnnxEmbedderConfig(
+            model_dir=os.getenv("ONNX_EMBEDDER_DIR", "artifacts/onnx/all-MiniLM-L6-v2"),
+            quantized=os.getenv("ONNX_EMBEDDER_QUANTIZED", "false").lower() in ("1", "true", "yes"),
+            intra_op_threads=int(os.getenv("ONNX_INTRA_OP_THREADS", "0")),
+            inter_op_threads=int(os.getenv("ONNX_INTER_OP_THREADS", "1"))
+        )
+        self.embedding_service_config = EmbeddingServiceConfig(
+            micro_batching=os.getenv("EMBEDDING_MICRO_BATCHING", "false").lower() in ("1", "true", "yes"),
+            max_batch_size=int(os.getenv("EMBEDDING_MAX_BATCH_SIZE", "64")),
+            max_wait_ms=float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5")),
+            port=int(os.getenv("EMBEDDING_SERVICE_PORT", "8090")),
+            url=os.getenv("EMBEDDING_SERVICE_URL", "http://embedding-service:8090")
+        )
+        self.bulk_embedding_config = BulkEmbeddingConfig(
+            num_workers=int(os.getenv("EMBEDDING_BULK_WORKERS", "0"))
+        )
+        self.local_vector_config = LocalVectorConfig(
+            path=os.getenv("LOCAL_VECTOR_INDEX_PATH", "artifacts/vector_index"),
+            dimension=384,
+            metric="cosine",
+            use_memmap=os.getenv("LOCAL_VECTOR_MEMMAP", "false").lower() in ("1", "true", "yes"),
+            ann=os.getenv("LOCAL_VECTOR_ANN", "none").lower(),
+            ivf_nprobe=int(os.getenv("LOCAL_VECTOR_NPROBE", "8")),
+            quantization=os.getenv("LOCAL_VECTOR_QUANTIZATION", "none").lower()
         )
         
-        self.kafka_config = KafkaConfig()
+        self.kafka_config = KafkaConfig(
+            startup_timeout_seconds=float(os.getenv("KAFKA_STARTUP_TIMEOUT", "120"))
+        )
         # This is corrected to use the right class name
         self.kafka_config.topics = [self.kafka_config.ingestion_topic]
         self.monitoring_config = MonitoringConfig()
@@ -0,0 +1,154 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+PASSAGE_SEPARATOR = "\n\n---\n\n"
+GAP_SEPARATOR = "\n...\n"
+
+@dataclass
+class PackedContext:
+    """The prompt context built from retrieved chunks, and what went into it."""
+    text: str = ""
+    tokens: int = 0
+    chunk_ids: List[str] = field(default_factory=list)
+    dropped_ids: List[str] = field(default_factory=list)
+
+def load_token_counter(encoding_name: str = "cl100k_base") -> Callable[[str], int]:
+    """
+    Returns a function that counts the tokens of a text with a tiktoken encoding.
+    cl100k_base splits text much like the Llama 3 tokenizer behind the Groq models.
+    If tiktoken or the encoding is not available, tokens are estimated as one per
+    four characters.
+    """
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding(encoding_name)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception as e:
+        logging.getLogger(__name__).warning(
+            f"Tokenizer '{encoding_name}' is not available ({e}); estimating tokens from text length.")
+        return lambda text: (len(text) + 3) // 4
+
+def _position(chunk_id: str) -> Tuple[str, Optional[int]]:
+    """Splits a `{document_id}_{i}` chunk id into the document id and the chunk's index."""
+    document_id, _, index = chunk_id.rpartition("_")
+    if document_id and index.isdigit():
+        return document_id, int(index)
+    return chunk_id, None
+
+def _chunk_text(chunk: Dict[str, Any]) -> str:
+    return chunk.get('text') or chunk.get('metadata', {}).get('text') or ""
+
+class ContextPacker:
+    """
+    Builds the prompt context from fused retrieval results within a token budget.
+
+    Chunks are taken in fused-rank order while they fit in the budget. Chunks of
+    the same document are then printed as one passage in document order, and
+    neighbouring chunks (`{doc_id}_{i}` and `{doc_id}_{i+1}`) are joined with the
+    text they share removed. The splitter repeats up to `max_overlap` characters
+    at the start of each chunk. Duplicate texts are included once. Passages
+    appear in the rank of their best chunk.
+
+    Args:
+        token_budget (int): The most tokens the context may take.
+        max_overlap (int): The longest overlap between neighbouring chunks, the
+                           DocumentProcessor's `chunk_overlap`.
+        min_overlap (int): Shorter shared spans are treated as coincidence and kept.
+        count_tokens (Callable[[str], int]): Counts the tokens of a text; defaults
+                                             to `load_token_counter()`.
+    """
+    def __init__(self, token_budget: int = 2000, max_overlap: int = 150, min_overlap: int = 20,
+                 count_tokens: Optional[Callable[[str], int]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.token_budget = token_budget
+        self.max_overlap = max_overlap
+        self.min_overlap = min_overlap
+        self.count_tokens = count_tokens or load_token_counter()
+
+    def _overlap(self, previous: str, following: str) -> int:
+        """Returns the length of the longest suffix of `previous` that starts `following`."""
+        for length in range(min(self.max_overlap, len(previous), len(following)), self.min_overlap - 1, -1):
+            if previous.endswith(following[:length]):
+                return length
+        return 0
+
+    def _render(self, chunks: List[Dict[str, Any]]) -> str:
+        """Prints the chunks as one passage per document, merging neighbours, in order of first appearance."""
+        passages: Dict[str, List[Tuple[Optional[int], str]]] = {}
+        for chunk in chunks:
+            document_id, index = _position(chunk['id'])
+            passages.setdefault(document_id, []).append((index, _chunk_text(chunk)))
+
+        rendered = []
+        for pieces in passages.values():
+            pieces.sort(key=lambda piece: -1 if piece[0] is None else piece[0])
+            text, previous_index = "", None
+            for index, piece in pieces:
+                if not text:
+                    text = piece
+                elif index is not None and previous_index is not None and index == previous_index + 1:
+                    # Without a shared span the split fell on a separator: the splitter keeps
+                    # ". " at the start of the next chunk and drops whitespace separators.
+                    overlap = self._overlap(text, piece)
+                    if overlap or not piece[:1].isalnum():
+                        text += piece[overlap:]
+                    else:
+                        text += "\n" + piece
+                else:
+                    text += GAP_SEPARATOR + piece
+                previous_index = index
+            rendered.append(text)
+        return PASSAGE_SEPARATOR.join(rendered)
+
+    def _truncate(self, text: str) -> str:
+        """
+        Returns a prefix of `text` that fits in the token budget, binary searching
+        its length. Token counts grow (almost) monotonically with the prefix, and
+        only prefixes that were counted within the budget are returned.
+        """
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(text[:middle]) <= self.token_budget:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low]
+
+    def pack(self, chunks: List[Dict[str, Any]]) -> PackedContext:
+        """
+        Packs ranked chunks into a context of at most `token_budget` tokens.
+
+        Args:
+            chunks (List[Dict[str, Any]]): Retrieved chunks, best first, with 'id' and 'text'.
+
+        Returns:
+            The context text, its token count and the ids of the chunks used and left out.
+        """
+        selected, dropped, seen_texts = [], [], set()
+        packed, tokens = "", 0
+        for chunk in chunks:
+            text = _chunk_text(chunk)
+            if not text or text in seen_texts:
+                continue
+            seen_texts.add(text)
+            candidate = self._render(selected + [chunk])
+            candidate_tokens = self.count_tokens(candidate)
+            if candidate_tokens <= self.token_budget:
+                selected.append(chunk)
+                packed, tokens = candidate, candidate_tokens
+            else:
+                dropped.append(chunk['id'])
+
+        if not selected and dropped:
+            # Even the best chunk alone is over budget: keep as much of it as fits.
+            best = next(chunk for chunk in chunks if chunk['id'] == dropped[0])
+            packed = self._truncate(_chunk_text(best))
+            tokens = self.count_tokens(packed)
+            selected, dropped = [best], dropped[1:]
+
+        if dropped:
+            self.logger.info(f"Context budget of {self.token_budget} tokens left out {len(dropped)} chunks.")
+        return PackedContext(text=packed, tokens=tokens, chunk_ids=[chunk['id'] for chunk in selected],
+                             dropped_ids=dropped)
@@ -1,7 +1,37 @@
+import time
 import logging
-from groq import Groq
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Iterator, Optional
+from src.generation.context_packer import ContextPacker
 
+# The number of most recent chat messages included in the prompt
+CHAT_HISTORY_WINDOW = 4
+LLM_ERROR_MESSAGE = "Error: There was an issue communicating with the language model."
+
+class LLMStreamError(RuntimeError):
+    """Raised by `LLMGenerator.stream_answer` when the request fails, possibly after some fragments were yielded."""
+
+class RateLimiter:
+    """
+    Spaces out calls from any number of threads so that they start no faster than
+    `requests_per_minute`, e.g. to stay within an API's rate limit.
+
+    Args:
+        requests_per_minute (float): The allowed request rate; 0 means unlimited.
+    """
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Blocks until the caller may start its next request."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
 
 class LLMGenerator:
     """
@@ -10,13 +40,15 @@ class LLMGenerator:
     to synthesize answers based on retrieved context.
     """
 
-    def __init__(self, api_key: str, model: str):
+    def __init__(self, api_key: str, model: str, context_packer: Optional[ContextPacker] = None):
         self.logger = logging.getLogger(__name__)
         if not api_key:
             raise ValueError("Groq API key is required for LLMGenerator.")
 
+        from groq import Groq
         self.client = Groq(api_key=api_key)
         self.model = model
+        self.context_packer = context_packer or ContextPacker()
         self.logger.info(f"LLMGenerator initialized with model: {self.model}")
 
     def _build_prompt(
@@ -29,19 +61,18 @@ class LLMGenerator:
         Constructs a detailed prompt for the LLM, combining the user query,
         retrieved context, and optionally chat history.
         """
-        # Extract context
-        context_str = "\n\n---\n\n".join(
-            [chunk['metadata']['text']
-             for chunk in context_chunks
-             if 'metadata' in chunk and 'text' in chunk['metadata']]
-        )
+        # Pack the ranked chunks into the token budget, merging neighbouring chunks of a document
+        context = self.context_packer.pack(context_chunks)
+        context_str = context.text
+        self.logger.info(f"Packed {len(context.chunk_ids)} of {len(context_chunks)} chunks "
+                         f"into {context.tokens} context tokens.")
         if not context_str:
             context_str = "No relevant documents were found in the knowledge base."
 
         # Format chat history
         history_str = ""
         if chat_history:
-            for message in chat_history[-4:]:  # Only last 4 messages
+            for message in chat_history[-CHAT_HISTORY_WINDOW:]:
                 history_str += f"{message['role'].capitalize()}: {message['content']}\n"
 
         # Final prompt
@@ -101,7 +132,42 @@ class LLMGenerator:
             self.logger.error(
                 f"Failed to generate answer from LLM. Error: {e}", exc_info=True
             )
-            return "Error: There was an issue communicating with the language model."
+            return LLM_ERROR_MESSAGE
+
+    def stream_answer(
+        self,
+        query: str,
+        context_chunks: List[Dict[str, Any]],
+        chat_history: List[Dict[str, str]] = None
+    ) -> Iterator[str]:
+        """
+        Streams the answer from the Groq API, yielding text fragments as the model
+        produces them, so callers can show the answer while it is being written.
+
+        Raises:
+            LLMStreamError: If the request fails, before or after the first fragment;
+                            the fragments yielded so far are then an incomplete answer.
+        """
+        prompt = self._build_prompt(query, context_chunks, chat_history)
+
+        try:
+            self.logger.info("Sending streaming request to Groq API to generate answer.")
+            stream = self.client.chat.completions.create(
+                messages=[{"role": "user", "content": prompt}],
+                model=self.model,
+                temperature=0.1,  # Lower temperature for factual responses
+                max_tokens=1024,
+                stream=True,
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            self.logger.info("Successfully streamed answer from Groq API.")
+        except Exception as e:
+            self.logger.error(
+                f"Failed to stream answer from LLM. Error: {e}", exc_info=True
+            )
+            raise LLMStreamError(LLM_ERROR_MESSAGE) from e
 
     # --- NEW METHODS FOR SUMMARIZATION ---
     def _build_summary_prompt(self, new_doc_text: str, old_docs_texts: Optional[List[str]] = None) -> str:
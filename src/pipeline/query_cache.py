@@ -0,0 +1,170 @@
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+class LRUCache:
+    """
+    A thread-safe, size-bounded, in-process least-recently-used cache.
+
+    Streamlit serves every session from threads of one process, so a single
+    instance shared through the cached pipeline lets a query asked by one user
+    answer the same query from everyone else. Hits, misses and evictions are
+    counted for reporting.
+
+    Args:
+        max_entries (int): The number of entries kept; 0 disables the cache.
+    """
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value for the key and marks it recently used, or None on a miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Returns the cached value for the key, or None, without counting a lookup or marking it used."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: Hashable, value: Any):
+        """Stores a value, evicting the least recently used entries over the limit."""
+        if self.max_entries <= 0 or value is None:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every entry but keeps the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the counters and current size, e.g. for logging or display."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+class SemanticAnswerCache:
+    """
+    A thread-safe, size-bounded cache of generated answers, looked up by meaning
+    rather than by exact query text.
+
+    Entries are grouped by a scope, the index generation, the set of chunk ids
+    retrieved for the query and the chat history in the prompt, so an answer is
+    only reused when it would be generated from the same context. Within a
+    scope, a query hits when the cosine similarity of its (unit-length) embedding
+    to a cached query's reaches `similarity_threshold`, so rephrasings of one
+    question share an answer. The least recently used entries are evicted over
+    `max_entries`.
+
+    Args:
+        max_entries (int): The number of answers kept; 0 disables the cache.
+        similarity_threshold (float): The minimum cosine similarity for a hit.
+    """
+    def __init__(self, max_entries: int = 256, similarity_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        # Entry id -> (scope, query embedding, value), in least recently used order
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._scopes: Dict[Hashable, List[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, scope: Hashable, embedding: np.ndarray) -> Optional[Any]:
+        """Returns the value of the most similar entry in the scope if it is similar enough, or None."""
+        with self._lock:
+            entry_ids = self._scopes.get(scope)
+            if entry_ids:
+                similarities = np.stack([self._entries[i][1] for i in entry_ids]) @ embedding
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    self._entries.move_to_end(entry_ids[best])
+                    self.hits += 1
+                    return self._entries[entry_ids[best]][2]
+            self.misses += 1
+            return None
+
+    def put(self, scope: Hashable, embedding: np.ndarray, value: Any):
+        """Stores a value for a query embedding in a scope, evicting the least recently used entries over the limit."""
+        if self.max_entries <= 0 or value is None:
+            return
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (scope, embedding, value)
+            self._scopes.setdefault(scope, []).append(entry_id)
+            while len(self._entries) > self.max_entries:
+                evicted_id, (evicted_scope, _, _) = self._entries.popitem(last=False)
+                self._scopes[evicted_scope].remove(evicted_id)
+                if not self._scopes[evicted_scope]:
+                    del self._scopes[evicted_scope]
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every entry but keeps the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the counters and current size, e.g. for logging or display."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+def load_queries(path: str) -> List[str]:
+    """
+    Reads a list of queries, one per line, skipping blank lines and `#` comments.
+    Returns an empty list if the file does not exist.
+    """
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
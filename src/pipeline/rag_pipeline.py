@@ -1,20 +1,51 @@
+import json
+import time
+import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, List
-from src.retrieval.embedder import Embedder
-from src.retrieval.vector_index import VectorIndex
-from src.generation.llm_generator import LLMGenerator
+import threading
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
+from src.retrieval.embedding_backend import BaseEmbedder
+from src.retrieval.vector_backend import BaseVectorIndex
+from src.generation.llm_generator import CHAT_HISTORY_WINDOW, LLMGenerator, LLMStreamError, RateLimiter
 from src.retrieval.keyword_index import KeywordIndex
+from src.retrieval.filters import SearchFilter
+from src.retrieval.bm25 import tokenize
+from src.pipeline.query_cache import LRUCache, SemanticAnswerCache
 
 class RAGPipeline:
     """
     Orchestrates the entire Hybrid RAG pipeline (Keyword + Semantic).
     """
-    def __init__(self, embedder: Embedder, vector_index: VectorIndex, llm_generator: LLMGenerator, top_k: int = 5):
+    def __init__(self, embedder: BaseEmbedder, vector_index: BaseVectorIndex, llm_generator: LLMGenerator, top_k: int = 5,
+                 keyword_index: KeywordIndex = None, query_cache_size: int = 1024,
+                 keyword_timeout_seconds: float = 3.0, semantic_timeout_seconds: float = 5.0,
+                 answer_cache_size: int = 256, answer_cache_threshold: float = 0.95):
         self.embedder = embedder
         self.vector_index = vector_index
         self.llm_generator = llm_generator
-        self.keyword_index = KeywordIndex() 
+        # The keyword index stays resident for the lifetime of the pipeline and only
+        # reloads itself when the realtime processor publishes a new version to disk.
+        self.keyword_index = keyword_index or KeywordIndex()
         self.top_k = top_k
+        # Popular questions repeat across users, so their embeddings and BM25 results are
+        # kept in memory. Embeddings depend only on the text; BM25 results are dropped
+        # whenever the keyword index publishes a new generation.
+        self._embedding_cache = LRUCache(query_cache_size)
+        self._bm25_cache = LRUCache(query_cache_size)
+        # Rephrasings of a question that retrieve the same chunks get the same answer without
+        # another LLM call. Answers are dropped with the BM25 results on a new generation.
+        self._answer_cache = SemanticAnswerCache(answer_cache_size, answer_cache_threshold)
+        self._bm25_generation: Optional[int] = None
+        self._bm25_generation_lock = threading.Lock()
+        # The keyword and semantic branches are independent, so they run side by side.
+        # A branch that overruns its timeout keeps its thread until it finishes, so the
+        # pool leaves room for a few stragglers beyond the two branches of a query.
+        self.keyword_timeout_seconds = keyword_timeout_seconds
+        self.semantic_timeout_seconds = semantic_timeout_seconds
+        self._retrieval_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="retrieval")
         self.logger = logging.getLogger(__name__)
         self.logger.info("RAG Pipeline with Hybrid Search initialized.")
 
@@ -35,34 +66,202 @@ class RAGPipeline:
         final_docs = [doc_map[doc_id] for doc_id, score in reranked_results if doc_id in doc_map]
         return final_docs
 
-    def execute(self, query: str, chat_history: List[Dict[str, str]] = None) -> Dict[str, Any]:
+    def _hydrate(self, matches: List[Dict]) -> List[Dict]:
         """
-        Executes the full RAG workflow for a given query and chat history.
+        Turns vector matches into documents, fetching text and metadata for all of
+        them from the document store in one batched lookup. Vectors only carry an
+        id and filter fields, so matches that are not in the store are dropped.
         """
-        self.logger.info(f"Executing Hybrid RAG pipeline for query: '{query}'")
+        stored = self.keyword_index.document_store.get_by_chunk_ids([m['id'] for m in matches])
+        documents = [doc for doc in stored if doc is not None]
+        if len(documents) < len(matches):
+            self.logger.warning(f"{len(matches) - len(documents)} vector matches are missing from the document store.")
+        return documents
 
-        # 1. Perform Keyword Search
-        bm25_results = self.keyword_index.search(query, top_k=self.top_k)
-        self.logger.info(f"BM25 found {len(bm25_results)} results.")
+    @staticmethod
+    def _embedding_key(query: str) -> str:
+        # The model's tokenizer splits on whitespace, so runs of whitespace never change the embedding.
+        return " ".join(query.split())
 
-        # 2. Perform Semantic Search
-        query_embedding = self.embedder.generate_embeddings([query])
-        if not query_embedding:
-            return {"answer": "Error: Could not process the query.", "sources": []}
-        
-        vector_results_raw = self.vector_index.query(vector=query_embedding[0], top_k=self.top_k)
-        vector_results = [{'id': res['id'], 'text': res['metadata']['text'], 'metadata': res['metadata']} for res in vector_results_raw]
-        self.logger.info(f"Vector search found {len(vector_results)} results.")
+    def _bm25_key(self, query: str, search_filter: Optional[SearchFilter], generation: int) -> tuple:
+        # Keyed on the exact tokens BM25 scores, so only queries with identical results share an entry.
+        # The generation read before searching is part of the key: a search that started before the
+        # index moved on may store its results after the cache was cleared, but never under a key
+        # that a later generation looks up.
+        if search_filter is not None and search_filter.is_empty:
+            search_filter = None
+        return (generation, tuple(tokenize(query)), self.top_k, search_filter)
+
+    def _current_bm25_generation(self) -> int:
+        """Returns the keyword index generation, dropping cached BM25 results and answers if it has changed."""
+        generation = self.keyword_index.generation
+        with self._bm25_generation_lock:
+            if generation != self._bm25_generation:
+                if self._bm25_generation is not None:
+                    self.logger.info(f"Keyword index moved to generation {generation}; "
+                                     f"clearing cached BM25 results and answers.")
+                self._bm25_cache.clear()
+                self._answer_cache.clear()
+                self._bm25_generation = generation
+        return generation
+
+    def _cache_embedding(self, key: str, embedding: np.ndarray) -> np.ndarray:
+        # Cached vectors are shared by every session, so they are made read-only.
+        embedding = np.array(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        self._embedding_cache.put(key, embedding)
+        return embedding
+
+    def _embed_query(self, query: str) -> Optional[np.ndarray]:
+        """Returns the query embedding from the cache, computing it on a miss, or None on failure."""
+        key = self._embedding_key(query)
+        embedding = self._embedding_cache.get(key)
+        if embedding is None:
+            embeddings = self.embedder.generate_embeddings([key])
+            if len(embeddings) != 1:
+                return None
+            embedding = self._cache_embedding(key, embeddings[0])
+        return embedding
+
+    def _keyword_search(self, query: str, search_filter: Optional[SearchFilter]) -> List[Dict]:
+        """Runs the BM25 search, serving repeated queries from the cache for the current index generation."""
+        key = self._bm25_key(query, search_filter, self._current_bm25_generation())
+        results = self._bm25_cache.get(key)
+        if results is None:
+            results = self.keyword_index.search(query, top_k=self.top_k, search_filter=search_filter)
+            self._bm25_cache.put(key, results)
+        return results
+
+    def _semantic_search(self, query: str, search_filter: Optional[SearchFilter]) -> Optional[List[Dict]]:
+        """Embeds the query and runs the vector search, or returns None if the query could not be embedded."""
+        query_embedding = self._embed_query(query)
+        if query_embedding is None:
+            return None
+        return self._vector_search(query_embedding, search_filter)
+
+    def _vector_search(self, query_embedding: np.ndarray, search_filter: Optional[SearchFilter]) -> List[Dict]:
+        matches = self.vector_index.query(vector=query_embedding, top_k=self.top_k,
+                                          search_filter=search_filter, include_metadata=False)
+        return self._hydrate(matches)
+
+    @staticmethod
+    def _timed(search, *args):
+        started = time.perf_counter()
+        return search(*args), (time.perf_counter() - started) * 1000
+
+    def _branch_results(self, name: str, future: Future, deadline: float) -> Optional[List[Dict]]:
+        """Waits for one retrieval branch until its deadline, returning None if it failed or ran out of time."""
+        try:
+            results, elapsed_ms = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+        except FutureTimeoutError:
+            self.logger.warning(f"{name} search timed out; continuing without it.")
+            return None
+        except Exception as e:
+            self.logger.error(f"{name} search failed; continuing without it. Error: {e}", exc_info=True)
+            return None
+        if results is None:
+            self.logger.warning(f"{name} search could not process the query; continuing without it.")
+            return None
+        self.logger.info(f"{name} search found {len(results)} results in {elapsed_ms:.0f} ms.")
+        return results
+
+    def warmup(self, queries: List[str]):
+        """
+        Pre-computes embeddings and unfiltered BM25 results for frequent queries,
+        embedding them in a single batch, so their first real use is a cache hit.
+
+        Args:
+            queries (List[str]): The queries to prepare, e.g. the most common user questions.
+        """
+        queries = [query for query in dict.fromkeys(self._embedding_key(q) for q in queries) if query]
+        if not queries:
+            return
+        self.logger.info(f"Warming query caches with {len(queries)} queries.")
+        embeddings = self.embedder.generate_embeddings(queries)
+        if len(embeddings) == len(queries):
+            for query, embedding in zip(queries, embeddings):
+                self._cache_embedding(query, embedding)
+
+        generation = self._current_bm25_generation()
+        for query, results in zip(queries, self.keyword_index.search_many(queries, top_k=self.top_k)):
+            self._bm25_cache.put(self._bm25_key(query, None, generation), results)
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns hit, miss and eviction counts and hit rates of the query and answer caches."""
+        return {"embedding": self._embedding_cache.stats(), "bm25": self._bm25_cache.stats(),
+                "answer": self._answer_cache.stats()}
+
+    @staticmethod
+    def _history_fingerprint(query: str, chat_history: Optional[List[Dict[str, str]]]) -> Optional[str]:
+        """
+        Fingerprints the chat messages that go into the prompt next to the query, so
+        answers are only shared between conversations with the same recent history.
+        The current question, if the history already ends with it, is left out: the
+        query embedding accounts for it.
+        """
+        messages = list((chat_history or [])[-CHAT_HISTORY_WINDOW:])
+        if messages and messages[-1].get('role') == 'user' and messages[-1].get('content') == query:
+            messages = messages[:-1]
+        if not messages:
+            return None
+        encoded = json.dumps([[m.get('role'), m.get('content')] for m in messages], ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _answer_cache_key(self, query: str, retrieved_chunks: List[Dict],
+                          chat_history: Optional[List[Dict[str, str]]] = None) -> Optional[tuple]:
+        """
+        Returns the answer cache scope and the query embedding for a retrieval, or None
+        if the query embedding is not available, e.g. because the semantic branch failed.
+        The scope is the index generation, the retrieved chunk ids and the fingerprint
+        of the chat history in the prompt.
+        """
+        embedding = self._embedding_cache.peek(self._embedding_key(query))
+        if embedding is None:
+            return None
+        generation = self._current_bm25_generation()
+        scope = (generation, frozenset(chunk['id'] for chunk in retrieved_chunks),
+                 self._history_fingerprint(query, chat_history))
+        return scope, embedding
+
+    def _cache_answer(self, cache_key: Optional[tuple], answer: str, sources: List[Dict[str, str]]):
+        # Failures are reported as answers starting with "Error:"; those are never reused.
+        if cache_key is not None and not answer.startswith("Error:"):
+            self._answer_cache.put(*cache_key, {"answer": answer, "sources": sources})
+
+    def retrieve(self, query: str, search_filter: Optional[SearchFilter] = None) -> Optional[List[Dict]]:
+        """
+        Runs the keyword and semantic searches concurrently and fuses their results.
+
+        Each branch is given its own timeout. If one fails or overruns, the answer is
+        built from the other one's results instead of waiting for it, so retrieval
+        takes as long as the slower branch, at most its timeout, not the sum of both.
 
-        # 3. Fuse the results using RRF
-        fused_results = self._reciprocal_rank_fusion([bm25_results, vector_results])
+        Args:
+            query (str): The user's question.
+            search_filter (Optional[SearchFilter]): Restricts both searches to matching chunks.
+
+        Returns:
+            The top_k fused chunks, or None if both branches failed.
+        """
+        # 1. Run the keyword and semantic searches concurrently, each with its own timeout
+        started = time.perf_counter()
+        keyword_future = self._retrieval_executor.submit(self._timed, self._keyword_search, query, search_filter)
+        semantic_future = self._retrieval_executor.submit(self._timed, self._semantic_search, query, search_filter)
+        bm25_results = self._branch_results("Keyword", keyword_future, started + self.keyword_timeout_seconds)
+        vector_results = self._branch_results("Semantic", semantic_future, started + self.semantic_timeout_seconds)
+        if bm25_results is None and vector_results is None:
+            return None
+
+        # 2. Fuse the results using RRF; if one branch failed, the other's ranking stands alone
+        fused_results = self._reciprocal_rank_fusion([r for r in (bm25_results, vector_results) if r is not None])
         retrieved_chunks = fused_results[:self.top_k]
-        self.logger.info(f"Fused and reranked to {len(retrieved_chunks)} results.")
+        self.logger.info(f"Fused and reranked to {len(retrieved_chunks)} results in "
+                         f"{(time.perf_counter() - started) * 1000:.0f} ms.")
+        return retrieved_chunks
 
-        # 4. Generate answer using the LLM, now with chat history
-        answer = self.llm_generator.generate_answer(query, retrieved_chunks, chat_history)
-        
-        # 5. Process sources for citation
+    @staticmethod
+    def _sources(retrieved_chunks: List[Dict]) -> List[Dict[str, str]]:
+        """Lists the distinct source documents of the retrieved chunks, for citation."""
         sources, seen_urls = [], set()
         for chunk in retrieved_chunks:
             metadata = chunk.get('metadata', {})
@@ -74,7 +273,257 @@ class RAGPipeline:
                     'source': metadata.get('source', 'N/A')
                 })
                 seen_urls.add(url)
+        return sources
+
+    def _log_completion(self):
+        stats = self.cache_stats()
+        self.logger.info(f"RAG pipeline execution complete. Cache hit rates: embedding "
+                         f"{stats['embedding']['hit_rate']:.0%}, BM25 {stats['bm25']['hit_rate']:.0%}, "
+                         f"answer {stats['answer']['hit_rate']:.0%} ({stats['answer']['evictions']} evicted).")
+
+    def execute(self, query: str, chat_history: List[Dict[str, str]] = None,
+                search_filter: Optional[SearchFilter] = None) -> Dict[str, Any]:
+        """
+        Executes the full RAG workflow for a given query and chat history.
+
+        Args:
+            query (str): The user's question.
+            chat_history (List[Dict[str, str]]): Previous messages of the conversation.
+            search_filter (Optional[SearchFilter]): Restricts both searches to matching
+                                                    chunks, e.g. one regulator or a date range.
+        """
+        self.logger.info(f"Executing Hybrid RAG pipeline for query: '{query}'"
+                         f"{f' with {search_filter}' if search_filter is not None and not search_filter.is_empty else ''}")
+
+        retrieved_chunks = self.retrieve(query, search_filter)
+        if retrieved_chunks is None:
+            return {"answer": "Error: Could not process the query.", "sources": []}
+
+        # 3. Reuse the answer to an equivalent question over the same chunks, if there is one
+        cache_key = self._answer_cache_key(query, retrieved_chunks, chat_history)
+        cached = self._answer_cache.get(*cache_key) if cache_key is not None else None
+        if cached is not None:
+            self.logger.info("Answered from the semantic answer cache.")
+            self._log_completion()
+            return dict(cached)
+
+        # 4. Generate answer using the LLM, now with chat history
+        answer = self.llm_generator.generate_answer(query, retrieved_chunks, chat_history)
         
-        self.logger.info("RAG pipeline execution complete.")
+        # 5. Process sources for citation
+        sources = self._sources(retrieved_chunks)
+        self._cache_answer(cache_key, answer, sources)
+        self._log_completion()
         return {"answer": answer, "sources": sources}
 
+    def stream_execute(self, query: str, chat_history: List[Dict[str, str]] = None,
+                       search_filter: Optional[SearchFilter] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Executes the RAG workflow like `execute`, but yields its results as they
+        become available instead of after the whole answer has been generated.
+
+        Yields, in order:
+            {"type": "sources", "sources": [...]} as soon as retrieval finishes;
+            {"type": "token", "text": ...} for each fragment of the answer;
+            {"type": "done", "answer": ..., "timings": {...}, "cached": ..., "failed": ...}
+            with the full answer, retrieval, time-to-first-token and total generation
+            times in ms, whether the answer came from the semantic answer cache, and
+            whether retrieval or generation failed. A failed answer ends with the error
+            message and is never cached.
+
+        Args:
+            query (str): The user's question.
+            chat_history (List[Dict[str, str]]): Previous messages of the conversation.
+            search_filter (Optional[SearchFilter]): Restricts both searches to matching chunks.
+        """
+        self.logger.info(f"Executing streaming Hybrid RAG pipeline for query: '{query}'"
+                         f"{f' with {search_filter}' if search_filter is not None and not search_filter.is_empty else ''}")
+        started = time.perf_counter()
+        retrieved_chunks = self.retrieve(query, search_filter)
+        timings = {"retrieval_ms": (time.perf_counter() - started) * 1000,
+                   "time_to_first_token_ms": None, "generation_ms": 0.0}
+        if retrieved_chunks is None:
+            answer = "Error: Could not process the query."
+            yield {"type": "sources", "sources": []}
+            yield {"type": "token", "text": answer}
+            yield {"type": "done", "answer": answer, "timings": timings, "cached": False, "failed": True}
+            return
+
+        cache_key = self._answer_cache_key(query, retrieved_chunks, chat_history)
+        cached = self._answer_cache.get(*cache_key) if cache_key is not None else None
+        if cached is not None:
+            self.logger.info("Answered from the semantic answer cache.")
+            timings["time_to_first_token_ms"] = 0.0
+            yield {"type": "sources", "sources": cached["sources"]}
+            yield {"type": "token", "text": cached["answer"]}
+            self._log_completion()
+            yield {"type": "done", "answer": cached["answer"], "timings": timings, "cached": True, "failed": False}
+            return
+        sources = self._sources(retrieved_chunks)
+        yield {"type": "sources", "sources": sources}
+
+        fragments, failed = [], False
+        generation_started = time.perf_counter()
+        try:
+            for fragment in self.llm_generator.stream_answer(query, retrieved_chunks, chat_history):
+                if not fragments:
+                    timings["time_to_first_token_ms"] = (time.perf_counter() - generation_started) * 1000
+                fragments.append(fragment)
+                yield {"type": "token", "text": fragment}
+        except LLMStreamError as e:
+            # Show the error after whatever was streamed; the answer is incomplete and never cached.
+            failed = True
+            message = f"\n\n{e}" if fragments else str(e)
+            fragments.append(message)
+            yield {"type": "token", "text": message}
+        timings["generation_ms"] = (time.perf_counter() - generation_started) * 1000
+
+        answer = "".join(fragments).strip()
+        first_token = timings["time_to_first_token_ms"]
+        self.logger.info(f"Streamed answer: retrieval {timings['retrieval_ms']:.0f} ms, first token "
+                         f"{f'{first_token:.0f} ms' if first_token is not None else 'never'}, "
+                         f"generation {timings['generation_ms']:.0f} ms.")
+        if not failed:
+            self._cache_answer(cache_key, answer, sources)
+        self._log_completion()
+        yield {"type": "done", "answer": answer, "timings": timings, "cached": False, "failed": failed}
+
+    async def aexecute(self, query: str, chat_history: List[Dict[str, str]] = None,
+                       search_filter: Optional[SearchFilter] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Asynchronous counterpart of `stream_execute` for asyncio applications: yields
+        the same events, while the blocking retrieval and reads from the LLM stream
+        run in the event loop's default executor instead of on the loop itself.
+        """
+        loop = asyncio.get_running_loop()
+        events = self.stream_execute(query, chat_history, search_filter)
+        finished = object()
+        while True:
+            event = await loop.run_in_executor(None, next, events, finished)
+            if event is finished:
+                return
+            yield event
+
+    def execute_many(self, queries: List[str], search_filter: Optional[SearchFilter] = None,
+                     max_concurrency: int = 4, requests_per_minute: float = 0) -> List[Dict[str, Any]]:
+        """
+        Answers many independent questions, e.g. a nightly regression set, sharing
+        the work that `execute` would repeat for each of them.
+
+        Queries missing from the embedding cache are embedded in one batch, BM25
+        scores every query against one index snapshot, vector searches run
+        concurrently, and LLM calls go through a pool of `max_concurrency` threads
+        that starts at most `requests_per_minute` requests. Questions answered in the
+        answer cache, and repeats of a question within the batch, make no LLM call.
+
+        Args:
+            queries (List[str]): The questions, answered without chat history.
+            search_filter (Optional[SearchFilter]): Restricts every query's searches.
+            max_concurrency (int): The most LLM requests in flight at once.
+            requests_per_minute (float): The LLM request rate limit; 0 means unlimited.
+
+        Returns:
+            One {"answer", "sources", "cached", "timings"} dict per query, in input
+            order. Timings are in ms; the batched embedding and keyword stages report
+            each query's share of the batch, and "total_ms" runs from the start of
+            the batch until the query's answer was ready.
+        """
+        if not queries:
+            return []
+        self.logger.info(f"Executing Hybrid RAG pipeline for a batch of {len(queries)} queries.")
+        started = time.perf_counter()
+        timings = [{} for _ in queries]
+
+        def record_share(stage: str, stage_started: float):
+            share = (time.perf_counter() - stage_started) * 1000 / len(queries)
+            for query_timings in timings:
+                query_timings[stage] = share
+
+        # 1. Embed every distinct query that is not cached yet in one forward pass
+        stage_started = time.perf_counter()
+        keys = [self._embedding_key(query) for query in queries]
+        missing = [key for key in dict.fromkeys(keys) if key and self._embedding_cache.peek(key) is None]
+        if missing:
+            embeddings = self.embedder.generate_embeddings(missing)
+            if len(embeddings) == len(missing):
+                for key, embedding in zip(missing, embeddings):
+                    self._cache_embedding(key, embedding)
+            else:
+                self.logger.error(f"Failed to embed {len(missing)} queries; answering them from keyword search only.")
+        query_embeddings = [self._embedding_cache.peek(key) if key else None for key in keys]
+        record_share("embedding_ms", stage_started)
+
+        # 2. Score every query against one BM25 snapshot, skipping those already cached
+        stage_started = time.perf_counter()
+        generation = self._current_bm25_generation()
+        bm25_keys = [self._bm25_key(query, search_filter, generation) for query in queries]
+        bm25_results = [self._bm25_cache.get(key) for key in bm25_keys]
+        pending = [i for i, results in enumerate(bm25_results) if results is None]
+        if pending:
+            try:
+                searched = self.keyword_index.search_many([queries[i] for i in pending], top_k=self.top_k,
+                                                          search_filter=search_filter)
+                for i, results in zip(pending, searched):
+                    bm25_results[i] = results
+                    self._bm25_cache.put(bm25_keys[i], results)
+            except Exception as e:
+                self.logger.error(f"Batch keyword search failed; continuing without it. Error: {e}", exc_info=True)
+        record_share("keyword_ms", stage_started)
+
+        # 3. Run the vector searches concurrently
+        def vector_search(i: int) -> Optional[List[Dict]]:
+            if query_embeddings[i] is None:
+                return None
+            try:
+                results, timings[i]["vector_ms"] = self._timed(self._vector_search, query_embeddings[i], search_filter)
+                return results
+            except Exception as e:
+                self.logger.error(f"Vector search for query {i} failed; continuing without it. Error: {e}", exc_info=True)
+                return None
+        vector_results = list(self._retrieval_executor.map(vector_search, range(len(queries))))
+
+        # 4. Fuse each query's results and serve what the answer cache already knows
+        results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+        retrieved, cache_keys = [None] * len(queries), [None] * len(queries)
+        jobs: Dict[tuple, List[int]] = {}
+        for i, query in enumerate(queries):
+            branches = [r for r in (bm25_results[i], vector_results[i]) if r is not None]
+            if not branches:
+                results[i] = {"answer": "Error: Could not process the query.", "sources": [], "cached": False}
+                timings[i]["total_ms"] = (time.perf_counter() - started) * 1000
+                continue
+            retrieved[i] = self._reciprocal_rank_fusion(branches)[:self.top_k]
+            cache_keys[i] = self._answer_cache_key(query, retrieved[i])
+            cached = self._answer_cache.get(*cache_keys[i]) if cache_keys[i] is not None else None
+            if cached is not None:
+                results[i] = {**cached, "cached": True}
+                timings[i]["total_ms"] = (time.perf_counter() - started) * 1000
+                continue
+            jobs.setdefault((keys[i], frozenset(chunk['id'] for chunk in retrieved[i])), []).append(i)
+
+        # 5. Generate the remaining answers on a bounded, rate-limited pool, once per distinct question
+        rate_limiter = RateLimiter(requests_per_minute)
+
+        def generate(indices: List[int]):
+            i = indices[0]
+            rate_limiter.wait()
+            generation_started = time.perf_counter()
+            answer = self.llm_generator.generate_answer(queries[i], retrieved[i])
+            generation_ms = (time.perf_counter() - generation_started) * 1000
+            sources = self._sources(retrieved[i])
+            self._cache_answer(cache_keys[i], answer, sources)
+            for j in indices:
+                results[j] = {"answer": answer, "sources": sources, "cached": j != i}
+                timings[j]["generation_ms"] = generation_ms
+                timings[j]["total_ms"] = (time.perf_counter() - started) * 1000
+
+        if jobs:
+            with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="llm") as pool:
+                list(pool.map(generate, jobs.values()))
+
+        for result, query_timings in zip(results, timings):
+            result["timings"] = query_timings
+        self.logger.info(f"Answered {len(queries)} queries with {len(jobs)} LLM calls in "
+                         f"{(time.perf_counter() - started):.1f}s.")
+        self._log_completion()
+        return results
@@ -0,0 +1,93 @@
+import time
+import logging
+import threading
+from typing import Any, Callable
+from src.retrieval.embedding_backend import create_embedder
+from src.retrieval.vector_backend import create_vector_index
+from src.generation.llm_generator import LLMGenerator
+from src.generation.context_packer import ContextPacker
+from src.pipeline.rag_pipeline import RAGPipeline
+from src.retrieval.document_store import DocumentStore
+from src.retrieval.keyword_index import KeywordIndex
+from src.pipeline.query_cache import load_queries
+
+class BackgroundLoader:
+    """
+    Runs a slow initialization, such as loading models and connecting to indexes,
+    on a background thread, so a UI can render while it runs.
+
+    `ready` is the readiness signal: it is set once loading has finished, whether
+    it succeeded or not. `wait` blocks until then and returns the result, or
+    re-raises the loading error.
+
+    Args:
+        load (Callable[[], Any]): Builds and returns the resource.
+        name (str): A name for the log messages and the thread.
+    """
+    def __init__(self, load: Callable[[], Any], name: str):
+        self.logger = logging.getLogger(__name__)
+        self.name = name
+        self.ready = threading.Event()
+        self.elapsed_seconds = None
+        self._load = load
+        self._result = None
+        self._error = None
+        self._started = time.perf_counter()
+        threading.Thread(target=self._run, name=f"load-{name}", daemon=True).start()
+
+    def _run(self):
+        try:
+            self._result = self._load()
+        except Exception as e:
+            self.logger.error(f"Loading {self.name} failed. Error: {e}", exc_info=True)
+            self._error = e
+        finally:
+            self.elapsed_seconds = time.perf_counter() - self._started
+            self.ready.set()
+        if self._error is None:
+            self.logger.info(f"Loaded {self.name} in {self.elapsed_seconds:.1f}s.")
+
+    @property
+    def failed(self) -> bool:
+        return self._error is not None
+
+    def wait(self, timeout: float = None) -> Any:
+        """
+        Blocks until loading has finished and returns the result.
+
+        Args:
+            timeout (float): Seconds to wait at most; None waits indefinitely.
+
+        Raises:
+            TimeoutError: If loading has not finished within the timeout.
+        """
+        if not self.ready.wait(timeout):
+            raise TimeoutError(f"{self.name} is still loading after {timeout}s.")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+def build_pipeline(config) -> RAGPipeline:
+    """
+    Loads the embedding model, connects to the vector index and builds the RAG
+    pipeline, with its query caches warmed, ready to answer the first query.
+
+    Args:
+        config (Config): The application configuration.
+    """
+    embedder = create_embedder(config)
+    vector_index = create_vector_index(config)
+    vector_index.warmup()
+    llm_generator = LLMGenerator(api_key=config.groq_api_key, model=config.llm_model,
+                                 context_packer=ContextPacker(config.context_token_budget))
+    # The keyword index reads chunk text from the same store the realtime processor writes to.
+    keyword_index = KeywordIndex(document_store=DocumentStore(config.document_store_path))
+    pipeline = RAGPipeline(embedder, vector_index, llm_generator, config.top_k_retrieval,
+                           keyword_index=keyword_index,
+                           query_cache_size=config.query_cache_size,
+                           keyword_timeout_seconds=config.keyword_search_timeout_seconds,
+                           semantic_timeout_seconds=config.semantic_search_timeout_seconds,
+                           answer_cache_size=config.answer_cache_size,
+                           answer_cache_threshold=config.answer_cache_similarity)
+    pipeline.warmup(load_queries(config.warmup_queries_path))
+    return pipeline
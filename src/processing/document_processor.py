@@ -1,5 +1,4 @@
 import logging
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from typing import List
 
 class DocumentProcessor:
@@ -16,6 +15,8 @@ class DocumentProcessor:
             chunk_overlap (int): The number of characters to overlap between chunks
                                  to maintain context.
         """
+        # Imported here so that importing this module does not load langchain.
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
         self.logger = logging.getLogger(__name__)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
@@ -0,0 +1,99 @@
+import numpy as np
+from typing import Dict, List
+
+def tokenize(text: str) -> List[str]:
+    """Tokenizes text exactly the way the keyword index always has: lowercase, split on spaces."""
+    return text.lower().split(" ")
+
+class IncrementalBM25:
+    """
+    An append-only inverted index: per-term postings plus document lengths, the
+    raw counts a BM25 segment is written from.
+
+    New documents are added in O(number of new tokens): each one appends to the
+    per-term postings and to the document lengths. Scoring happens on the
+    written segments, with statistics taken across all of them (see
+    `bm25_segments.IndexSnapshot`).
+    """
+    def __init__(self):
+        # term -> (document indices, term frequencies), both in insertion order
+        self.postings: Dict[str, tuple] = {}
+        self.doc_len: List[int] = []
+
+    def add_document(self, tokens: List[str]) -> int:
+        """
+        Appends a tokenized document to the index.
+
+        Args:
+            tokens (List[str]): The document's tokens.
+
+        Returns:
+            The integer index assigned to the document.
+        """
+        doc_idx = len(self.doc_len)
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+
+        for term, freq in frequencies.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = ([], [])
+            posting[0].append(doc_idx)
+            posting[1].append(freq)
+
+        self.doc_len.append(len(tokens))
+        return doc_idx
+
+    def add_documents(self, corpus: List[List[str]]) -> List[int]:
+        """Appends several tokenized documents and returns their indices."""
+        return [self.add_document(tokens) for tokens in corpus]
+
+# Below this fraction of the corpus, scores are accumulated over the touched
+# documents only instead of allocating a dense score vector.
+SPARSE_ACCUMULATION_RATIO = 0.125
+
+def accumulate_scores(gathered_indices: List[np.ndarray], gathered_weights: List[np.ndarray], num_docs: int):
+    """
+    Sums per-term BM25 contributions gathered from postings rows.
+
+    Args:
+        gathered_indices (List[np.ndarray]): Document numbers of each gathered row.
+        gathered_weights (List[np.ndarray]): The matching per-document term weights.
+        num_docs (int): The total number of documents in the index.
+
+    Returns:
+        A tuple of (candidate document numbers, their scores). Documents that share
+        no term with the query are never candidates.
+    """
+    if not gathered_indices:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+    if len(gathered_indices) == 1:
+        return gathered_indices[0], gathered_weights[0]
+
+    indices = np.concatenate(gathered_indices)
+    weights = np.concatenate(gathered_weights)
+    if len(indices) < num_docs * SPARSE_ACCUMULATION_RATIO:
+        candidates, inverse = np.unique(indices, return_inverse=True)
+        return candidates, np.bincount(inverse, weights=weights, minlength=len(candidates))
+
+    scores = np.bincount(indices, weights=weights, minlength=num_docs)
+    touched = np.zeros(num_docs, dtype=bool)
+    touched[indices] = True
+    candidates = np.flatnonzero(touched)
+    return candidates, scores[candidates]
+
+def select_top_k(candidates: np.ndarray, scores: np.ndarray, top_k: int):
+    """
+    Picks the top_k candidates with `numpy.argpartition` and orders them best first.
+    Ties go to the smaller candidate, as with a stable sort over candidates in order,
+    including ties at the cut-off, which the partition alone would break arbitrarily.
+    """
+    if top_k <= 0:
+        return candidates[:0], scores[:0]
+    if len(candidates) > top_k:
+        kth_score = scores[np.argpartition(-scores, top_k - 1)[top_k - 1]]
+        keep = scores >= kth_score
+        candidates, scores = candidates[keep], scores[keep]
+    order = np.lexsort((candidates, -scores))[:top_k]
+    return candidates[order], scores[order]
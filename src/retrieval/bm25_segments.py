@@ -0,0 +1,306 @@
+import io
+import os
+import json
+import math
+import bisect
+import shutil
+import hashlib
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from src.retrieval.bm25 import IncrementalBM25, accumulate_scores, select_top_k
+from src.retrieval.file_lock import atomic_write_bytes
+from src.retrieval.filters import FieldColumns, SearchFilter
+
+MANIFEST_NAME = "manifest.json"
+
+def term_hash(term: str) -> int:
+    """Maps a term to the stable 64-bit key used as its vocabulary entry on disk."""
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+def _save_array(path: Path, array: np.ndarray):
+    with open(path, "wb") as f:
+        np.save(f, np.ascontiguousarray(array))
+        f.flush()
+        os.fsync(f.fileno())
+
+def _write_segment_files(path: Path, posting_terms: np.ndarray, posting_docs: np.ndarray,
+                         posting_tfs: np.ndarray, doc_lens: np.ndarray, row_ids: np.ndarray,
+                         fields: Optional[FieldColumns] = None) -> Dict[str, Any]:
+    """
+    Writes one segment directory from a flat postings table of (term hash, doc, tf).
+
+    Files:
+        terms.npy        sorted uint64 term hashes (the vocabulary)
+        indptr.npy       int64 CSR row pointers into postings/tfs, one row per term
+        postings.npy     int32 segment-local document numbers
+        tfs.npy          int32 term frequencies
+        doc_lens.npy     int32 token count per document
+        row_ids.npy      int64 DocumentStore row id of each document
+        source.npy, doc_type.npy, published_ts.npy, fields.json
+                         per-document filter columns (see FieldColumns)
+
+    The files are written into a hidden staging directory that is renamed into
+    place once complete, so a crash never leaves a half-written segment behind
+    under a real segment name.
+    """
+    final_path = path
+    path = path.with_name(f".{path.name}.tmp")
+    path.mkdir(parents=True)
+    order = np.lexsort((posting_docs, posting_terms))
+    posting_terms = posting_terms[order]
+    terms, counts = np.unique(posting_terms, return_counts=True)
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+
+    _save_array(path / "terms.npy", terms.astype(np.uint64))
+    _save_array(path / "indptr.npy", indptr)
+    _save_array(path / "postings.npy", posting_docs[order].astype(np.int32))
+    _save_array(path / "tfs.npy", posting_tfs[order].astype(np.int32))
+    _save_array(path / "doc_lens.npy", doc_lens.astype(np.int32))
+    _save_array(path / "row_ids.npy", row_ids.astype(np.int64))
+    if fields is not None:
+        fields.save(path, _save_array)
+    os.replace(path, final_path)
+
+    return {"name": final_path.name, "num_docs": len(doc_lens), "total_len": int(doc_lens.sum())}
+
+def write_segment(path: Path, row_ids: List[int], tokenized: List[List[str]],
+                  fields: Optional[FieldColumns] = None) -> Dict[str, Any]:
+    """
+    Builds a new immutable segment for a batch of documents.
+
+    Args:
+        path (Path): The segment directory to create.
+        row_ids (List[int]): The DocumentStore row id of each document.
+        tokenized (List[List[str]]): The tokens of each document.
+        fields (Optional[FieldColumns]): The filter fields of each document.
+
+    Returns:
+        The manifest entry describing the segment.
+    """
+    builder = IncrementalBM25()
+    builder.add_documents(tokenized)
+
+    counts = np.fromiter((len(p[0]) for p in builder.postings.values()), dtype=np.int64, count=len(builder.postings))
+    hashes = np.fromiter((term_hash(t) for t in builder.postings), dtype=np.uint64, count=len(builder.postings))
+    posting_docs = np.fromiter((d for docs, _ in builder.postings.values() for d in docs), dtype=np.int64, count=int(counts.sum()))
+    posting_tfs = np.fromiter((f for _, tfs in builder.postings.values() for f in tfs), dtype=np.int64, count=int(counts.sum()))
+
+    return _write_segment_files(path, np.repeat(hashes, counts), posting_docs, posting_tfs,
+                                np.array(builder.doc_len, dtype=np.int64), np.array(row_ids, dtype=np.int64), fields)
+
+def merge_segments(path: Path, segments: List["Segment"],
+                   dead_row_ids: Optional[np.ndarray] = None) -> Optional[Dict[str, Any]]:
+    """
+    Merges several segments, in order, into a single new segment without re-tokenizing.
+
+    Documents whose row id is in `dead_row_ids` are physically dropped together
+    with their postings. Returns None if no live document is left.
+    """
+    terms, docs, tfs, doc_lens, row_ids, selectors = [], [], [], [], [], []
+    base = 0
+    for segment in segments:
+        seg_row_ids = np.asarray(segment.row_ids)
+        live = np.ones(segment.num_docs, dtype=bool)
+        if dead_row_ids is not None and len(dead_row_ids):
+            live = ~np.isin(seg_row_ids, dead_row_ids)
+        # Renumber the surviving documents contiguously after the previous segments.
+        new_numbers = np.cumsum(live) - 1 + base
+        seg_terms = np.repeat(np.asarray(segment.terms), np.diff(segment.indptr))
+        seg_docs = np.asarray(segment.postings, dtype=np.int64)
+        keep = live[seg_docs]
+        terms.append(seg_terms[keep])
+        docs.append(new_numbers[seg_docs[keep]])
+        tfs.append(np.asarray(segment.tfs)[keep])
+        doc_lens.append(np.asarray(segment.doc_lens)[live])
+        row_ids.append(seg_row_ids[live])
+        selectors.append(live)
+        base += int(live.sum())
+
+    if not base:
+        return None
+    fields = None
+    if all(segment.fields is not None for segment in segments):
+        fields = FieldColumns.concatenate([segment.fields for segment in segments], selectors)
+    return _write_segment_files(path, np.concatenate(terms), np.concatenate(docs), np.concatenate(tfs),
+                                np.concatenate(doc_lens), np.concatenate(row_ids), fields)
+
+class Segment:
+    """
+    A read-only view over one segment directory.
+
+    Every array is opened with `mmap`, so nothing is deserialized up front and
+    processes that open the same segment share the operating system's page cache.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.name = path.name
+        self.terms = np.load(path / "terms.npy", mmap_mode="r")
+        self.indptr = np.load(path / "indptr.npy", mmap_mode="r")
+        self.postings = np.load(path / "postings.npy", mmap_mode="r")
+        self.tfs = np.load(path / "tfs.npy", mmap_mode="r")
+        self.doc_lens = np.load(path / "doc_lens.npy", mmap_mode="r")
+        self.row_ids = np.load(path / "row_ids.npy", mmap_mode="r")
+        # None for segments written before filter fields existed; see KeywordIndex._open_segment.
+        self.fields: Optional[FieldColumns] = FieldColumns.load(path)
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_lens)
+
+    def find_row(self, key: int) -> Optional[int]:
+        """Returns the postings row for a term hash, or None if the term is absent."""
+        row = int(np.searchsorted(self.terms, np.uint64(key)))
+        if row < len(self.terms) and int(self.terms[row]) == key:
+            return row
+        return None
+
+    def row(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (local document numbers, term frequencies) for a postings row."""
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return self.postings[start:end], self.tfs[start:end]
+
+def average_idf(segments: List[Segment], num_docs: int) -> float:
+    """Computes BM25Okapi's mean raw idf over the vocabulary shared by all segments."""
+    if not segments or not num_docs:
+        return 0.0
+    terms = np.concatenate([np.asarray(s.terms) for s in segments])
+    doc_freqs = np.concatenate([np.diff(s.indptr) for s in segments])
+    _, inverse = np.unique(terms, return_inverse=True)
+    global_freqs = np.bincount(inverse, weights=doc_freqs)
+    idf = np.log(num_docs - global_freqs + 0.5) - np.log(global_freqs + 0.5)
+    return float(idf.mean())
+
+def read_manifest(index_dir: Path) -> Optional[Dict[str, Any]]:
+    """Reads the published manifest, or returns None if there is none yet."""
+    try:
+        with open(index_dir / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def publish_manifest(index_dir: Path, manifest: Dict[str, Any]):
+    """Atomically replaces the manifest so readers see either the old or the new one."""
+    atomic_write_bytes(index_dir / MANIFEST_NAME, json.dumps(manifest).encode("utf-8"))
+
+def write_tombstones(index_dir: Path, name: str, row_ids: np.ndarray):
+    """Atomically writes the sorted row ids of deleted documents under the given file name."""
+    buffer = io.BytesIO()
+    np.save(buffer, np.unique(np.asarray(row_ids, dtype=np.int64)))
+    atomic_write_bytes(index_dir / name, buffer.getvalue())
+
+def remove_segment(path: Path):
+    """Deletes a segment directory or tombstone file that is no longer referenced by the manifest."""
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+class IndexSnapshot:
+    """
+    An immutable view of the index as described by one manifest.
+
+    BM25 statistics (document count, average length, idf) are global across
+    segments, so term weights are computed from the memory-mapped term
+    frequencies at query time rather than stored per segment.
+
+    Tombstoned documents are masked out of the results but, as in other
+    log-structured indexes, still count towards the statistics until
+    compaction physically removes them.
+    """
+    def __init__(self, manifest: Dict[str, Any], segments: List[Segment], tombstones: Optional[np.ndarray] = None):
+        self.generation = manifest.get("generation", 0)
+        self.segments = segments
+        self.k1 = manifest.get("k1", 1.5)
+        self.b = manifest.get("b", 0.75)
+        self.epsilon = manifest.get("epsilon", 0.25)
+        self.average_idf = manifest.get("average_idf", 0.0)
+        self.bases = []
+        total_docs, total_len = 0, 0
+        for entry, segment in zip(manifest.get("segments", []), segments):
+            self.bases.append(total_docs)
+            total_docs += entry["num_docs"]
+            total_len += entry["total_len"]
+        self.num_docs = total_docs
+        self.avgdl = total_len / total_docs if total_docs else 0.0
+        self.tombstones = tombstones if tombstones is not None else np.zeros(0, dtype=np.int64)
+        self.dead = None
+        if len(self.tombstones):
+            self.dead = np.isin(self.all_row_ids(), self.tombstones)
+        self.num_live_docs = total_docs - (int(self.dead.sum()) if self.dead is not None else 0)
+
+    def _idf(self, doc_freq: int) -> float:
+        idf = math.log(self.num_docs - doc_freq + 0.5) - math.log(doc_freq + 0.5)
+        if idf < 0:
+            return self.epsilon * self.average_idf
+        return idf
+
+    def search(self, query: List[str], top_k: int = 5,
+               search_filter: Optional[SearchFilter] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores a tokenized query against every segment.
+
+        A filter is applied to the postings before any weight is computed, so only
+        matching documents are scored and the top_k is taken among them. Corpus
+        statistics (idf, average length) stay global, so a document scores the
+        same with or without a filter.
+
+        Returns:
+            A tuple of (global document numbers, scores), best first.
+        """
+        masks = [None] * len(self.segments)
+        if search_filter is not None and not search_filter.is_empty:
+            masks = [segment.fields.mask(search_filter) if segment.fields is not None
+                     else np.zeros(segment.num_docs, dtype=bool) for segment in self.segments]
+            if not any(mask.any() for mask in masks):
+                return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+
+        term_counts: Dict[int, int] = {}
+        for term in query:
+            key = term_hash(term)
+            term_counts[key] = term_counts.get(key, 0) + 1
+
+        gathered_indices, gathered_weights = [], []
+        for key, count in term_counts.items():
+            rows = []
+            for base, segment, mask in zip(self.bases, self.segments, masks):
+                row = segment.find_row(key)
+                if row is not None:
+                    rows.append((base, segment, mask, row))
+            if not rows:
+                continue
+
+            doc_freq = sum(int(seg.indptr[row + 1] - seg.indptr[row]) for _, seg, _, row in rows)
+            idf = self._idf(doc_freq) * count
+            for base, segment, mask, row in rows:
+                local_docs, tfs = segment.row(row)
+                if mask is not None:
+                    keep = mask[local_docs]
+                    if not keep.any():
+                        continue
+                    local_docs, tfs = local_docs[keep], tfs[keep]
+                tfs = tfs.astype(np.float64)
+                norm = self.k1 * (1 - self.b + self.b * segment.doc_lens[local_docs] / self.avgdl)
+                gathered_indices.append(local_docs.astype(np.int64) + base)
+                gathered_weights.append(idf * (tfs * (self.k1 + 1) / (tfs + norm)))
+
+        candidates, scores = accumulate_scores(gathered_indices, gathered_weights, self.num_docs)
+        if self.dead is not None and len(candidates):
+            live = ~self.dead[candidates]
+            candidates, scores = candidates[live], scores[live]
+        return select_top_k(candidates, scores, top_k)
+
+    def row_ids_for(self, doc_indices: np.ndarray) -> List[int]:
+        """Maps global document numbers to the DocumentStore row ids they refer to."""
+        row_ids = []
+        for doc_idx in doc_indices:
+            seg_idx = bisect.bisect_right(self.bases, int(doc_idx)) - 1
+            row_ids.append(int(self.segments[seg_idx].row_ids[int(doc_idx) - self.bases[seg_idx]]))
+        return row_ids
+
+    def all_row_ids(self) -> np.ndarray:
+        """Returns the row ids of every document in the snapshot."""
+        if not self.segments:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.asarray(s.row_ids) for s in self.segments])
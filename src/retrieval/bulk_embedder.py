@@ -0,0 +1,108 @@
+import os
+import re
+import sys
+import logging
+import numpy as np
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+from src.retrieval.embedding_backend import BaseEmbedder, create_embedder, empty_embeddings
+
+# Words and punctuation marks, as split by BERT's pre-tokenizer. Counting them tracks
+# the WordPiece length closely without loading a tokenizer in the parent process.
+_PRE_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# The embedder each worker process loads once, in its initializer.
+_worker_embedder = None
+
+def _init_worker(config, threads: int):
+    global _worker_embedder
+    config.embedding_service_config.micro_batching = False
+    config.onnx_embedder_config.intra_op_threads = threads
+    _worker_embedder = create_embedder(config)
+    if "torch" in sys.modules:
+        # Workers split the cores between them instead of each spawning a thread per core.
+        import torch
+        torch.set_num_threads(threads)
+
+def _embed_bucket(texts: List[str]) -> np.ndarray:
+    return _worker_embedder.generate_embeddings(texts)
+
+def _worker_model_id() -> str:
+    return _worker_embedder.model_id
+
+def approximate_token_length(text: str) -> int:
+    """Returns the number of pre-tokens in a text, a cheap stand-in for its token count."""
+    return len(_PRE_TOKEN_PATTERN.findall(text))
+
+class BulkEmbedder(BaseEmbedder):
+    """
+    Embeds large batches of texts, such as ingestion bursts or a backfill, across
+    a pool of worker processes.
+
+    Texts are sorted by approximate token length and cut into buckets of
+    `batch_size`, so every forward pass pads to a length close to that of its own
+    texts instead of the longest chunk in the batch. Buckets are sent to the
+    workers longest first, so the slowest ones do not trail at the end, and the
+    results are put back in input order. Each worker loads the model once and
+    gets an equal share of the cores, so tokenization and inference run on every
+    core instead of one process.
+
+    Args:
+        config (Config): The application configuration; workers build their
+                         embedder from it with `create_embedder`.
+    """
+    def __init__(self, config):
+        if config.embedding_backend == "remote":
+            raise ValueError("Bulk embedding runs the model in worker processes; use the 'torch' or 'onnx' backend.")
+        self.logger = logging.getLogger(__name__)
+        bulk_config = config.bulk_embedding_config
+        self.num_workers = bulk_config.num_workers
+        self.batch_size = bulk_config.batch_size
+        threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+        # Spawned workers start clean instead of inheriting the parent's threads and locks.
+        self._pool = ProcessPoolExecutor(max_workers=self.num_workers, mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=_init_worker, initargs=(config, threads))
+        # Start every worker now so model loading overlaps with the caller's own start-up.
+        futures = [self._pool.submit(_worker_model_id) for _ in range(self.num_workers)]
+        self.model_id = futures[0].result()
+        self.logger.info(f"Bulk embedder started {self.num_workers} workers with {threads} threads each for {self.model_id}")
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Encodes a list of texts into vector embeddings.
+
+        Args:
+            texts (List[str]): A list of text strings to encode.
+
+        Returns:
+            A (len(texts), dim) float32 array in input order, or an array with no rows on failure.
+        """
+        if not texts:
+            self.logger.warning("generate_embeddings was called with an empty list of texts.")
+            return empty_embeddings()
+
+        lengths = np.array([approximate_token_length(text) for text in texts])
+        order = np.argsort(-lengths, kind="stable")
+        buckets = [order[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        self.logger.info(f"Embedding {len(texts)} texts in {len(buckets)} length buckets on {self.num_workers} workers...")
+        try:
+            futures = [self._pool.submit(_embed_bucket, [texts[i] for i in bucket]) for bucket in buckets]
+            embeddings = None
+            for bucket, future in zip(buckets, futures):
+                bucket_embeddings = future.result()
+                if len(bucket_embeddings) != len(bucket):
+                    self.logger.error(f"A worker failed to embed a bucket of {len(bucket)} texts.")
+                    return empty_embeddings()
+                if embeddings is None:
+                    embeddings = np.empty((len(texts), bucket_embeddings.shape[1]), dtype=np.float32)
+                embeddings[bucket] = bucket_embeddings
+        except Exception as e:
+            self.logger.error(f"Bulk embedding failed. Error: {e}", exc_info=True)
+            return empty_embeddings()
+        self.logger.info("Embeddings generated successfully.")
+        return embeddings
+
+    def close(self):
+        """Stops the worker processes."""
+        self._pool.shutdown(cancel_futures=True)
@@ -0,0 +1,158 @@
+import json
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Iterator, Optional
+
+class DocumentStore:
+    """
+    A compact SQLite store for chunk text and metadata.
+
+    Every chunk gets a stable integer row id the first time it is stored, which
+    is all the search indexes need to carry. Callers fetch the full documents for
+    just the hits they return, by row id or by chunk id, in one batched query.
+    SQLite's WAL mode lets the ingestion, summarizer and UI processes share the
+    same file safely.
+    """
+    # SQLite limits the number of bound parameters per statement.
+    _MAX_PARAMS = 900
+
+    def __init__(self, db_path: str = "artifacts/documents.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunks (
+                    row_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    chunk_id TEXT NOT NULL UNIQUE,
+                    text TEXT NOT NULL,
+                    metadata TEXT NOT NULL
+                )
+                """
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Returns this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _slim_metadata(doc: Dict[str, Any]) -> Dict[str, Any]:
+        # The chunk text has its own column; don't store a second copy inside the metadata.
+        return {k: v for k, v in doc.get('metadata', {}).items() if k != 'text'}
+
+    @staticmethod
+    def _row_to_document(row) -> Dict[str, Any]:
+        return {'id': row[1], 'text': row[2], 'metadata': json.loads(row[3])}
+
+    def put(self, documents: List[Dict[str, Any]]) -> List[int]:
+        """
+        Stores documents that are not already present and returns the row id of each.
+
+        Args:
+            documents (List[Dict[str, Any]]): Chunks with 'id', 'text' and 'metadata'.
+
+        Returns:
+            The integer row id for every input document, in input order. Chunks that
+            were already stored keep their existing row id and content.
+        """
+        if not documents:
+            return []
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO chunks (chunk_id, text, metadata) VALUES (?, ?, ?)",
+                [(doc['id'], doc['text'], json.dumps(self._slim_metadata(doc), ensure_ascii=False)) for doc in documents]
+            )
+        row_ids = self.lookup_row_ids([doc['id'] for doc in documents])
+        return [row_ids[doc['id']] for doc in documents]
+
+    def lookup_row_ids(self, chunk_ids: List[str]) -> Dict[str, int]:
+        """Maps chunk ids to their row ids; unknown chunk ids are omitted."""
+        result: Dict[str, int] = {}
+        conn = self._connection()
+        for i in range(0, len(chunk_ids), self._MAX_PARAMS):
+            batch = chunk_ids[i:i + self._MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            for row_id, chunk_id in conn.execute(
+                f"SELECT row_id, chunk_id FROM chunks WHERE chunk_id IN ({placeholders})", batch
+            ):
+                result[chunk_id] = row_id
+        return result
+
+    def _fetch(self, column: str, keys: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        found: Dict[Any, Dict[str, Any]] = {}
+        conn = self._connection()
+        for i in range(0, len(keys), self._MAX_PARAMS):
+            batch = keys[i:i + self._MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            for row in conn.execute(
+                f"SELECT row_id, chunk_id, text, metadata FROM chunks WHERE {column} IN ({placeholders})", batch
+            ):
+                found[row[0] if column == "row_id" else row[1]] = self._row_to_document(row)
+        return found
+
+    def get_many(self, row_ids: List[int]) -> List[Optional[Dict[str, Any]]]:
+        """Fetches documents by row id, in input order (None for unknown ids)."""
+        found = self._fetch("row_id", [int(r) for r in row_ids])
+        return [found.get(int(r)) for r in row_ids]
+
+    def get_by_chunk_ids(self, chunk_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Fetches documents by chunk id, in input order (None for unknown ids)."""
+        found = self._fetch("chunk_id", list(chunk_ids))
+        return [found.get(c) for c in chunk_ids]
+
+    def chunks_for_document(self, document_id: str) -> List[Dict[str, Any]]:
+        """
+        Returns every stored chunk of a source document, ordered by chunk number.
+
+        Chunk ids have the form `{document_id}_{i}`, so this is a range scan over
+        the chunk id index rather than a separate column.
+        """
+        rows = self._connection().execute(
+            "SELECT row_id, chunk_id, text, metadata FROM chunks WHERE chunk_id >= ? AND chunk_id < ?",
+            (f"{document_id}_", f"{document_id}`")
+        ).fetchall()
+        documents = []
+        for row in rows:
+            doc = self._row_to_document(row)
+            doc['row_id'] = row[0]
+            documents.append(doc)
+        # Same prefix, so ordering by (length, id) orders by the numeric chunk suffix.
+        documents.sort(key=lambda doc: (len(doc['id']), doc['id']))
+        return documents
+
+    def iter_chunks(self, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Yields every stored chunk in row id order, `batch_size` chunks at a time."""
+        last_row_id = 0
+        while True:
+            rows = self._connection().execute(
+                "SELECT row_id, chunk_id, text, metadata FROM chunks WHERE row_id > ? ORDER BY row_id LIMIT ?",
+                (last_row_id, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            yield [self._row_to_document(row) for row in rows]
+            last_row_id = rows[-1][0]
+
+    def delete(self, row_ids: List[int]):
+        """Deletes documents by row id. Row ids are never reused for new documents."""
+        conn = self._connection()
+        with conn:
+            for i in range(0, len(row_ids), self._MAX_PARAMS):
+                batch = [int(r) for r in row_ids[i:i + self._MAX_PARAMS]]
+                placeholders = ",".join("?" * len(batch))
+                conn.execute(f"DELETE FROM chunks WHERE row_id IN ({placeholders})", batch)
+
+    def count(self) -> int:
+        """Returns the number of stored chunks."""
+        return self._connection().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
@@ -1,49 +1,57 @@
 import logging
-import torch
-from sentence_transformers import SentenceTransformer
+import numpy as np
 from typing import List
+from src.retrieval.embedding_backend import BaseEmbedder, empty_embeddings
 
-class Embedder:
+class Embedder(BaseEmbedder):
     """
     A wrapper class for a SentenceTransformer model to handle text embedding.
     It automatically selects the best available device (CUDA or CPU) for performance.
     """
     def __init__(self, model_name: str):
+        # torch and sentence-transformers take seconds to import, so only pay for them
+        # when a model is actually loaded, not whenever this module is imported.
+        import torch
+        from sentence_transformers import SentenceTransformer
         self.logger = logging.getLogger(__name__)
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.logger.info(f"Embedder is using device: {self.device}")
         self.model = SentenceTransformer(model_name, device=self.device)
+        self.model_id = model_name
         self.batch_size = 32  #  <-- ADD THIS LINE to define the attribute
         self.logger.info(f"Successfully loaded embedding model: {model_name}")
 
 
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
         """
-        Encodes a list of texts into a list of vector embeddings.
+        Encodes a list of texts into vector embeddings.
 
         Args:
             texts (List[str]): A list of text strings to encode.
 
         Returns:
-            A list of lists, where each inner list is a vector embedding.
+            A (len(texts), dim) float32 array of unit-length embeddings, or an
+            array with no rows on failure.
         """
         if not texts:
             self.logger.warning("generate_embeddings was called with an empty list of texts.")
-            return []
+            return empty_embeddings()
 
         self.logger.info(f"Generating embeddings for {len(texts)} text documents...")
         try:
-            # The model encodes the text, normalizes the embeddings for cosine similarity,
-            # and returns them as a list of Python lists.
+            # The model encodes the text and normalizes the embeddings for cosine similarity,
+            # once, here; they stay a float32 array all the way to the vector index.
             embeddings = self.model.encode(
             texts,
             batch_size=self.batch_size,
-            show_progress_bar=True,
-            convert_to_numpy=True  # <-- ADD THIS ARGUMENT
-            ).tolist()
+            # A progress bar only helps bulk jobs; for single queries it is just noise in the logs.
+            show_progress_bar=len(texts) > self.batch_size,
+            convert_to_numpy=True,  # <-- ADD THIS ARGUMENT
+            normalize_embeddings=True
+            )
             self.logger.info("Embeddings generated successfully.")
-            return embeddings
+            return np.ascontiguousarray(embeddings, dtype=np.float32)
         except Exception as e:
             self.logger.error(f"Failed to generate embeddings. Error: {e}", exc_info=True)
-            return []
+            return empty_embeddings()
 
@@ -0,0 +1,60 @@
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import List
+
+def empty_embeddings() -> np.ndarray:
+    """The result for no texts, or for a failed batch: a float32 array with no rows."""
+    return np.zeros((0, 0), dtype=np.float32)
+
+class BaseEmbedder(ABC):
+    """
+    The interface shared by every embedding backend.
+
+    Embeddings are returned as one contiguous float32 array with a unit-length row
+    per text, so they can be cached, searched and stored without ever becoming
+    Python lists; only clients of remote services convert them to a wire format.
+    Callers check for failure with `len(embeddings) != len(texts)`.
+
+    `model_id` names the exact model variant that produced the vectors, so caches
+    keyed on it never mix embeddings from, say, a full-precision and a quantized model.
+    """
+    model_id: str = ""
+
+    @abstractmethod
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Encodes texts into a (len(texts), dim) float32 array in input order, or an array with no rows on failure."""
+
+def create_embedder(config, bulk: bool = False) -> BaseEmbedder:
+    """
+    Builds the embedding backend selected by `config.embedding_backend`.
+
+    Backends are imported lazily so that the ONNX and remote backends never
+    import torch. With micro-batching enabled, a local backend is wrapped so that
+    concurrent calls share forward passes.
+
+    Args:
+        config (Config): The application configuration.
+        bulk (bool): The caller embeds large batches (ingestion, backfill); if bulk
+                     workers are configured, embed across a process pool.
+    """
+    backend = config.embedding_backend
+    if bulk and config.bulk_embedding_config.num_workers > 0:
+        from src.retrieval.bulk_embedder import BulkEmbedder
+        return BulkEmbedder(config)
+    if backend == "remote":
+        from src.retrieval.embedding_service import RemoteEmbedder
+        return RemoteEmbedder(config.embedding_service_config)
+    if backend == "torch":
+        from src.retrieval.embedder import Embedder
+        embedder = Embedder(config.embedding_model)
+    elif backend == "onnx":
+        from src.retrieval.onnx_embedder import OnnxEmbedder
+        embedder = OnnxEmbedder(config.onnx_embedder_config)
+    else:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Expected 'torch', 'onnx' or 'remote'.")
+
+    service_config = config.embedding_service_config
+    if service_config.micro_batching:
+        from src.retrieval.embedding_batcher import MicroBatchingEmbedder
+        return MicroBatchingEmbedder(embedder, service_config.max_batch_size, service_config.max_wait_ms)
+    return embedder
@@ -0,0 +1,104 @@
+import time
+import queue
+import logging
+import threading
+import numpy as np
+from concurrent.futures import Future
+from typing import Any, Dict, List, Tuple
+from src.retrieval.embedding_backend import BaseEmbedder, empty_embeddings
+
+class MicroBatchingEmbedder(BaseEmbedder):
+    """
+    Coalesces concurrent `generate_embeddings` calls into shared forward passes.
+
+    Callers enqueue their texts with a Future and block on it. A single worker
+    thread takes the first waiting request, keeps collecting more until the batch
+    holds `max_batch_size` texts or `max_wait_ms` has passed, embeds everything in
+    one model call and resolves each request's Future with its own slice. Ten
+    users asking at once then cost about one forward pass instead of ten passes
+    competing for the same CPU threads. A request is never split, so one larger
+    than `max_batch_size` is embedded as its own batch.
+
+    Args:
+        embedder (BaseEmbedder): The backend that runs the model.
+        max_batch_size (int): The number of texts after which a batch is sent without waiting.
+        max_wait_ms (float): How long the first request of a batch waits for company.
+    """
+    def __init__(self, embedder: BaseEmbedder, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.embedder = embedder
+        self.model_id = embedder.model_id
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.logger = logging.getLogger(__name__)
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.texts = 0
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Encodes a list of texts as part of the next micro-batch and waits for the result.
+
+        Args:
+            texts (List[str]): A list of text strings to encode.
+
+        Returns:
+            A (len(texts), dim) float32 array in input order, or an array with no rows on failure.
+        """
+        if not texts:
+            return empty_embeddings()
+        future: Future = Future()
+        self._queue.put((list(texts), future))
+        return future.result()
+
+    def _collect(self, first: Tuple[List[str], Future]) -> List[Tuple[List[str], Future]]:
+        """Gathers requests behind the first one until the batch is full or the wait window closes."""
+        requests, count = [first], len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while count < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            requests.append(request)
+            count += len(request[0])
+        return requests
+
+    def _run(self):
+        while True:
+            requests = self._collect(self._queue.get())
+            texts = [text for request_texts, _ in requests for text in request_texts]
+            try:
+                embeddings = self.embedder.generate_embeddings(texts)
+            except Exception as e:
+                self.logger.error(f"Micro-batch of {len(texts)} texts failed: {e}", exc_info=True)
+                embeddings = empty_embeddings()
+
+            ok = len(embeddings) == len(texts)
+            offset = 0
+            for request_texts, future in requests:
+                # Each request gets its own rows of the batch, or an empty result if the batch failed.
+                future.set_result(embeddings[offset:offset + len(request_texts)] if ok else empty_embeddings())
+                offset += len(request_texts)
+            with self._stats_lock:
+                self.requests += len(requests)
+                self.batches += 1
+                self.texts += len(texts)
+            self.logger.debug(f"Embedded micro-batch of {len(requests)} requests ({len(texts)} texts).")
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns request and batch counts and the average number of requests served per forward pass."""
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "texts": self.texts,
+                "requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+                "queued": self._queue.qsize(),
+            }
@@ -0,0 +1,172 @@
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import numpy as np
+from pathlib import Path
+from typing import List, Optional
+from src.retrieval.embedding_backend import BaseEmbedder, empty_embeddings
+
+class EmbeddingCache:
+    """
+    A persistent, content-addressed cache of embeddings in SQLite.
+
+    Entries are keyed by a hash of the model name and the whitespace-normalized
+    text, so identical chunks are embedded once no matter which document, service
+    or restart they come from, and switching models never serves stale vectors.
+    Vectors are stored as raw float32 bytes. The cache keeps at most
+    `max_entries` vectors; once over, it evicts the least recently used ones
+    down to 90% of that, so a full cache is not trimmed on every write.
+    Like the DocumentStore, it uses WAL mode so several processes can share it.
+    """
+    # SQLite limits the number of bound parameters per statement.
+    _MAX_PARAMS = 900
+    # Writes between exact row counts, which pick up entries added by other processes.
+    _RECOUNT_INTERVAL = 100
+
+    def __init__(self, db_path: str, model_name: str, max_entries: int = 200_000):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        # An upper bound on this process's view of the row count, so writes only count rows when it may be over.
+        self._estimated_entries: Optional[int] = None
+        self._writes_since_count = 0
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Returns this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def key_for(self, text: str) -> str:
+        """Returns the cache key of a text for this cache's model."""
+        normalized = re.sub(r"\s+", " ", text).strip()
+        return hashlib.sha256(f"{self.model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Looks up cached embeddings for several texts in batched queries.
+
+        Returns:
+            A float32 vector per text, in input order, or None where it is not cached.
+        """
+        keys = [self.key_for(text) for text in texts]
+        found = {}
+        conn = self._connection()
+        unique_keys = list(dict.fromkeys(keys))
+        for i in range(0, len(unique_keys), self._MAX_PARAMS):
+            batch = unique_keys[i:i + self._MAX_PARAMS]
+            placeholders = ",".join("?" * len(batch))
+            for key, blob in conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch):
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+
+        if found:
+            # Refresh recency for the LRU; a lost update only makes eviction slightly less exact.
+            now = time.time()
+            with conn:
+                conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+        results = [found.get(key) for key in keys]
+        hits = sum(vector is not None for vector in results)
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def put_many(self, texts: List[str], vectors: np.ndarray):
+        """Stores embeddings for several texts, then evicts the least recently used entries over the limit."""
+        if not texts:
+            return
+        now = time.time()
+        rows = [(self.key_for(text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+                for text, vector in zip(texts, vectors)]
+        conn = self._connection()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows)
+            with self._stats_lock:
+                # Replaced keys are counted as new rows too, which only makes the estimate high.
+                self._writes_since_count += 1
+                if self._estimated_entries is not None:
+                    self._estimated_entries += len(rows)
+                if (self._estimated_entries is not None and self._estimated_entries <= self.max_entries
+                        and self._writes_since_count < self._RECOUNT_INTERVAL):
+                    return
+                self._writes_since_count = 0
+            count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries * 9 // 10
+                conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,)
+                )
+                count -= excess
+                self.logger.info(f"Evicted {excess} least recently used embeddings from the cache.")
+            with self._stats_lock:
+                self._estimated_entries = count
+
+class CachedEmbedder(BaseEmbedder):
+    """
+    Wraps an Embedder so that `generate_embeddings` only runs the model for texts
+    that are not already in the EmbeddingCache. A batch made only of known texts
+    never touches the model.
+    """
+    def __init__(self, embedder, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+        self.model_id = cache.model_name
+        self.logger = logging.getLogger(__name__)
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Encodes a list of texts, reusing cached embeddings where possible.
+
+        Args:
+            texts (List[str]): A list of text strings to encode.
+
+        Returns:
+            A (len(texts), dim) float32 array in input order, or an array with no
+            rows if the model failed on the texts that were not cached.
+        """
+        if not texts:
+            return self.embedder.generate_embeddings(texts)
+
+        cached = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        self.logger.info(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses.")
+        if missing:
+            # Embed each distinct missing text once, even if it repeats within the batch.
+            first_text = {}
+            for i in missing:
+                first_text.setdefault(self.cache.key_for(texts[i]), texts[i])
+            unique_texts = list(first_text.values())
+            computed = self.embedder.generate_embeddings(unique_texts)
+            if len(computed) != len(unique_texts):
+                return empty_embeddings()
+            self.cache.put_many(unique_texts, computed)
+            by_key = dict(zip(first_text, computed))
+            for i in missing:
+                cached[i] = by_key[self.cache.key_for(texts[i])]
+        return np.stack(cached).astype(np.float32, copy=False)
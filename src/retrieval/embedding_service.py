@@ -0,0 +1,147 @@
+import json
+import time
+import base64
+import logging
+import threading
+import requests
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from src.config import EmbeddingServiceConfig
+from src.retrieval.embedding_backend import BaseEmbedder, empty_embeddings
+from src.retrieval.embedding_batcher import MicroBatchingEmbedder
+
+class _EmbeddingRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves `POST /embed` with a JSON body {"texts": [...]}, answered with
+    {"model_id": ..., "dimension": d, "embeddings": base64 of the float32 rows},
+    and `GET /health` with the model id and micro-batching statistics. Raw
+    float32 bytes are exact and avoid formatting and parsing every float as text.
+    """
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        embedder = self.server.embedder
+        self._send_json(200, {"model_id": embedder.model_id, "stats": embedder.stats()})
+
+    def do_POST(self):
+        if self.path != "/embed":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            texts = request["texts"]
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise ValueError("'texts' must be a list of strings")
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"Invalid request: {e}"})
+            return
+
+        embedder = self.server.embedder
+        embeddings = embedder.generate_embeddings(texts)
+        if len(embeddings) != len(texts):
+            self._send_json(500, {"error": "The embedding model failed on this batch."})
+            return
+        self._send_json(200, {
+            "model_id": embedder.model_id,
+            "dimension": embeddings.shape[1] if len(embeddings) else 0,
+            "embeddings": base64.b64encode(np.ascontiguousarray(embeddings, dtype="<f4").tobytes()).decode("ascii"),
+        })
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(f"{self.address_string()} - {format % args}")
+
+class EmbeddingService:
+    """
+    A local HTTP service that shares one embedding model between containers.
+
+    Every request is handled on its own thread and goes through a
+    MicroBatchingEmbedder, so concurrent requests from the UI, ingestion and
+    summarizer services are coalesced into shared forward passes, and only one
+    copy of the model is kept in memory.
+
+    Args:
+        embedder (BaseEmbedder): The backend that runs the model.
+        config (EmbeddingServiceConfig): Host, port and micro-batching settings.
+    """
+    def __init__(self, embedder: BaseEmbedder, config: EmbeddingServiceConfig):
+        self.logger = logging.getLogger(__name__)
+        self.server = ThreadingHTTPServer((config.host, config.port), _EmbeddingRequestHandler)
+        self.server.daemon_threads = True
+        self.server.embedder = MicroBatchingEmbedder(embedder, config.max_batch_size, config.max_wait_ms)
+
+    def serve_forever(self):
+        host, port = self.server.server_address[:2]
+        self.logger.info(f"Embedding service for {self.server.embedder.model_id} listening on {host}:{port}")
+        self.server.serve_forever()
+
+    def start(self) -> threading.Thread:
+        """Serves from a background thread, e.g. for tests and benchmarks, and returns it."""
+        thread = threading.Thread(target=self.serve_forever, name="embedding-service", daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class RemoteEmbedder(BaseEmbedder):
+    """
+    Client for the EmbeddingService, a drop-in replacement for a local embedder.
+
+    Args:
+        config (EmbeddingServiceConfig): The service URL and timeouts.
+    """
+    def __init__(self, config: EmbeddingServiceConfig):
+        self.logger = logging.getLogger(__name__)
+        self.url = config.url.rstrip("/")
+        self.timeout = config.timeout_seconds
+        self.session = requests.Session()
+        self.model_id = self._wait_for_service(config.startup_timeout_seconds)
+
+    def _wait_for_service(self, timeout: float) -> str:
+        """Polls the health endpoint until the service has loaded its model, and returns its model id."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                response = self.session.get(f"{self.url}/health", timeout=self.timeout)
+                response.raise_for_status()
+                model_id = response.json()["model_id"]
+                self.logger.info(f"Connected to embedding service at {self.url} serving {model_id}")
+                return model_id
+            except (requests.RequestException, ValueError, KeyError) as e:
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"Embedding service at {self.url} is not available: {e}") from e
+                self.logger.info(f"Waiting for embedding service at {self.url}...")
+                time.sleep(2)
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Encodes a list of texts on the embedding service.
+
+        Args:
+            texts (List[str]): A list of text strings to encode.
+
+        Returns:
+            A (len(texts), dim) float32 array in input order, or an array with no rows on failure.
+        """
+        if not texts:
+            return empty_embeddings()
+        try:
+            response = self.session.post(f"{self.url}/embed", json={"texts": texts}, timeout=self.timeout)
+            response.raise_for_status()
+            payload = response.json()
+            data = np.frombuffer(base64.b64decode(payload["embeddings"]), dtype="<f4")
+            return data.astype(np.float32).reshape(len(texts), payload["dimension"])
+        except (requests.RequestException, ValueError, KeyError) as e:
+            self.logger.error(f"Embedding service request for {len(texts)} texts failed: {e}")
+            return empty_embeddings()
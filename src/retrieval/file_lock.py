@@ -0,0 +1,59 @@
+import os
+import fcntl
+import threading
+from pathlib import Path
+
+class FileLock:
+    """
+    An exclusive advisory lock backed by `flock` on a lock file.
+
+    Every process (and container sharing the same volume on one host) that opens
+    the same path serializes on it, which is what lets several writers share an
+    on-disk index. Threads sharing one instance also serialize, on an in-process
+    lock taken before the file lock, so each acquisition owns its own descriptor.
+    Use it as a context manager around the read-modify-publish section only;
+    readers never take it. It is not reentrant.
+    """
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._thread_lock = threading.Lock()
+        self._local = threading.local()
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                os.close(fd)
+                raise
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._local.fd = fd
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        fd, self._local.fd = self._local.fd, None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+            self._thread_lock.release()
+        return False
+
+def atomic_write_bytes(path: str, data: bytes):
+    """
+    Replaces a file's content atomically: readers see either the old or the new
+    file, never a truncated one.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
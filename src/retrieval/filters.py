@@ -0,0 +1,270 @@
+import re
+import json
+import numpy as np
+from pathlib import Path
+from urllib.parse import urlparse
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+from src.retrieval.growable_array import GrowableArray
+
+# Low-cardinality string fields stored as small integer codes with a vocabulary.
+CATEGORICAL_FIELDS = ("source", "doc_type")
+# Marks a chunk whose publication date could not be parsed; date filters never match it.
+UNKNOWN_TIMESTAMP = -1
+
+# Date layouts seen in regulator feeds besides RFC 822 and ISO 8601 (e.g. SEBI's "09 Sep, 2025 +0530").
+_PUBLISHED_FORMATS = ("%d %b, %Y %z", "%d %b, %Y", "%d %b %Y %z", "%d %b %Y", "%d-%m-%Y", "%d/%m/%Y")
+
+# Page types named by the URL: a path segment (SEBI) or the page name of RBI's Scripts/*.aspx links.
+_DOCUMENT_TYPE_URL_SEGMENTS = {
+    "master-circulars": "master_direction",
+    "bs_viewmasdirections.aspx": "master_direction",
+    "bs_viewmascirculardetails.aspx": "master_direction",
+    "circulars": "circular",
+    "bs_circularindexdisplay.aspx": "circular",
+    "notificationuser.aspx": "notification",
+    "press-releases": "press_release",
+    "bs_pressreleasedisplay.aspx": "press_release",
+    "speeches": "speech",
+    "bs_speechesview.aspx": "speech",
+}
+# Whole words of the title, checked in order; the first match wins.
+_DOCUMENT_TYPE_TITLE_PATTERNS = [
+    ("master_direction", re.compile(r"\bmaster (direction|circular)s?\b")),
+    ("circular", re.compile(r"\bcirculars?\b")),
+    ("notification", re.compile(r"\bnotifications?\b")),
+    ("press_release", re.compile(r"\bpress releases?\b")),
+    ("speech", re.compile(r"\bspeech(es)?\b")),
+    ("order", re.compile(r"\borders?\b")),
+]
+
+def parse_published(value: Any) -> Optional[int]:
+    """
+    Converts an RSS `published` value (RFC 822, a feed-specific layout, or the ISO
+    timestamp the monitor falls back to) into Unix seconds, or None if it cannot
+    be parsed.
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    if not value or not isinstance(value, str):
+        return None
+    parsers = [parsedate_to_datetime, datetime.fromisoformat]
+    parsers += [lambda text, layout=layout: datetime.strptime(text, layout) for layout in _PUBLISHED_FORMATS]
+    for parse in parsers:
+        try:
+            parsed = parse(value.strip())
+        except (TypeError, ValueError, IndexError):
+            continue
+        if parsed is None:
+            continue
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp())
+    return None
+
+def document_type_for(url: str, title: str) -> str:
+    """
+    Infers the kind of regulatory document (circular, notification, ...) from its URL and title.
+
+    The page type in the URL decides, since a title may mention other documents
+    ("... SEBI Circular dated ..."); a title naming a master direction or master
+    circular refines it, as RBI publishes those as notifications. Otherwise the
+    title's words decide. Listing pages, such as SEBI's enforcement orders, also
+    carry appeals and notices, so they are not a page type of their own.
+    """
+    title_type = next((doc_type for doc_type, pattern in _DOCUMENT_TYPE_TITLE_PATTERNS
+                       if pattern.search((title or "").lower())), None)
+    if title_type == "master_direction":
+        return title_type
+    segments = urlparse(url or "").path.lower().split("/")
+    url_type = next((_DOCUMENT_TYPE_URL_SEGMENTS[s] for s in segments if s in _DOCUMENT_TYPE_URL_SEGMENTS), None)
+    return url_type or title_type or "other"
+
+def filter_fields(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns the filterable fields of a chunk: `source`, `doc_type` and a numeric
+    `published_ts`. Fields already present are kept; missing ones are derived from
+    the monitor's update (source, title, url, published), so chunks stored before
+    these fields existed can still be filtered.
+    """
+    published_ts = metadata.get('published_ts')
+    if published_ts is None:
+        published_ts = parse_published(metadata.get('published'))
+    return {
+        'source': str(metadata.get('source') or '').lower(),
+        'doc_type': metadata.get('doc_type') or document_type_for(metadata.get('url'), metadata.get('title')),
+        'published_ts': UNKNOWN_TIMESTAMP if published_ts is None else int(published_ts),
+    }
+
+@dataclass(frozen=True)
+class SearchFilter:
+    """
+    Structured restrictions on which chunks a search may return. Every criterion
+    left as None is unrestricted; list criteria match any of their values.
+
+    Args:
+        sources: Regulators to include, e.g. ["rbi", "sebi"].
+        doc_types: Document types to include, e.g. ["circular", "notification"].
+        published_after: Earliest publication time, in Unix seconds (inclusive).
+        published_before: Latest publication time, in Unix seconds (inclusive).
+    """
+    sources: Optional[tuple] = None
+    doc_types: Optional[tuple] = None
+    published_after: Optional[int] = None
+    published_before: Optional[int] = None
+
+    def __post_init__(self):
+        # Normalize lists to lowercased tuples so filters are hashable and comparable as cache keys.
+        for name in ("sources", "doc_types"):
+            values = getattr(self, name)
+            if values is not None:
+                object.__setattr__(self, name, tuple(sorted({str(v).lower() for v in values})))
+
+    @property
+    def is_empty(self) -> bool:
+        return (self.sources is None and self.doc_types is None
+                and self.published_after is None and self.published_before is None)
+
+    def to_pinecone(self) -> Optional[Dict[str, Any]]:
+        """Translates the filter into Pinecone's metadata filter language, or None if empty."""
+        clauses = []
+        if self.sources is not None:
+            clauses.append({'source': {'$in': list(self.sources)}})
+        if self.doc_types is not None:
+            clauses.append({'doc_type': {'$in': list(self.doc_types)}})
+        if self.published_after is not None or self.published_before is not None:
+            date_range = {}
+            if self.published_after is not None:
+                date_range['$gte'] = self.published_after
+            if self.published_before is not None:
+                date_range['$lte'] = self.published_before
+            clauses.append({'published_ts': date_range})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+class FieldColumns:
+    """
+    Columnar filter fields for a sequence of documents, with cached per-value bitmaps.
+
+    Categorical fields are stored as int16 codes into a small vocabulary and the
+    publication time as int64 seconds, so evaluating a filter is a handful of
+    vectorized comparisons over a few bytes per document. Instances are never
+    modified in place (`extend` returns a new one), so a bitmap cached for a
+    value stays valid for the lifetime of the instance. The columns grow in
+    GrowableArrays, so `extend` costs time proportional to the new documents.
+    """
+    def __init__(self, vocab: Dict[str, List[str]], codes: Dict[str, np.ndarray], published_ts: np.ndarray):
+        self.vocab = vocab
+        self.codes = codes
+        self.published_ts = published_ts
+        self._bitmaps: Dict[tuple, np.ndarray] = {}
+        self._columns: Optional[Dict[str, GrowableArray]] = None
+
+    @classmethod
+    def _from_columns(cls, vocab: Dict[str, List[str]], columns: Dict[str, GrowableArray]) -> "FieldColumns":
+        fields = cls(vocab, {name: columns[name].array for name in CATEGORICAL_FIELDS}, columns['published_ts'].array)
+        fields._columns = columns
+        return fields
+
+    @classmethod
+    def empty(cls) -> "FieldColumns":
+        return cls({name: [] for name in CATEGORICAL_FIELDS},
+                   {name: np.zeros(0, dtype=np.int16) for name in CATEGORICAL_FIELDS},
+                   np.zeros(0, dtype=np.int64))
+
+    @classmethod
+    def from_fields(cls, fields: List[Dict[str, Any]]) -> "FieldColumns":
+        """Builds columns from per-document dicts as returned by `filter_fields`."""
+        return cls.empty().extend(fields)
+
+    def __len__(self) -> int:
+        return len(self.published_ts)
+
+    def extend(self, fields: List[Dict[str, Any]]) -> "FieldColumns":
+        """Returns new columns with the given documents appended."""
+        columns = self._columns
+        if columns is None:
+            # Columns built by the constructor, e.g. mapped from a segment, are copied on their first extension.
+            columns = {name: GrowableArray(np.asarray(self.codes[name])) for name in CATEGORICAL_FIELDS}
+            columns['published_ts'] = GrowableArray(np.asarray(self.published_ts))
+        vocab, grown = {}, {}
+        for name in CATEGORICAL_FIELDS:
+            values = list(self.vocab[name])
+            index = {value: i for i, value in enumerate(values)}
+            new_codes = np.empty(len(fields), dtype=np.int16)
+            for i, doc_fields in enumerate(fields):
+                value = doc_fields.get(name, '')
+                if value not in index:
+                    index[value] = len(values)
+                    values.append(value)
+                new_codes[i] = index[value]
+            vocab[name] = values
+            grown[name] = columns[name].extend(new_codes)
+        published = np.array([doc_fields.get('published_ts', UNKNOWN_TIMESTAMP) for doc_fields in fields], dtype=np.int64)
+        grown['published_ts'] = columns['published_ts'].extend(published)
+        return FieldColumns._from_columns(vocab, grown)
+
+    def decoded(self, name: str) -> np.ndarray:
+        """Returns the values of a categorical field, one per document."""
+        return np.array(self.vocab[name] or [''], dtype=object)[np.asarray(self.codes[name])]
+
+    @classmethod
+    def concatenate(cls, columns: List["FieldColumns"], selectors: List[np.ndarray]) -> "FieldColumns":
+        """Concatenates the rows picked by each boolean selector from each set of columns."""
+        fields = []
+        for column, selector in zip(columns, selectors):
+            decoded = {name: column.decoded(name)[selector] for name in CATEGORICAL_FIELDS}
+            published = np.asarray(column.published_ts)[selector]
+            for i in range(len(published)):
+                entry = {name: decoded[name][i] for name in CATEGORICAL_FIELDS}
+                entry['published_ts'] = int(published[i])
+                fields.append(entry)
+        return cls.from_fields(fields)
+
+    def _bitmap(self, name: str, values: tuple) -> np.ndarray:
+        key = (name, values)
+        bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            wanted = [i for i, value in enumerate(self.vocab[name]) if value in values]
+            bitmap = np.isin(np.asarray(self.codes[name]), np.array(wanted, dtype=np.int16))
+            self._bitmaps[key] = bitmap
+        return bitmap
+
+    def mask(self, search_filter: Optional[SearchFilter]) -> Optional[np.ndarray]:
+        """Returns a boolean mask of the documents matching the filter, or None if it is empty."""
+        if search_filter is None or search_filter.is_empty:
+            return None
+        mask = np.ones(len(self), dtype=bool)
+        if search_filter.sources is not None:
+            mask &= self._bitmap('source', search_filter.sources)
+        if search_filter.doc_types is not None:
+            mask &= self._bitmap('doc_type', search_filter.doc_types)
+        if search_filter.published_after is not None or search_filter.published_before is not None:
+            published = np.asarray(self.published_ts)
+            mask &= published != UNKNOWN_TIMESTAMP
+            if search_filter.published_after is not None:
+                mask &= published >= search_filter.published_after
+            if search_filter.published_before is not None:
+                mask &= published <= search_filter.published_before
+        return mask
+
+    def save(self, path: Path, save_array):
+        """Writes the columns into a segment directory using the segment's array writer."""
+        for name in CATEGORICAL_FIELDS:
+            save_array(path / f"{name}.npy", np.asarray(self.codes[name], dtype=np.int16))
+        save_array(path / "published_ts.npy", np.asarray(self.published_ts, dtype=np.int64))
+        with open(path / "fields.json", "w", encoding="utf-8") as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["FieldColumns"]:
+        """Memory-maps the columns of a segment directory, or returns None for segments written without them."""
+        if not (path / "fields.json").exists():
+            return None
+        with open(path / "fields.json", "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        codes = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in CATEGORICAL_FIELDS}
+        return cls(vocab, codes, np.load(path / "published_ts.npy", mmap_mode="r"))
@@ -0,0 +1,53 @@
+import numpy as np
+
+class GrowableArray:
+    """
+    An append-only array whose appends cost time proportional to the rows appended.
+
+    Rows live in a buffer whose capacity doubles as it fills. `extend` never changes
+    the instance it is called on: it writes the new rows past the end of the buffer,
+    where no existing instance looks, and returns a longer view of the same buffer.
+    Readers can therefore keep using an older instance while a writer extends it.
+    Extending an instance that is no longer the newest copies it first, so two
+    extensions of the same instance never overwrite each other's rows. Calls to
+    `extend` must be serialized by the caller.
+
+    Args:
+        array (np.ndarray): The initial rows; used as the buffer without copying.
+    """
+    def __init__(self, array: np.ndarray):
+        self._buffer = array
+        self._length = len(array)
+        # How many buffer rows the newest instance sharing the buffer covers.
+        self._filled = [self._length]
+
+    @classmethod
+    def empty(cls, dtype, row_shape: tuple = ()) -> "GrowableArray":
+        return cls(np.zeros((0,) + tuple(row_shape), dtype=dtype))
+
+    @property
+    def array(self) -> np.ndarray:
+        """The rows of this instance, as a read-only view of the buffer."""
+        view = self._buffer[:self._length]
+        view.flags.writeable = False
+        return view
+
+    def __len__(self) -> int:
+        return self._length
+
+    def extend(self, rows: np.ndarray) -> "GrowableArray":
+        """Returns a new instance with `rows` appended; self is left unchanged."""
+        rows = np.asarray(rows, dtype=self._buffer.dtype)
+        if not len(rows):
+            return self
+        end = self._length + len(rows)
+        buffer, filled = self._buffer, self._filled
+        if filled[0] != self._length or end > len(buffer):
+            buffer = np.empty((max(end, 2 * self._length, 16),) + buffer.shape[1:], dtype=buffer.dtype)
+            buffer[:self._length] = self._buffer[:self._length]
+            filled = [self._length]
+        buffer[self._length:end] = rows
+        filled[0] = end
+        grown = GrowableArray.__new__(GrowableArray)
+        grown._buffer, grown._length, grown._filled = buffer, end, filled
+        return grown
@@ -0,0 +1,83 @@
+import math
+import numpy as np
+from typing import Optional
+
+# Rows are assigned to centroids in blocks so the score matrix stays small.
+ASSIGN_BLOCK_ROWS = 8192
+
+def default_nlist(num_rows: int) -> int:
+    """Picks a coarse-quantizer size of about sqrt(n) lists, the usual IVF starting point."""
+    return int(min(4096, max(16, round(math.sqrt(num_rows)))))
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Returns the index of the most similar centroid (by dot product) for every row,
+    or only for the given row numbers of `vectors`.
+    """
+    rows = np.arange(len(vectors)) if rows is None else rows
+    assignments = np.empty(len(rows), dtype=np.int32)
+    for start in range(0, len(rows), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[rows[start:start + ASSIGN_BLOCK_ROWS]], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+def train_centroids(vectors: np.ndarray, nlist: int, rows: Optional[np.ndarray] = None, iterations: int = 10,
+                    sample_per_list: int = 64, seed: int = 0) -> np.ndarray:
+    """
+    Trains IVF centroids with spherical k-means on a sample of unit-length rows.
+
+    Args:
+        vectors (np.ndarray): The (n, d) float32 rows to train on.
+        nlist (int): The number of inverted lists (centroids).
+        rows (Optional[np.ndarray]): The row numbers to train on; defaults to all rows.
+        iterations (int): The number of k-means iterations.
+        sample_per_list (int): Rows sampled per centroid; k-means converges on a
+                               sample long before it needs the whole corpus.
+        seed (int): The random seed, so the same data trains the same centroids.
+
+    Returns:
+        A (nlist, d) float32 array of unit-length centroids.
+    """
+    rng = np.random.default_rng(seed)
+    rows = np.arange(len(vectors)) if rows is None else rows
+    nlist = min(nlist, len(rows))
+    sample_size = min(len(rows), nlist * sample_per_list)
+    sample = np.asarray(vectors[np.sort(rng.choice(rows, sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = assign_lists(sample, centroids)
+        counts = np.bincount(assignments, minlength=nlist)
+        sums = np.zeros_like(centroids)
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums[nonempty] = np.add.reduceat(sample[np.argsort(assignments, kind="stable")], starts[nonempty], axis=0)
+        # Re-seed empty lists from random rows instead of letting them collapse.
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms == 0, 1, norms)
+    return centroids.astype(np.float32)
+
+class InvertedLists:
+    """
+    Groups row numbers by their assigned list, CSR style, for probing at query time.
+
+    Args:
+        assignments (np.ndarray): The list number of every row.
+        nlist (int): The number of lists.
+    """
+    def __init__(self, assignments: np.ndarray, nlist: int):
+        self.order = np.argsort(assignments, kind="stable").astype(np.int64)
+        self.offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=nlist), out=self.offsets[1:])
+
+    def probe(self, centroid_scores: np.ndarray, nprobe: int, live: Optional[np.ndarray] = None) -> np.ndarray:
+        """Returns the rows in the nprobe lists whose centroids score highest, optionally only live ones."""
+        nprobe = min(nprobe, len(centroid_scores))
+        lists = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        rows = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in lists])
+        if live is not None and len(rows):
+            rows = rows[live[rows]]
+        return rows
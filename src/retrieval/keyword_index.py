@@ -1,68 +1,429 @@
+import time
 import pickle
 import logging
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from rank_bm25 import BM25Okapi
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from src.retrieval.bm25 import tokenize
+from src.retrieval.document_store import DocumentStore
+from src.retrieval.file_lock import FileLock
+from src.retrieval.filters import FieldColumns, SearchFilter, filter_fields
+from src.retrieval.bm25_segments import (
+    IndexSnapshot, Segment, average_idf, merge_segments, publish_manifest,
+    read_manifest, remove_segment, write_segment, write_tombstones, MANIFEST_NAME,
+)
+
+@dataclass
+class ReplaceResult:
+    """Outcome of replacing the chunk set of one source document."""
+    changed: bool
+    # Chunk ids that existed before the replace but are not part of the new chunk set.
+    stale_chunk_ids: List[str] = field(default_factory=list)
 
 class KeywordIndex:
-    """Manages the creation, saving, and loading of a BM25 keyword index."""
-    def __init__(self, index_path: str = "artifacts/bm25_index.pkl"):
-        self.index_path = Path(index_path)
+    """
+    Manages the creation, saving, and loading of a BM25 keyword index.
+
+    The index lives on disk as a set of immutable, memory-mapped segments listed
+    in a manifest. Writers append a new segment per batch of documents and then
+    atomically publish a new manifest; readers keep a resident snapshot that is
+    only swapped when the manifest changes, so queries never deserialize the
+    corpus and every process mapping the same files shares the page cache.
+
+    Segments only carry integer row ids; chunk text and metadata live in a
+    DocumentStore and are fetched for the top-k hits only.
+
+    Writers in any number of processes serialize on a lock file, so several
+    ingestion workers can share one index. Readers never take that lock: they
+    keep answering from the snapshot they hold until a new manifest has been
+    fully published, and segments retired by a merge are only deleted after a
+    grace period so that lagging readers can still open them.
+
+    Re-ingesting a document tombstones its previous chunks; compaction later
+    rewrites the affected segments without them, so index size tracks the live
+    corpus rather than the ingestion history.
+    """
+    def __init__(self, index_dir: str = "artifacts/bm25_index",
+                 legacy_path: str = "artifacts/bm25_index.pkl", max_segments: int = 16,
+                 document_store: DocumentStore = None, retire_grace_seconds: float = 300.0):
+        self.index_dir = Path(index_dir)
+        self.legacy_path = Path(legacy_path)
+        self.document_store = document_store or DocumentStore()
+        self.max_segments = max_segments
+        self.retire_grace_seconds = retire_grace_seconds
+        self._write_lock = FileLock(self.index_dir / ".writer.lock")
         self.logger = logging.getLogger(__name__)
-        # NOTE: We no longer load the index at initialization to prevent stale reads.
-
-    def _load_from_disk(self):
-        """Loads the BM25 index and documents from the pickle file."""
-        if self.index_path.exists():
-            try:
-                with open(self.index_path, "rb") as f:
-                    data = pickle.load(f)
-                    return data.get('documents', []), data.get('index', None)
-            except (pickle.UnpicklingError, EOFError) as e:
-                self.logger.error(f"Could not read BM25 index file, it may be corrupted or empty: {e}")
-                return [], None
-        return [], None
-
-    def _save_to_disk(self, documents: List[Dict[str, Any]], bm25_index):
-        """Saves the index and documents to a pickle file."""
-        self.index_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.index_path, "wb") as f:
-            pickle.dump({'documents': documents, 'index': bm25_index}, f)
+        self._lock = threading.Lock()
+        self._snapshot: Optional[IndexSnapshot] = None
+        self._segments: Dict[str, Segment] = {}
+        # Signature (inode, size, mtime) of the manifest the snapshot was built from.
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._stop_compaction = threading.Event()
+
+    @property
+    def generation(self) -> int:
+        """
+        The manifest generation to serve from, for cache invalidation. Picks up a
+        newly published index first, so a cache keyed on it is never stale.
+        """
+        snapshot = self._current_snapshot()
+        return snapshot.generation if snapshot else 0
+
+    def _file_signature(self) -> Optional[Tuple[int, int, int]]:
+        """Returns a cheap stat-based signature of the manifest, or None if missing."""
+        try:
+            stat = (self.index_dir / MANIFEST_NAME).stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _open_segment(self, name: str) -> Segment:
+        segment = self._segments.get(name)
+        if segment is None:
+            segment = self._segments[name] = Segment(self.index_dir / name)
+            if segment.fields is None:
+                # Segments written before filter fields existed: derive them from the stored
+                # metadata once, in memory. Merges and compaction then persist them.
+                documents = self.document_store.get_many(np.asarray(segment.row_ids).tolist())
+                segment.fields = FieldColumns.from_fields(
+                    [filter_fields(doc['metadata']) if doc else {} for doc in documents])
+        return segment
+
+    def _refresh(self):
+        """
+        Swaps in a new snapshot if the manifest on disk has changed since it was last read.
+        This keeps the "no stale reads" guarantee at the cost of one stat() per call.
+        """
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+
+        try:
+            manifest = read_manifest(self.index_dir)
+            if manifest is None:
+                return
+            segments = [self._open_segment(entry["name"]) for entry in manifest["segments"]]
+            tombstones = None
+            if manifest.get("tombstones"):
+                tombstones = np.load(self.index_dir / manifest["tombstones"], mmap_mode="r")
+        except (OSError, ValueError, KeyError) as e:
+            # Keep serving the previous snapshot; the next call retries the load.
+            self.logger.error(f"Could not read BM25 index manifest: {e}")
+            return
+
+        self._segments = {segment.name: segment for segment in segments}
+        self._snapshot = IndexSnapshot(manifest, segments, tombstones)
+        self._signature = signature
+        self.logger.info(f"Loaded BM25 index generation {self._snapshot.generation}. "
+                         f"Live documents: {self._snapshot.num_live_docs} of {self._snapshot.num_docs} "
+                         f"in {len(segments)} segments")
+
+    def _migrate_legacy(self):
+        """
+        Converts an index pickle written by older versions into the first segment.
+        Must be called with the writer lock held.
+        """
+        if self._file_signature() is not None or not self.legacy_path.exists():
+            return
+        try:
+            with open(self.legacy_path, "rb") as f:
+                documents = pickle.load(f).get('documents', [])
+        except (pickle.UnpicklingError, EOFError) as e:
+            self.logger.error(f"Could not read legacy BM25 index file, it may be corrupted or empty: {e}")
+            return
+        if documents:
+            self.logger.info(f"Migrating {len(documents)} documents from legacy index {self.legacy_path}.")
+            self._index_documents(documents, manifest=None)
+
+    def _ensure_migrated(self):
+        """Migrates a legacy pickle once, before the first read, if no index exists yet."""
+        if self._snapshot is None and self._file_signature() is None and self.legacy_path.exists():
+            with self._write_lock:
+                self._migrate_legacy()
+
+    def _publish(self, manifest: Dict[str, Any], entries: List[Dict[str, Any]], retired: List[str],
+                 tombstones: np.ndarray):
+        """
+        Publishes a manifest describing the given segment entries and tombstones.
+        Files retired now are only deleted by a later publish, once the grace period
+        has passed.
+        """
+        # Tombstones only matter while some segment still holds the document.
+        segments = [self._open_segment(entry["name"]) for entry in entries]
+        if len(tombstones) and segments:
+            indexed = np.concatenate([np.asarray(s.row_ids) for s in segments])
+            tombstones = np.unique(tombstones[np.isin(tombstones, indexed)])
+        else:
+            tombstones = np.zeros(0, dtype=np.int64)
+
+        generation = manifest.get("generation", 0) + 1
+        retired = list(retired)
+        tombstone_file = manifest.get("tombstones")
+        if not np.array_equal(tombstones, self._current_tombstones()):
+            if tombstone_file:
+                retired.append(tombstone_file)
+            tombstone_file = None
+            if len(tombstones):
+                tombstone_file = f"tombstones_{generation:06d}.npy"
+                write_tombstones(self.index_dir, tombstone_file, tombstones)
+
+        now = time.time()
+        live = {entry["name"] for entry in entries}
+        pending = [r for r in manifest.get("retired", []) if r["name"] not in live]
+        pending += [{"name": name, "retired_at": now} for name in retired if name not in live]
+        expired = [r for r in pending if now - r["retired_at"] >= self.retire_grace_seconds]
+        pending = [r for r in pending if r not in expired]
+
+        num_docs = sum(entry["num_docs"] for entry in entries)
+        publish_manifest(self.index_dir, {
+            "generation": generation,
+            "next_segment": manifest.get("next_segment", 0),
+            "k1": 1.5, "b": 0.75, "epsilon": 0.25,
+            "average_idf": average_idf(segments, num_docs),
+            "segments": entries,
+            "tombstones": tombstone_file,
+            "retired": pending,
+        })
+        for r in expired:
+            remove_segment(self.index_dir / r["name"])
+
+    def _new_segment_path(self, manifest: Dict[str, Any]) -> Path:
+        """
+        Reserves the next segment name. Must be called with the writer lock held.
+
+        Sequence numbers only advance when a manifest is published, so a writer that
+        crashed before publishing leaves a staging or segment directory under a name
+        the next writer is given again. No published manifest refers to it, so it is
+        removed.
+        """
+        seq = manifest.get("next_segment", 0)
+        manifest["next_segment"] = seq + 1
+        path = self.index_dir / f"seg_{seq:06d}"
+        # A failed publish may have opened the orphan already; never serve its stale arrays.
+        self._segments.pop(path.name, None)
+        for leftover in (path, path.with_name(f".{path.name}.tmp")):
+            if leftover.exists():
+                self.logger.warning(f"Removing unpublished BM25 segment {leftover.name} left by an earlier writer.")
+                remove_segment(leftover)
+        return path
+
+    def _current_tombstones(self) -> np.ndarray:
+        if self._snapshot is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.asarray(self._snapshot.tombstones, dtype=np.int64)
+
+    def _index_documents(self, documents: List[Dict[str, Any]], manifest: Optional[Dict[str, Any]],
+                         deleted_row_ids: Optional[List[int]] = None) -> int:
+        """
+        Stores documents, writes the ones not yet indexed as a new segment,
+        tombstones `deleted_row_ids`, merges small segments if needed, and publishes.
+        Must be called with the writer lock held. Returns the number of documents indexed.
+        """
+        row_ids = self.document_store.put(documents)
+        indexed = self._snapshot.all_row_ids() if self._snapshot else np.zeros(0, dtype=np.int64)
+        # Skip documents already in the index, and duplicates within the batch
+        new_row_ids, new_docs, seen = [], [], set()
+        for row_id, doc in zip(row_ids, documents):
+            if row_id not in seen:
+                seen.add(row_id)
+                new_row_ids.append(row_id)
+                new_docs.append(doc)
+        keep = ~np.isin(np.array(new_row_ids, dtype=np.int64), indexed)
+        new_row_ids = [r for r, k in zip(new_row_ids, keep) if k]
+        new_docs = [d for d, k in zip(new_docs, keep) if k]
+        if not new_docs and not deleted_row_ids:
+            return 0
+
+        tombstones = self._current_tombstones()
+        if deleted_row_ids:
+            tombstones = np.union1d(tombstones, np.array(deleted_row_ids, dtype=np.int64))
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        manifest = dict(manifest or {})
+        entries = list(manifest.get("segments", []))
+        if new_docs:
+            entries.append(write_segment(self._new_segment_path(manifest), new_row_ids,
+                                         [tokenize(doc['text']) for doc in new_docs],
+                                         FieldColumns.from_fields([filter_fields(doc.get('metadata', {}))
+                                                                   for doc in new_docs])))
+
+        retired = []
+        while len(entries) > self.max_segments:
+            # Merge the adjacent pair with the fewest documents to bound the segment count,
+            # dropping tombstoned documents on the way.
+            i = min(range(len(entries) - 1), key=lambda j: entries[j]["num_docs"] + entries[j + 1]["num_docs"])
+            pair = entries[i:i + 2]
+            merged = merge_segments(self._new_segment_path(manifest),
+                                    [self._open_segment(e["name"]) for e in pair], tombstones)
+            entries[i:i + 2] = [merged] if merged else []
+            retired.extend(e["name"] for e in pair)
+
+        self._publish(manifest, entries, retired, tombstones)
+        return len(new_docs)
 
     def update_index(self, new_docs: List[Dict[str, Any]]):
-        """Adds new documents to the index and retrains it."""
+        """Appends new documents to the index as a new segment, tokenizing only the new documents."""
         if not new_docs:
             return
 
-        documents, _ = self._load_from_disk()
-        # Prevent adding duplicate documents
-        existing_ids = {doc['id'] for doc in documents}
-        unique_new_docs = [doc for doc in new_docs if doc['id'] not in existing_ids]
-        
-        if not unique_new_docs:
+        with self._write_lock:
+            self._migrate_legacy()
+            # Under the writer lock the manifest cannot change, so this snapshot is the
+            # latest one and de-duplication sees every other writer's segments.
+            with self._lock:
+                self._refresh()
+            if not self._index_documents(new_docs, read_manifest(self.index_dir)):
+                return
+            with self._lock:
+                self._refresh()
+            self.logger.info(f"Updated and published BM25 index. Total documents: {self._snapshot.num_live_docs}")
+
+    def is_current(self, document_id: str, chunks: List[Dict[str, Any]]) -> bool:
+        """Tells whether `chunks` is exactly the chunk set already stored for the document."""
+        stored = self.document_store.chunks_for_document(document_id)
+        return [(c['id'], c['text']) for c in stored] == [(c['id'], c['text']) for c in chunks]
+
+    def replace_document(self, document_id: str, chunks: List[Dict[str, Any]]) -> ReplaceResult:
+        """
+        Replaces the full chunk set of one source document.
+
+        The previous chunks are removed from the document store and tombstoned in
+        the index, and the new chunks are indexed, all in one published version.
+        Re-ingesting identical content is a no-op.
+
+        Args:
+            document_id (str): The source document id (the prefix of its chunk ids).
+            chunks (List[Dict[str, Any]]): The document's new chunks.
+
+        Returns:
+            A ReplaceResult telling whether anything changed and which chunk ids
+            no longer exist, so callers can delete them from other indexes.
+        """
+        with self._write_lock:
+            self._migrate_legacy()
+            with self._lock:
+                self._refresh()
+
+            if self.is_current(document_id, chunks):
+                return ReplaceResult(changed=False)
+            old_chunks = self.document_store.chunks_for_document(document_id)
+
+            new_ids = {c['id'] for c in chunks}
+            stale_chunk_ids = [c['id'] for c in old_chunks if c['id'] not in new_ids]
+            old_row_ids = [c['row_id'] for c in old_chunks]
+            self.document_store.delete(old_row_ids)
+            self._index_documents(chunks, read_manifest(self.index_dir), deleted_row_ids=old_row_ids)
+            with self._lock:
+                self._refresh()
+
+        self.logger.info(f"Replaced document {document_id}: {len(old_chunks)} old chunks tombstoned, "
+                         f"{len(chunks)} chunks indexed.")
+        return ReplaceResult(changed=True, stale_chunk_ids=stale_chunk_ids)
+
+    def compact(self, min_dead_ratio: float = 0.0) -> bool:
+        """
+        Rewrites every segment whose share of tombstoned documents is at least
+        `min_dead_ratio`, physically dropping those documents and their postings.
+
+        Returns:
+            True if a new index version was published.
+        """
+        with self._write_lock:
+            with self._lock:
+                self._refresh()
+            snapshot = self._snapshot
+            if snapshot is None or not len(snapshot.tombstones):
+                return False
+
+            manifest = read_manifest(self.index_dir)
+            tombstones = self._current_tombstones()
+            entries, retired = [], []
+            for entry, segment in zip(manifest["segments"], snapshot.segments):
+                dead = int(np.isin(np.asarray(segment.row_ids), tombstones).sum())
+                if dead and dead / segment.num_docs >= min_dead_ratio:
+                    rewritten = merge_segments(self._new_segment_path(manifest), [segment], tombstones)
+                    if rewritten:
+                        entries.append(rewritten)
+                    retired.append(entry["name"])
+                else:
+                    entries.append(entry)
+
+            if not retired:
+                return False
+            self._publish(manifest, entries, retired, tombstones)
+            with self._lock:
+                self._refresh()
+
+        self.logger.info(f"Compacted {len(retired)} BM25 segments. Live documents: {self._snapshot.num_live_docs}")
+        return True
+
+    def start_background_compaction(self, interval_seconds: float = 600.0, min_dead_ratio: float = 0.2):
+        """Starts a daemon thread that periodically compacts segments with many tombstones."""
+        if self._compaction_thread and self._compaction_thread.is_alive():
             return
 
-        documents.extend(unique_new_docs)
-        
-        tokenized_corpus = [doc['text'].lower().split(" ") for doc in documents]
-        bm25_index = BM25Okapi(tokenized_corpus)
-        
-        self._save_to_disk(documents, bm25_index)
-        self.logger.info(f"Updated and saved BM25 index. Total documents: {len(documents)}")
-
-    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        """
-        Performs a keyword search by loading the latest index from disk.
-        """
-        documents, bm25_index = self._load_from_disk()
-        
-        if not bm25_index or not documents:
-            self.logger.warning("BM25 index file not found or is empty. Cannot perform search.")
-            return []
-        
-        tokenized_query = query.lower().split(" ")
-        doc_scores = bm25_index.get_scores(tokenized_query)
-        
-        top_indices = sorted(range(len(doc_scores)), key=lambda i: doc_scores[i], reverse=True)[:top_k]
-        return [documents[i] for i in top_indices]
+        def run():
+            while not self._stop_compaction.wait(interval_seconds):
+                try:
+                    self.compact(min_dead_ratio=min_dead_ratio)
+                except Exception as e:
+                    self.logger.error(f"Background BM25 compaction failed: {e}", exc_info=True)
+
+        self._stop_compaction.clear()
+        self._compaction_thread = threading.Thread(target=run, name="bm25-compaction", daemon=True)
+        self._compaction_thread.start()
+        self.logger.info(f"Background BM25 compaction started (every {interval_seconds}s).")
+
+    def stop_background_compaction(self):
+        """Stops the background compaction thread, if running."""
+        self._stop_compaction.set()
+        if self._compaction_thread:
+            self._compaction_thread.join()
+            self._compaction_thread = None
+
+    def _current_snapshot(self) -> Optional[IndexSnapshot]:
+        """Refreshes from disk if needed and returns the snapshot to serve from."""
+        self._ensure_migrated()
+        with self._lock:
+            self._refresh()
+            return self._snapshot
+
+    def search(self, query: str, top_k: int = 5, search_filter: Optional[SearchFilter] = None) -> List[Dict[str, Any]]:
+        """
+        Performs a keyword search against the resident snapshot, swapping it first
+        only if a new index version has been published since the last call.
+        """
+        return self.search_many([query], top_k=top_k, search_filter=search_filter)[0]
+
+    def search_many(self, queries: List[str], top_k: int = 5,
+                    search_filter: Optional[SearchFilter] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Performs keyword searches for several queries against one consistent snapshot.
+
+        Args:
+            queries (List[str]): The raw query strings.
+            top_k (int): The number of results to return per query.
+            search_filter (Optional[SearchFilter]): Restricts every query to matching
+                                                    documents before scoring.
+
+        Returns:
+            A list with the top documents for each query, in input order.
+        """
+        snapshot = self._current_snapshot()
+
+        if snapshot is None or not snapshot.num_live_docs:
+            self.logger.warning("BM25 index not found or is empty. Cannot perform search.")
+            return [[] for _ in queries]
 
+        hits = [snapshot.row_ids_for(snapshot.search(tokenize(query), top_k=top_k, search_filter=search_filter)[0])
+                for query in queries]
+        # Hydrate every hit of every query from the document store in one batched lookup.
+        documents = self.document_store.get_many([row_id for row_ids in hits for row_id in row_ids])
+        results, offset = [], 0
+        for row_ids in hits:
+            results.append([doc for doc in documents[offset:offset + len(row_ids)] if doc is not None])
+            offset += len(row_ids)
+        return results
@@ -0,0 +1,517 @@
+import os
+import json
+import logging
+import threading
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from src.config import LocalVectorConfig
+from src.retrieval.bm25 import select_top_k
+from src.retrieval.file_lock import FileLock, atomic_write_bytes
+from src.retrieval.growable_array import GrowableArray
+from src.retrieval.ivf import InvertedLists, assign_lists, default_nlist, train_centroids
+from src.retrieval.quantization import create_codes
+from src.retrieval.filters import FieldColumns, SearchFilter, filter_fields
+from src.retrieval.vector_backend import BaseVectorIndex, UpsertResult
+
+CURRENT_NAME = "CURRENT"
+
+class LocalVectorIndex(BaseVectorIndex):
+    """
+    An on-disk, exact-search stand-in for the Pinecone index.
+
+    Vectors live in a raw float32 row file and ids/metadata in an append-only
+    JSON-lines record log next to it:
+
+        CURRENT                 the active generation number
+        vectors.NNNNNN.f32      float32 rows, one per upsert, append-only
+        records.NNNNNN.jsonl    {"id", "row", "metadata"} per upsert, {"delete": [...]} per delete
+        centroids.NNNNNN.npy    IVF centroids, once the generation has been trained
+        lists.NNNNNN.i32        the IVF list of every row, append-only alongside the rows
+
+    A record is appended only after its row is on disk, so readers simply tail
+    the log from the last byte they consumed and load the rows it references,
+    either into memory or through `np.memmap`. Re-upserting an id appends a new
+    row and retires the old one; when enough rows are dead, `compact` rewrites
+    the live rows into the next generation. Writers serialize on a file lock,
+    so the ingestion and summarizer processes can share one index directory.
+
+    With `ann="ivf"` the index trains a coarse quantizer (spherical k-means)
+    once it holds `ivf_min_rows` vectors, and again whenever it has grown by
+    `ivf_retrain_growth` since. Training happens as part of a compaction, which
+    also stores the rows grouped by list. New rows are assigned to their nearest
+    centroid as they are upserted, and queries scan only the `nprobe` lists
+    closest to the query vector. Raising `nprobe` trades latency for recall.
+
+    With `quantization` set to "int8" or "binary", only compact codes of the
+    vectors are held in memory and searched first; the best candidates are then
+    rescored exactly against the memory-mapped float32 rows, which the operating
+    system pages in on demand.
+
+    Filterable metadata (source, document type, publication time) is kept in
+    columnar form with per-value bitmaps. A filtered query scans only the
+    matching rows, or probes the IVF lists restricted to them when the subset is
+    too large to scan, rather than filtering a global top-k afterwards.
+    """
+    _SUPPORTED_METRICS = ("cosine", "dotproduct")
+
+    def __init__(self, config: LocalVectorConfig):
+        """
+        Opens (or creates) the index directory and loads its current contents.
+
+        Args:
+            config (LocalVectorConfig): The index directory, dimension, metric and
+                                        whether to memory-map the vectors.
+        """
+        if config.metric not in self._SUPPORTED_METRICS:
+            raise ValueError(f"Unsupported metric '{config.metric}' for the local vector index. "
+                             f"Expected one of {self._SUPPORTED_METRICS}.")
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(config.path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dimension = config.dimension
+        self.metric = config.metric
+        self.quantization = config.quantization
+        self.rescore_factor = config.rescore_factor
+        # Quantized codes replace the in-memory float copy; rescoring reads the mapped file.
+        self.use_memmap = config.use_memmap or self.quantization != "none"
+        self.compact_dead_ratio = config.compact_dead_ratio
+        self.compact_min_rows = config.compact_min_rows
+        self.ann = config.ann
+        self.nlist = config.ivf_nlist
+        self.nprobe = config.ivf_nprobe
+        self.ivf_min_rows = config.ivf_min_rows
+        self.ivf_retrain_growth = config.ivf_retrain_growth
+        self._row_bytes = self.dimension * np.dtype(np.float32).itemsize
+        self._write_lock = FileLock(str(self.path / ".writer.lock"))
+        self._lock = threading.Lock()
+        self._current_signature = None
+        self._reset(self._read_current())
+        self._refresh()
+        self.logger.info(f"Local vector index at '{self.path}' loaded with {self._num_live} vectors "
+                         f"({'memory-mapped' if self.use_memmap else 'in memory'}, "
+                         f"{'IVF' if self._centroids is not None else 'exact'} search"
+                         f"{f', {self.quantization} codes of {self._codes.nbytes} bytes' if self._codes is not None else ''}).")
+
+    # --- On-disk layout ---
+
+    def _vectors_path(self, generation: int) -> Path:
+        return self.path / f"vectors.{generation:06d}.f32"
+
+    def _records_path(self, generation: int) -> Path:
+        return self.path / f"records.{generation:06d}.jsonl"
+
+    def _lists_path(self, generation: int) -> Path:
+        return self.path / f"lists.{generation:06d}.i32"
+
+    def _centroids_path(self, generation: int) -> Path:
+        return self.path / f"centroids.{generation:06d}.npy"
+
+    def _read_current(self) -> Dict[str, Any]:
+        try:
+            with open(self.path / CURRENT_NAME, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"generation": 0}
+
+    def _generation_signature(self):
+        try:
+            stat = os.stat(self.path / CURRENT_NAME)
+            return (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
+    # --- Reader state ---
+
+    def _reset(self, current: Dict[str, Any]):
+        """Drops everything loaded so far and starts reading the given generation from scratch."""
+        self._generation = int(current["generation"])
+        self._trained_rows = int(current.get("trained_rows", 0))
+        centroids_path = self._centroids_path(self._generation)
+        self._centroids = np.load(centroids_path) if centroids_path.exists() else None
+        self._assignments = GrowableArray.empty(np.int32)
+        self._inverted: Optional[InvertedLists] = None
+        self._codes = create_codes(self.quantization, self.dimension)
+        self._fields = FieldColumns.empty()
+        self._records_offset = 0
+        self._num_rows = 0
+        self._matrix = np.zeros((0, self.dimension), dtype=np.float32)
+        self._live = GrowableArray.empty(bool)
+        self._num_live = 0
+        self._row_ids: List[Optional[str]] = []
+        self._row_metadata: List[Optional[Dict[str, Any]]] = []
+        self._id_to_row: Dict[str, int] = {}
+
+    def _load_rows(self, num_rows: int) -> np.ndarray:
+        """Returns a matrix covering the first num_rows rows of the current vector file."""
+        if num_rows == self._num_rows:
+            return self._matrix
+        vectors_path = self._vectors_path(self._generation)
+        if self.use_memmap:
+            return np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(num_rows, self.dimension))
+
+        with open(vectors_path, "rb") as f:
+            f.seek(self._num_rows * self._row_bytes)
+            data = f.read((num_rows - self._num_rows) * self._row_bytes)
+        if len(data) != (num_rows - self._num_rows) * self._row_bytes:
+            raise FileNotFoundError(f"Vector file '{vectors_path}' is shorter than its record log.")
+        new_rows = np.frombuffer(data, dtype=np.float32).reshape(-1, self.dimension)
+
+        # Grow the in-memory matrix geometrically; rows past num_rows are never read.
+        matrix = self._matrix
+        if num_rows > len(matrix):
+            grown = np.empty((max(num_rows, 2 * len(matrix), 1024), self.dimension), dtype=np.float32)
+            grown[:self._num_rows] = matrix[:self._num_rows]
+            matrix = grown
+        matrix[self._num_rows:num_rows] = new_rows
+        return matrix
+
+    def _load_assignments(self, num_rows: int) -> GrowableArray:
+        """Returns the IVF list of the first num_rows rows, if this generation is trained."""
+        if self._centroids is None or num_rows == self._num_rows:
+            return self._assignments
+        with open(self._lists_path(self._generation), "rb") as f:
+            f.seek(self._num_rows * 4)
+            data = f.read((num_rows - self._num_rows) * 4)
+        if len(data) != (num_rows - self._num_rows) * 4:
+            raise FileNotFoundError(f"List file for generation {self._generation} is shorter than its record log.")
+        return self._assignments.extend(np.frombuffer(data, dtype=np.int32))
+
+    def _catch_up(self):
+        """Applies the records appended since the last call. Must hold `self._lock`."""
+        try:
+            with open(self._records_path(self._generation), "rb") as f:
+                f.seek(self._records_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # Only whole lines are applied; a record still being written is picked up next time.
+        end = data.rfind(b"\n")
+        if end < 0:
+            return
+        records = [json.loads(line) for line in data[:end + 1].splitlines() if line.strip()]
+
+        num_rows = self._num_rows
+        for record in records:
+            if "row" in record:
+                num_rows = max(num_rows, record["row"] + 1)
+        # Load the rows before touching any state, so a failed read leaves the view as it was.
+        matrix = self._load_rows(num_rows)
+        assignments = self._load_assignments(num_rows)
+        codes = self._codes
+        if codes is not None and num_rows > self._num_rows:
+            codes = codes.extend(matrix[self._num_rows:num_rows])
+        new_fields = [{} for _ in range(num_rows - self._num_rows)]
+        for record in records:
+            if record.get("row", -1) >= self._num_rows:
+                new_fields[record["row"] - self._num_rows] = filter_fields(record.get("metadata") or {})
+        fields = self._fields.extend(new_fields) if new_fields else self._fields
+
+        # Liveness of the new rows, and the earlier rows that these records retire.
+        new_live = np.zeros(num_rows - self._num_rows, dtype=bool)
+        retired = []
+        self._row_ids.extend([None] * (num_rows - self._num_rows))
+        self._row_metadata.extend([None] * (num_rows - self._num_rows))
+        for record in records:
+            if "delete" in record:
+                old_rows = [self._id_to_row.pop(vector_id, None) for vector_id in record["delete"]]
+            else:
+                old_rows = [self._id_to_row.get(record["id"])]
+            for old_row in old_rows:
+                if old_row is None:
+                    continue
+                self._row_metadata[old_row] = None
+                if old_row >= self._num_rows:
+                    new_live[old_row - self._num_rows] = False
+                else:
+                    retired.append(old_row)
+            if "delete" in record:
+                continue
+            row = record["row"]
+            self._id_to_row[record["id"]] = row
+            self._row_ids[row] = record["id"]
+            self._row_metadata[row] = record.get("metadata", {})
+            new_live[row - self._num_rows] = True
+        live = self._live.extend(new_live)
+        if retired:
+            # Earlier snapshots still read the old flags, so retiring their rows needs a copy.
+            flags = live.array.copy()
+            flags[retired] = False
+            live = GrowableArray(flags)
+
+        self._matrix = matrix
+        self._codes = codes
+        self._fields = fields
+        self._assignments = assignments
+        self._inverted = None
+        self._live = live
+        self._num_rows = num_rows
+        self._num_live = len(self._id_to_row)
+        self._records_offset += end + 1
+
+    def _refresh(self):
+        """Brings the in-process view up to date with what other writers have published."""
+        with self._lock:
+            signature = self._generation_signature()
+            if signature != self._current_signature:
+                current = self._read_current()
+                if int(current["generation"]) != self._generation:
+                    self._reset(current)
+                self._current_signature = signature
+            try:
+                self._catch_up()
+            except FileNotFoundError:
+                # A compaction retired this generation mid-read; the next refresh follows CURRENT.
+                self._current_signature = None
+            except Exception as e:
+                self.logger.error(f"Failed to refresh local vector index. Error: {e}", exc_info=True)
+
+    def _snapshot(self):
+        self._refresh()
+        with self._lock:
+            # The inverted lists are rebuilt lazily, once per batch of changes, on the first query after it.
+            if self._inverted is None and self._centroids is not None and len(self._assignments) == self._num_rows:
+                self._inverted = InvertedLists(self._assignments.array, len(self._centroids))
+            return (self._matrix, self._live.array, self._row_ids, self._row_metadata, self._num_rows,
+                    self._centroids, self._inverted, self._codes, self._fields)
+
+    # --- Writes ---
+
+    def _prepare(self, values: List[np.ndarray]) -> np.ndarray:
+        matrix = np.asarray(values, dtype=np.float32).reshape(-1, self.dimension)
+        if self.metric == "cosine":
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1, norms)
+        return np.ascontiguousarray(matrix, dtype=np.float32)
+
+    def _append_file(self, path: Path, keep_bytes: int, data: bytes):
+        with open(path, "ab") as f:
+            # Drop anything a crashed writer left behind without records.
+            f.truncate(keep_bytes)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _append(self, rows: Optional[np.ndarray], records: List[Dict[str, Any]]):
+        """Appends rows, their IVF lists and then their records to the current generation. Must hold the writer lock."""
+        if rows is not None and len(rows):
+            self._append_file(self._vectors_path(self._generation), self._num_rows * self._row_bytes, rows.tobytes())
+            if self._centroids is not None:
+                self._append_file(self._lists_path(self._generation), self._num_rows * 4,
+                                  assign_lists(rows, self._centroids).tobytes())
+        payload = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with open(self._records_path(self._generation), "ab") as f:
+            f.write(payload.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def upsert_vectors(self, vectors: List[Dict[str, Any]], batch_size: int = 100) -> UpsertResult:
+        """
+        Inserts or replaces vectors, with the same input format as the Pinecone index.
+
+        Args:
+            vectors (List[Dict[str, Any]]): Vectors with 'id', 'values', and 'metadata'.
+            batch_size (int): Accepted for parity with the Pinecone index; the whole
+                              list is appended in one locked write.
+
+        Returns:
+            An UpsertResult; the write is all-or-nothing, so either every id or none failed.
+        """
+        if not vectors:
+            self.logger.warning("upsert_vectors called with an empty list.")
+            return UpsertResult()
+
+        rows = self._prepare([v['values'] for v in vectors])
+        self.logger.info(f"Upserting {len(vectors)} vectors into the local index...")
+        try:
+            with self._write_lock:
+                self._refresh()
+                start = self._num_rows
+                records = [
+                    {"id": v['id'], "row": start + i, "metadata": v.get('metadata', {})}
+                    for i, v in enumerate(vectors)
+                ]
+                self._append(rows, records)
+                self._refresh()
+                self._maybe_compact()
+        except Exception as e:
+            self.logger.error(f"Failed to upsert vectors. Error: {e}", exc_info=True)
+            return UpsertResult(failed_ids=[v['id'] for v in vectors])
+        self.logger.info("Upsert operation completed.")
+        return UpsertResult(upserted_count=len(vectors))
+
+    def delete_vectors(self, ids: List[str], batch_size: int = 1000) -> List[str]:
+        """
+        Deletes vectors by id; ids that are not in the index are ignored.
+
+        Args:
+            ids (List[str]): The ids of the vectors to delete.
+            batch_size (int): Accepted for parity with the Pinecone index.
+
+        Returns:
+            The ids that could not be deleted; the write is all-or-nothing, so either all or none.
+        """
+        if not ids:
+            return []
+        try:
+            with self._write_lock:
+                self._refresh()
+                known = [vector_id for vector_id in ids if vector_id in self._id_to_row]
+                if not known:
+                    return []
+                self.logger.info(f"Deleting {len(known)} vectors from the local index...")
+                self._append(None, [{"delete": known}])
+                self._refresh()
+                self._maybe_compact()
+        except Exception as e:
+            self.logger.error(f"Failed to delete vectors. Error: {e}", exc_info=True)
+            return list(ids)
+        return []
+
+    def _needs_training(self) -> bool:
+        if self.ann != "ivf" or self._num_live < self.ivf_min_rows:
+            return False
+        return self._centroids is None or self._num_live > self._trained_rows * self.ivf_retrain_growth
+
+    def _maybe_compact(self):
+        dead = self._num_rows - self._num_live
+        if self._needs_training():
+            self._compact_locked(train=True)
+        elif self._num_rows >= self.compact_min_rows and dead > self._num_rows * self.compact_dead_ratio:
+            self._compact_locked()
+
+    def compact(self, train: bool = False):
+        """
+        Rewrites the live vectors into a new generation, dropping replaced and deleted rows.
+
+        Args:
+            train (bool): Also (re)train the IVF centroids on the live vectors.
+        """
+        with self._write_lock:
+            self._refresh()
+            self._compact_locked(train=train)
+
+    def _write_file(self, path: Path, blocks):
+        with open(path, "wb") as f:
+            for block in blocks:
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact_locked(self, train: bool = False):
+        matrix, live, row_ids, row_metadata, num_rows = self._matrix, self._live.array, self._row_ids, self._row_metadata, self._num_rows
+        live_rows = np.flatnonzero(live[:num_rows])
+        old_generation, new_generation = self._generation, self._generation + 1
+        self.logger.info(f"Compacting local vector index: keeping {len(live_rows)} of {num_rows} rows"
+                         f"{' and training IVF centroids' if train else ''}.")
+
+        centroids, trained_rows, assignments = self._centroids, self._trained_rows, None
+        if train and len(live_rows):
+            centroids = train_centroids(matrix, self.nlist or default_nlist(len(live_rows)), rows=live_rows)
+            trained_rows = len(live_rows)
+            assignments = assign_lists(matrix, centroids, rows=live_rows)
+        elif centroids is not None:
+            assignments = self._assignments.array[live_rows]
+        if assignments is not None:
+            # Store each list's rows next to each other so probing reads contiguous memory.
+            order = np.argsort(assignments, kind="stable")
+            live_rows, assignments = live_rows[order], assignments[order]
+            self._write_file(self._lists_path(new_generation), [assignments.astype(np.int32).tobytes()])
+            with open(self._centroids_path(new_generation), "wb") as f:
+                np.save(f, centroids)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self._write_file(self._vectors_path(new_generation), (
+            np.ascontiguousarray(matrix[live_rows[start:start + 8192]], dtype=np.float32).tobytes()
+            for start in range(0, len(live_rows), 8192)
+        ))
+        self._write_file(self._records_path(new_generation), [
+            "".join(
+                json.dumps({"id": row_ids[row], "row": i, "metadata": row_metadata[row]}, ensure_ascii=False) + "\n"
+                for i, row in enumerate(live_rows)
+            ).encode("utf-8")
+        ])
+        atomic_write_bytes(str(self.path / CURRENT_NAME),
+                           json.dumps({"generation": new_generation, "trained_rows": trained_rows}).encode("utf-8"))
+
+        self._refresh()
+        # Memory-mapped readers keep the old inode alive until they move on, so unlinking is safe.
+        for path in (self._vectors_path(old_generation), self._records_path(old_generation),
+                     self._lists_path(old_generation), self._centroids_path(old_generation)):
+            path.unlink(missing_ok=True)
+
+    # --- Queries ---
+
+    def query(self, vector: np.ndarray, top_k: int = 5, search_filter: Optional[SearchFilter] = None,
+              include_metadata: bool = True) -> List[Dict[str, Any]]:
+        """
+        Finds the most similar vectors, by IVF probing when the index is trained
+        and `ann="ivf"`, otherwise by exact (brute-force) search. With quantization,
+        the codes of the searched rows are scored first and only the best
+        `top_k * rescore_factor` candidates are scored at full precision.
+
+        Args:
+            vector (np.ndarray): The query vector.
+            top_k (int): The number of top results to retrieve.
+            search_filter (Optional[SearchFilter]): Restricts the search to matching vectors.
+            include_metadata (bool): Whether to copy each match's metadata into the result.
+
+        Returns:
+            A list of matches with 'id', 'score', 'values' and 'metadata', shaped like
+            Pinecone's matches and best first.
+        """
+        try:
+            matrix, live, row_ids, row_metadata, num_rows, centroids, inverted, codes, fields = self._snapshot()
+            live = live[:num_rows]
+            filter_mask = fields.mask(search_filter)
+            if filter_mask is not None:
+                live = live & filter_mask[:num_rows]
+            num_live = int(live.sum())
+            if not num_live:
+                return []
+            query_vector = self._prepare([vector])[0]
+
+            rows = None
+            use_ivf = self.ann == "ivf" and inverted is not None
+            # A narrow filter is cheaper to scan exactly than the rows of nprobe lists.
+            if use_ivf and (filter_mask is None or num_live > num_rows * self.nprobe / len(centroids)):
+                rows = inverted.probe(centroids @ query_vector, self.nprobe, live)
+            elif filter_mask is not None:
+                rows = np.flatnonzero(live)
+
+            if codes is not None:
+                rows = self._rescore_candidates(codes, query_vector, rows, live, num_rows, top_k)
+                rows, top_scores = select_top_k(rows, matrix[rows] @ query_vector, top_k)
+            elif rows is not None:
+                rows, top_scores = select_top_k(rows, matrix[rows] @ query_vector, top_k)
+            else:
+                scores = matrix[:num_rows] @ query_vector
+                scores[~live] = -np.inf
+                rows, top_scores = select_top_k(np.arange(num_rows), scores, min(top_k, num_live))
+            return [
+                {'id': row_ids[row], 'score': float(score), 'values': [],
+                 'metadata': dict(row_metadata[row] or {}) if include_metadata else {}}
+                for row, score in zip(rows, top_scores)
+            ]
+        except Exception as e:
+            self.logger.error(f"Failed to query local vector index. Error: {e}", exc_info=True)
+            return []
+
+    def _rescore_candidates(self, codes, query_vector: np.ndarray, rows: Optional[np.ndarray],
+                            live: np.ndarray, num_rows: int, top_k: int) -> np.ndarray:
+        """Runs the first pass over quantized codes and returns the rows worth rescoring, in file order."""
+        approximate = codes.scores(query_vector, rows)
+        if rows is None:
+            rows = np.arange(num_rows)
+            approximate[~live] = -np.inf
+        limit = top_k * (self.rescore_factor or codes.rescore_factor)
+        if len(rows) > limit:
+            part = np.argpartition(-approximate, limit - 1)[:limit]
+            rows, approximate = rows[part], approximate[part]
+        # Sorted rows turn the rescoring gather into a forward scan of the mapped file.
+        return np.sort(rows[np.isfinite(approximate)])
+
+    def __len__(self) -> int:
+        self._refresh()
+        return self._num_live
@@ -0,0 +1,109 @@
+import os
+import json
+import logging
+import numpy as np
+import onnxruntime as ort
+from pathlib import Path
+from typing import List
+from tokenizers import Tokenizer
+from src.config import OnnxEmbedderConfig
+from src.retrieval.embedding_backend import BaseEmbedder, empty_embeddings
+
+# Files written by scripts/export_onnx_embedder.py.
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+SETTINGS_FILE = "embedder.json"
+
+# Minimum cosine similarity between PyTorch and ONNX embeddings of the same text.
+FP32_TOLERANCE = 0.9999
+INT8_TOLERANCE = 0.98
+
+class OnnxEmbedder(BaseEmbedder):
+    """
+    Runs an exported sentence-transformers model with ONNX Runtime on the CPU.
+
+    The transformer runs as one ONNX graph; tokenization uses the standalone
+    `tokenizers` library and mean pooling plus normalization are done in NumPy,
+    reproducing the SentenceTransformer pipeline without importing torch.
+    """
+    def __init__(self, config: OnnxEmbedderConfig):
+        self.logger = logging.getLogger(__name__)
+        model_dir = Path(config.model_dir)
+        model_path = model_dir / (QUANTIZED_MODEL_FILE if config.quantized else MODEL_FILE)
+        if not model_path.exists():
+            raise FileNotFoundError(f"ONNX embedding model not found at {model_path}. "
+                                    f"Export it first with: python scripts/export_onnx_embedder.py"
+                                    f"{' --quantize' if config.quantized else ''}")
+
+        with open(model_dir / SETTINGS_FILE, "r", encoding="utf-8") as f:
+            self.settings = json.load(f)
+        self.model_id = f"{self.settings['model_name']}{':int8' if config.quantized else ''}"
+        self.batch_size = config.batch_size
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.settings['max_length'])
+        self.tokenizer.enable_padding(pad_id=self.settings['pad_id'], pad_token=self.settings['pad_token'])
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = config.intra_op_threads or os.cpu_count() or 1
+        options.inter_op_num_threads = config.inter_op_threads
+        # One request runs at a time per session, so operators execute in order and
+        # all intra-op threads work on the current one.
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.logger.info(f"Loaded ONNX embedding model {model_path} "
+                         f"({options.intra_op_num_threads} intra-op / {options.inter_op_num_threads} inter-op threads)")
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Embeds one batch, padded to its longest text, and returns a float32 (n, d) array."""
+        encodings = self.tokenizer.encode_batch(texts)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            'input_ids': np.array([e.ids for e in encodings], dtype=np.int64),
+            'attention_mask': attention_mask,
+            'token_type_ids': np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+        # Mean pooling over real tokens, as in the sentence-transformers Pooling module,
+        # then unit length, which every backend guarantees.
+        mask = attention_mask[:, :, None].astype(np.float32)
+        embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Encodes a list of texts into vector embeddings.
+
+        Args:
+            texts (List[str]): A list of text strings to encode.
+
+        Returns:
+            A (len(texts), dim) float32 array of unit-length embeddings, or an
+            array with no rows on failure.
+        """
+        if not texts:
+            self.logger.warning("generate_embeddings was called with an empty list of texts.")
+            return empty_embeddings()
+
+        self.logger.info(f"Generating embeddings for {len(texts)} text documents...")
+        try:
+            # Batch texts of similar length together, as SentenceTransformer does, so
+            # short chunks are not padded to the longest one; then restore input order.
+            order = np.argsort([-len(text) for text in texts], kind="stable")
+            sorted_texts = [texts[i] for i in order]
+            embeddings = np.empty((len(texts), 0), dtype=np.float32)
+            for start in range(0, len(texts), self.batch_size):
+                batch = self._encode_batch(sorted_texts[start:start + self.batch_size])
+                if not embeddings.shape[1]:
+                    embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+                embeddings[order[start:start + len(batch)]] = batch
+            self.logger.info("Embeddings generated successfully.")
+            return embeddings
+        except Exception as e:
+            self.logger.error(f"Failed to generate embeddings. Error: {e}", exc_info=True)
+            return empty_embeddings()
@@ -0,0 +1,124 @@
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Optional
+from src.retrieval.growable_array import GrowableArray
+
+# Codes are scored in blocks so the temporary float copies stay small.
+SCORE_BLOCK_ROWS = 16384
+
+# Number of set bits in every 16-bit value. numpy 1.26 has no popcount ufunc, and
+# two table lookups per 32 bits is far cheaper than unpacking codes back into bits.
+POPCOUNT16 = np.array([bin(i).count("1") for i in range(1 << 16)], dtype=np.uint8)
+
+class QuantizedCodes(ABC):
+    """
+    Compact codes for a growing set of float32 rows, used for a first-pass search
+    whose best candidates are then rescored against the full-precision rows.
+    Codes are held in GrowableArrays, so extending them costs time proportional
+    to the new rows rather than to the whole index.
+    """
+    # How many candidates per requested result the first pass hands to rescoring.
+    rescore_factor = 4
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+
+    @abstractmethod
+    def extend(self, rows: np.ndarray) -> "QuantizedCodes":
+        """Returns new codes covering the existing rows followed by `rows`; self is left unchanged."""
+
+    @abstractmethod
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Approximate similarity of the query to every row, or to the given row numbers; higher is better."""
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> int:
+        """The memory held by the codes."""
+
+    def _blocks(self, rows: Optional[np.ndarray], num_rows: int):
+        for start in range(0, num_rows if rows is None else len(rows), SCORE_BLOCK_ROWS):
+            end = start + SCORE_BLOCK_ROWS
+            yield start, (slice(start, end) if rows is None else rows[start:end])
+
+class Int8Codes(QuantizedCodes):
+    """
+    Symmetric scalar quantization: each row is scaled by its largest absolute
+    component into int8, with one float32 scale kept per row (4x smaller).
+    """
+    rescore_factor = 4
+
+    def __init__(self, dimension: int, codes: Optional[GrowableArray] = None, scales: Optional[GrowableArray] = None):
+        super().__init__(dimension)
+        self._codes = codes if codes is not None else GrowableArray.empty(np.int8, (dimension,))
+        self._scales = scales if scales is not None else GrowableArray.empty(np.float32)
+        self.codes = self._codes.array
+        self.scales = self._scales.array
+
+    def extend(self, rows: np.ndarray) -> "Int8Codes":
+        rows = np.asarray(rows, dtype=np.float32)
+        max_abs = np.abs(rows).max(axis=1) if len(rows) else np.zeros(0, dtype=np.float32)
+        scales = np.where(max_abs == 0, 1.0, max_abs / 127.0).astype(np.float32)
+        codes = np.rint(rows / scales[:, None]).astype(np.int8)
+        return Int8Codes(self.dimension, self._codes.extend(codes), self._scales.extend(scales))
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        num_rows = len(self.codes) if rows is None else len(rows)
+        result = np.empty(num_rows, dtype=np.float32)
+        for start, block in self._blocks(rows, len(self.codes)):
+            block_scores = self.codes[block].astype(np.float32) @ query * self.scales[block]
+            result[start:start + len(block_scores)] = block_scores
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scales.nbytes
+
+class BinaryCodes(QuantizedCodes):
+    """
+    1-bit quantization: each component is reduced to its sign and packed into
+    bytes (32x smaller), and rows are ranked by Hamming distance to the query's
+    sign bits. Coarser than int8, so more candidates go on to rescoring.
+    """
+    rescore_factor = 10
+
+    def __init__(self, dimension: int, codes: Optional[GrowableArray] = None):
+        super().__init__(dimension)
+        # Pad to whole 16-bit words so the codes can be viewed as uint16 for the lookup table.
+        self.num_bytes = ((dimension + 15) // 16) * 2
+        self._codes = codes if codes is not None else GrowableArray.empty(np.uint8, (self.num_bytes,))
+        self.codes = self._codes.array
+
+    def _pack(self, rows: np.ndarray) -> np.ndarray:
+        packed = np.packbits(np.asarray(rows) > 0, axis=-1)
+        padding = self.num_bytes - packed.shape[-1]
+        if padding:
+            packed = np.pad(packed, [(0, 0)] * (packed.ndim - 1) + [(0, padding)])
+        return packed
+
+    def extend(self, rows: np.ndarray) -> "BinaryCodes":
+        return BinaryCodes(self.dimension, self._codes.extend(self._pack(np.atleast_2d(rows))))
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        query_words = self._pack(query).view(np.uint16)
+        num_rows = len(self.codes) if rows is None else len(rows)
+        result = np.empty(num_rows, dtype=np.float32)
+        for start, block in self._blocks(rows, len(self.codes)):
+            distances = POPCOUNT16[self.codes[block].view(np.uint16) ^ query_words].sum(axis=1, dtype=np.int32)
+            # Matching bits minus differing bits: a monotone stand-in for cosine similarity.
+            result[start:start + len(distances)] = self.dimension - 2 * distances
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes
+
+def create_codes(quantization: str, dimension: int) -> Optional[QuantizedCodes]:
+    """Returns empty codes for the given quantization ("int8" or "binary"), or None for "none"."""
+    if quantization == "none":
+        return None
+    if quantization == "int8":
+        return Int8Codes(dimension)
+    if quantization == "binary":
+        return BinaryCodes(dimension)
+    raise ValueError(f"Unknown quantization '{quantization}'. Expected 'none', 'int8' or 'binary'.")
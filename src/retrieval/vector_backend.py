@@ -0,0 +1,62 @@
+import numpy as np
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+from src.retrieval.filters import SearchFilter
+
+@dataclass
+class UpsertResult:
+    """The outcome of an upsert: how many vectors were written and which ids were not."""
+    upserted_count: int = 0
+    failed_ids: List[str] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> bool:
+        return not self.failed_ids
+
+class BaseVectorIndex(ABC):
+    """
+    The interface shared by every vector index backend.
+
+    Vectors are dicts with 'id', 'values' (a float32 array) and 'metadata'; query results are
+    dicts with 'id', 'score' and 'metadata', best match first. Metadata is kept to
+    the small filterable fields; chunk text lives in the DocumentStore.
+    """
+    def warmup(self):
+        """Opens connections and loads state ahead of the first query, e.g. from a background thread."""
+
+    @abstractmethod
+    def upsert_vectors(self, vectors: List[Dict[str, Any]], batch_size: int = 100) -> UpsertResult:
+        """Inserts or replaces vectors by id and reports which ids could not be written."""
+
+    @abstractmethod
+    def delete_vectors(self, ids: List[str], batch_size: int = 1000) -> List[str]:
+        """Deletes vectors by id; unknown ids are ignored. Returns the ids that could not be deleted."""
+
+    @abstractmethod
+    def query(self, vector: np.ndarray, top_k: int = 5, search_filter: Optional[SearchFilter] = None,
+              include_metadata: bool = True) -> List[Dict[str, Any]]:
+        """
+        Returns the top_k most similar vectors to the query vector among those matching
+        the filter. Callers that hydrate matches from the document store by id can skip
+        the metadata.
+        """
+
+def create_vector_index(config) -> BaseVectorIndex:
+    """
+    Builds the vector index backend selected by `config.vector_backend`.
+
+    Backends are imported lazily so that, for example, the local backend can run
+    without the Pinecone client installed.
+
+    Args:
+        config (Config): The application configuration.
+    """
+    backend = config.vector_backend
+    if backend == "pinecone":
+        from src.retrieval.vector_index import VectorIndex
+        return VectorIndex(config.pinecone_config)
+    if backend == "local":
+        from src.retrieval.local_vector_index import LocalVectorIndex
+        return LocalVectorIndex(config.local_vector_config)
+    raise ValueError(f"Unknown vector backend '{backend}'. Expected 'pinecone' or 'local'.")
@@ -1,16 +1,26 @@
+import json
+import time
+import random
 import logging
-from typing import List, Dict, Any
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
 from pinecone import Pinecone, ServerlessSpec
 from src.config import PineconeConfig
+from src.retrieval.filters import SearchFilter
+from src.retrieval.vector_backend import BaseVectorIndex, UpsertResult
 
-class VectorIndex:
+class VectorIndex(BaseVectorIndex):
     """
     Manages all interactions with a Pinecone vector index, including
     initialization, creation, upserting data, and querying.
     """
     def __init__(self, config: PineconeConfig):
         """
-        Initializes the connection to Pinecone and ensures the specified index exists.
+        Prepares the Pinecone client. The connection is opened, and the index created
+        if needed, on first use or by `warmup`, so constructing it never blocks on
+        the network.
 
         Args:
             config (PineconeConfig): A dataclass containing Pinecone API key,
@@ -19,61 +29,189 @@ class VectorIndex:
         self.logger = logging.getLogger(__name__)
         self.pc = Pinecone(api_key=config.api_key)
         self.index_name = config.index_name
-        
+        self.metric = config.metric
+        self.max_workers = config.upsert_max_workers
+        self.max_retries = config.upsert_max_retries
+        self.backoff_seconds = config.upsert_backoff_seconds
+        self.max_request_bytes = config.upsert_max_request_bytes
+        self._index = None
+        self._connect_lock = threading.Lock()
+
+    @property
+    def index(self):
+        """The Pinecone index handle, connected on first access."""
+        if self._index is None:
+            with self._connect_lock:
+                if self._index is None:
+                    self._index = self._connect()
+        return self._index
+
+    def _connect(self):
+        """Ensures the index exists, creating it if it does not, and returns a handle to it."""
         # Check if the index already exists. If not, create it.
         if self.index_name not in self.pc.list_indexes().names():
             self.logger.warning(f"Index '{self.index_name}' not found. Creating a new one...")
             self.pc.create_index(
                 name=self.index_name,
                 dimension=384,
-                metric=config.metric,
+                metric=self.metric,
                 # Using serverless spec for pay-as-you-go pricing, suitable for academic projects
                 spec=ServerlessSpec(cloud='aws', region='us-east-1')
             )
             self.logger.info(f"Index '{self.index_name}' created successfully.")
         else:
             self.logger.info(f"Successfully connected to existing index '{self.index_name}'.")
-            
-        self.index = self.pc.Index(self.index_name)
+        return self.pc.Index(self.index_name)
+
+    def warmup(self):
+        self.index  # Connects now rather than on the first query
+
+    @staticmethod
+    def _to_wire(values) -> List[float]:
+        """Converts a float32 vector to the list of floats the Pinecone client sends."""
+        return np.asarray(values, dtype=np.float32).tolist()
+
+    @staticmethod
+    def _estimate_bytes(vector: Dict[str, Any]) -> int:
+        """
+        Approximates a vector's share of the request body: about 20 bytes per serialized
+        value plus the small filter-field metadata, as chunk text is not sent.
+        """
+        return len(json.dumps(vector.get('metadata', {}), ensure_ascii=False).encode("utf-8")) + 20 * len(vector['values']) + 64
+
+    def _make_batches(self, vectors: List[Dict[str, Any]], batch_size: int) -> List[List[Dict[str, Any]]]:
+        """Splits vectors into batches of at most batch_size vectors and max_request_bytes each."""
+        batches, batch, batch_bytes = [], [], 0
+        for vector in vectors:
+            size = self._estimate_bytes(vector)
+            if batch and (len(batch) >= batch_size or batch_bytes + size > self.max_request_bytes):
+                batches.append(batch)
+                batch, batch_bytes = [], 0
+            batch.append(vector)
+            batch_bytes += size
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _with_retries(self, operation: str, count: int, request) -> bool:
+        """
+        Sends one request, retrying with exponential backoff and jitter. Returns False if every attempt failed.
 
-    def upsert_vectors(self, vectors: List[Dict[str, Any]], batch_size: int = 100):
+        Args:
+            operation (str): The operation for the log messages, e.g. "upsert".
+            count (int): The number of vectors in the request, for the log messages.
+            request (Callable[[], Any]): Sends the request; raises on failure.
         """
-        Upserts (inserts or updates) data into the Pinecone index in batches.
+        for attempt in range(self.max_retries + 1):
+            try:
+                request()
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.logger.error(f"Failed to {operation} batch of {count} vectors after {attempt + 1} attempts. "
+                                      f"Error: {e}", exc_info=True)
+                    return False
+                delay = self.backoff_seconds * (2 ** attempt) * random.uniform(0.5, 1.5)
+                self.logger.warning(f"{operation.capitalize()} of {count} vectors failed (attempt {attempt + 1}), "
+                                    f"retrying in {delay:.1f}s. Error: {e}")
+                time.sleep(delay)
+        return False
+
+    def _upsert_batch(self, batch: List[Dict[str, Any]]) -> bool:
+        """Upserts one batch with retries. Returns False if every attempt failed."""
+        return self._with_retries(
+            "upsert", len(batch),
+            lambda: self.index.upsert(vectors=[{**v, 'values': self._to_wire(v['values'])} for v in batch])
+        )
+
+    def upsert_vectors(self, vectors: List[Dict[str, Any]], batch_size: int = 100) -> UpsertResult:
+        """
+        Upserts (inserts or updates) data into the Pinecone index in concurrent batches.
+
+        Batches are capped by both vector count and estimated request size, sent
+        through a bounded thread pool, and retried with exponential backoff, so a
+        transient error no longer silently drops a batch.
 
         Args:
             vectors (List[Dict[str, Any]]): A list of vectors to upsert. Each dict
                                              should have 'id', 'values', and 'metadata'.
-            batch_size (int): The number of vectors to upsert in each API call.
+            batch_size (int): The maximum number of vectors in each API call.
+
+        Returns:
+            An UpsertResult with the number of vectors written and the ids of the
+            vectors whose batch still failed after all retries.
         """
         if not vectors:
             self.logger.warning("upsert_vectors called with an empty list.")
-            return
-            
-        self.logger.info(f"Upserting {len(vectors)} vectors in batches of {batch_size}...")
-        for i in range(0, len(vectors), batch_size):
-            batch = vectors[i:i + batch_size]
-            try:
-                self.index.upsert(vectors=batch)
-            except Exception as e:
-                self.logger.error(f"Failed to upsert batch. Error: {e}", exc_info=True)
-        self.logger.info("Upsert operation completed.")
+            return UpsertResult()
+
+        batches = self._make_batches(vectors, batch_size)
+        workers = max(1, min(self.max_workers, len(batches)))
+        self.logger.info(f"Upserting {len(vectors)} vectors in {len(batches)} batches with {workers} workers...")
+        result = UpsertResult()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for batch, ok in zip(batches, executor.map(self._upsert_batch, batches)):
+                if ok:
+                    result.upserted_count += len(batch)
+                else:
+                    result.failed_ids.extend(v['id'] for v in batch)
+
+        if result.failed_ids:
+            self.logger.error(f"Upsert completed with {len(result.failed_ids)} of {len(vectors)} vectors failed.")
+        else:
+            self.logger.info("Upsert operation completed.")
+        return result
+
+    def delete_vectors(self, ids: List[str], batch_size: int = 1000) -> List[str]:
+        """
+        Deletes vectors by id from the Pinecone index in batches, retrying each batch
+        with exponential backoff as upserts are.
+
+        Args:
+            ids (List[str]): The ids of the vectors to delete.
+            batch_size (int): The number of ids to delete in each API call.
+
+        Returns:
+            The ids whose batch still failed after all retries; empty if every delete succeeded.
+        """
+        if not ids:
+            return []
+
+        self.logger.info(f"Deleting {len(ids)} vectors in batches of {batch_size}...")
+        failed_ids = []
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i:i + batch_size]
+            if not self._with_retries("delete", len(batch), lambda: self.index.delete(ids=batch)):
+                failed_ids.extend(batch)
+
+        if failed_ids:
+            self.logger.error(f"Delete completed with {len(failed_ids)} of {len(ids)} vectors failed.")
+        else:
+            self.logger.info("Delete operation completed.")
+        return failed_ids
 
-    def query(self, vector: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+    def query(self, vector: np.ndarray, top_k: int = 5, search_filter: Optional[SearchFilter] = None,
+              include_metadata: bool = True) -> List[Dict[str, Any]]:
         """
         Queries the index to find the most similar vectors to a given vector.
 
         Args:
-            vector (List[float]): The query vector.
+            vector (np.ndarray): The query vector.
             top_k (int): The number of top results to retrieve.
+            search_filter (Optional[SearchFilter]): Restricts the search to vectors whose
+                                                    metadata matches; evaluated by Pinecone.
+            include_metadata (bool): Whether Pinecone should return each match's metadata.
 
         Returns:
             A list of matching documents, formatted as dictionaries.
         """
         try:
+            pinecone_filter = search_filter.to_pinecone() if search_filter is not None else None
             results = self.index.query(
-                vector=vector, 
+                vector=self._to_wire(vector),
                 top_k=top_k, 
-                include_metadata=True
+                include_metadata=include_metadata,
+                **({'filter': pinecone_filter} if pinecone_filter else {})
             )
             # Convert Pinecone's match objects to a more usable dictionary format
             return [m.to_dict() for m in results.get('matches', [])]
@@ -4,6 +4,7 @@ import hashlib
 from bs4 import BeautifulSoup
 from typing import Dict, List, Any, Tuple
 from src.processing.document_processor import DocumentProcessor
+from src.retrieval.filters import filter_fields
 
 class RealTimeDocumentProcessor(DocumentProcessor):
     """
@@ -36,6 +37,11 @@ class RealTimeDocumentProcessor(DocumentProcessor):
         # Get text, using a space as a separator, and strip excess whitespace
         return soup.get_text(separator=' ', strip=True)
 
+    @staticmethod
+    def document_id_for(url: str) -> str:
+        """Returns the stable document id for a URL, which prefixes all of its chunk ids."""
+        return hashlib.md5(url.encode()).hexdigest()
+
     def process_update(self, update: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], str]:
         """
         Processes a single update from the Kafka stream.
@@ -46,6 +52,7 @@ class RealTimeDocumentProcessor(DocumentProcessor):
 
         Returns:
             A tuple containing (list of formatted chunks, full cleaned text).
+            Chunk ids have the form `{document_id}_{i}`; see `document_id_for`.
         """
         url = update.get('url')
         if not url:
@@ -61,12 +68,14 @@ class RealTimeDocumentProcessor(DocumentProcessor):
         text_chunks = self.chunk_text(cleaned_text)
         
         # Use a hash of the URL to create a consistent document ID
-        doc_id = hashlib.md5(url.encode()).hexdigest()
+        doc_id = self.document_id_for(url)
         
-        # Format the chunks with consistent metadata for the vector database
+        # Format the chunks with consistent metadata for the vector database, including the
+        # normalized source, document type and numeric publication time used by search filters
+        fields = filter_fields(update)
         processed_chunks = []
         for i, chunk_text in enumerate(text_chunks):
-            chunk_metadata = {**update, 'text': chunk_text}
+            chunk_metadata = {**update, **fields, 'text': chunk_text}
             processed_chunks.append({
                 'id': f"{doc_id}_{i}", # Create a unique ID for each chunk
                 'text': chunk_text,
@@ -1,9 +1,40 @@
 import json
+import time
 import logging
 from typing import Callable, List
 from kafka import KafkaConsumer
 from kafka.errors import KafkaError
 
+def wait_for_kafka(bootstrap_servers: str, timeout_seconds: float = 120, poll_seconds: float = 2):
+    """
+    Blocks until a Kafka broker answers a metadata request, instead of sleeping for
+    a fixed time and hoping it is up.
+
+    Args:
+        bootstrap_servers (str): Comma-separated list of Kafka broker addresses.
+        timeout_seconds (float): How long to keep trying before giving up.
+        poll_seconds (float): The pause between attempts.
+
+    Raises:
+        ConnectionError: If no broker became available within the timeout.
+    """
+    logger = logging.getLogger(__name__)
+    started = time.monotonic()
+    while True:
+        try:
+            probe = KafkaConsumer(bootstrap_servers=bootstrap_servers.split(','))
+            try:
+                probe.topics()  # A metadata round trip, answered only by a working broker
+            finally:
+                probe.close()
+            logger.info(f"Kafka at {bootstrap_servers} is ready after {time.monotonic() - started:.1f}s.")
+            return
+        except KafkaError as e:
+            if time.monotonic() - started >= timeout_seconds:
+                raise ConnectionError(f"Kafka at {bootstrap_servers} is not available: {e}") from e
+            logger.info(f"Waiting for Kafka at {bootstrap_servers}...")
+            time.sleep(poll_seconds)
+
 class RegulatoryDataConsumer:
     """
     A Kafka consumer that listens to a specified topic for regulatory updates.
@@ -1,37 +1,50 @@
+import time
 import logging
 from typing import List, Dict, Any
-from src.retrieval.vector_index import VectorIndex
-from src.retrieval.embedder import Embedder
+from src.retrieval.vector_backend import BaseVectorIndex, UpsertResult
+from src.retrieval.embedding_backend import BaseEmbedder
+from src.retrieval.filters import filter_fields
 
 class RealTimeVectorUpdater:
     """
     Handles the final step of the ingestion pipeline: generating embeddings
     for new text chunks and upserting them into the vector database.
     """
-    def __init__(self, vector_index: VectorIndex, embedder: Embedder):
+    def __init__(self, vector_index: BaseVectorIndex, embedder: BaseEmbedder, max_retries: int = 2,
+                 retry_backoff_seconds: float = 2.0):
         """
         Initializes the updater with its necessary components.
 
         Args:
-            vector_index (VectorIndex): An instance of the vector index manager.
-            embedder (Embedder): An instance of the text embedder.
+            vector_index (BaseVectorIndex): The Pinecone or local vector index.
+            embedder (BaseEmbedder): The text embedder, or a CachedEmbedder wrapping one.
+            max_retries (int): How often vectors the index reports as failed are upserted
+                               again, on top of any retries inside the index itself.
+            retry_backoff_seconds (float): The wait before the first retry, doubled after each one.
         """
         self.vector_index = vector_index
         self.embedder = embedder
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
         self.logger = logging.getLogger(__name__)
         self.logger.info("RealTimeVectorUpdater initialized.")
 
-    def update_vectors(self, chunks: List[Dict[str, Any]]):
+    def update_vectors(self, chunks: List[Dict[str, Any]]) -> UpsertResult:
         """
         Processes a list of chunks to generate embeddings and upsert them.
 
         Args:
             chunks (List[Dict[str, Any]]): A list of processed chunks, each
                                            containing an 'id', 'text', and 'metadata'.
+
+        Returns:
+            The UpsertResult from the vector index, with the ids that still failed after
+            all retries; every chunk is reported as failed if the embeddings could not
+            be generated.
         """
         if not chunks:
             self.logger.info("No chunks provided to update, skipping.")
-            return
+            return UpsertResult()
 
         self.logger.info(f"Updating vectors for {len(chunks)} new chunks.")
         
@@ -41,25 +54,65 @@ class RealTimeVectorUpdater:
         # Generate embeddings for all text chunks in a single batch call
         embeddings = self.embedder.generate_embeddings(texts_to_embed)
         
-        if not embeddings or len(embeddings) != len(chunks):
+        if len(embeddings) != len(chunks):
             self.logger.error("Mismatch between number of chunks and generated embeddings. Aborting update.")
-            return
+            return UpsertResult(failed_ids=[chunk['id'] for chunk in chunks])
             
-        # Prepare the data in the format required by the Pinecone API
-        # Prepare the data in the format required by the Pinecone API
+        # Prepare the data in the format required by the Pinecone API. Vectors carry only
+        # the small fields that searches filter on; text, title and URL are read back from
+        # the document store by chunk id after retrieval. Values stay float32 rows; only
+        # the Pinecone client turns them into lists, at the API boundary.
         vectors_to_upsert = []
         for chunk, embedding in zip(chunks, embeddings):
-            # IMPORTANT: Add the chunk's text into the metadata payload
-            metadata = chunk['metadata']
-            metadata['text'] = chunk['text'] 
-            
             vectors_to_upsert.append({
                 'id': chunk['id'],
                 'values': embedding,
-                'metadata': metadata
+                'metadata': filter_fields(chunk['metadata'])
             })
 
-        # Upsert the new vectors into the Pinecone index
-        self.vector_index.upsert_vectors(vectors_to_upsert)
-        self.logger.info(f"Successfully upserted {len(vectors_to_upsert)} vectors into the index.")
+        # Upsert the new vectors into the Pinecone index, then retry just the failed ones
+        result = self.vector_index.upsert_vectors(vectors_to_upsert)
+        for attempt in range(self.max_retries):
+            if not result.failed_ids:
+                break
+            delay = self.retry_backoff_seconds * (2 ** attempt)
+            self.logger.warning(f"{len(result.failed_ids)} vectors failed to upsert, retrying them in {delay:.1f}s.")
+            time.sleep(delay)
+            failed = set(result.failed_ids)
+            retried = self.vector_index.upsert_vectors([v for v in vectors_to_upsert if v['id'] in failed])
+            result = UpsertResult(upserted_count=result.upserted_count + retried.upserted_count,
+                                  failed_ids=retried.failed_ids)
+        if result.failed_ids:
+            self.logger.error(f"Failed to upsert {len(result.failed_ids)} of {len(vectors_to_upsert)} vectors: "
+                              f"{result.failed_ids}")
+        else:
+            self.logger.info(f"Successfully upserted {result.upserted_count} vectors into the index.")
+        return result
+
+    def delete_vectors(self, chunk_ids: List[str]) -> List[str]:
+        """
+        Removes vectors for chunks that no longer exist, e.g. the trailing chunks
+        of a document that was re-ingested with fewer chunks. Ids the index reports
+        as failed are deleted again, as failed upserts are.
 
+        Args:
+            chunk_ids (List[str]): The ids of the stale chunks.
+
+        Returns:
+            The ids that still could not be deleted after all retries.
+        """
+        if not chunk_ids:
+            return []
+        failed_ids = self.vector_index.delete_vectors(chunk_ids)
+        for attempt in range(self.max_retries):
+            if not failed_ids:
+                break
+            delay = self.retry_backoff_seconds * (2 ** attempt)
+            self.logger.warning(f"{len(failed_ids)} vectors failed to delete, retrying them in {delay:.1f}s.")
+            time.sleep(delay)
+            failed_ids = self.vector_index.delete_vectors(failed_ids)
+        if failed_ids:
+            self.logger.error(f"Failed to delete {len(failed_ids)} of {len(chunk_ids)} stale vectors: {failed_ids}")
+        else:
+            self.logger.info(f"Deleted {len(chunk_ids)} stale vectors from the index.")
+        return failed_ids
@@ -0,0 +1,82 @@
+import random
+import numpy as np
+import pytest
+from src.retrieval.bm25 import IncrementalBM25, select_top_k
+from src.retrieval.bm25_segments import IndexSnapshot, Segment, average_idf, write_segment
+
+rank_bm25 = pytest.importorskip("rank_bm25")
+
+def _corpus(num_docs=300, seed=7):
+    """Documents drawn from a Zipf-like vocabulary, so frequent terms get negative raw idfs."""
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(400)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    corpus = [rng.choices(vocabulary, weights, k=rng.randint(5, 60)) for _ in range(num_docs)]
+    # Terms in more than half of the documents take BM25Okapi's epsilon * average_idf floor.
+    for tokens in corpus[:200]:
+        tokens.append("circular")
+    return corpus
+
+def _snapshot(tmp_path, corpus, splits):
+    """Writes the corpus as one segment per split and opens them as one index version."""
+    entries, segments, start = [], [], 0
+    for seq, end in enumerate(list(splits) + [len(corpus)]):
+        entries.append(write_segment(tmp_path / f"seg_{seq:06d}", list(range(start, end)), corpus[start:end]))
+        segments.append(Segment(tmp_path / f"seg_{seq:06d}"))
+        start = end
+    manifest = {"generation": 1, "k1": 1.5, "b": 0.75, "epsilon": 0.25, "segments": entries,
+                "average_idf": average_idf(segments, len(corpus))}
+    return IndexSnapshot(manifest, segments)
+
+def _queries(corpus, seed=11):
+    rng = random.Random(seed)
+    queries = [rng.choice(corpus)[:rng.randint(1, 6)] for _ in range(25)]
+    return queries + [["circular"], ["circular", "term0", "term0"], ["missing", "term3"], ["missing"]]
+
+@pytest.mark.parametrize("splits", [[], [120], [50, 51, 200]], ids=["one-segment", "two-segments", "four-segments"])
+def test_scores_match_rank_bm25(tmp_path, splits):
+    corpus = _corpus()
+    reference = rank_bm25.BM25Okapi(corpus)
+    snapshot = _snapshot(tmp_path, corpus, splits)
+
+    assert snapshot.average_idf == pytest.approx(reference.average_idf, rel=1e-12)
+    for query in _queries(corpus):
+        expected = reference.get_scores(query)
+        doc_indices, scores = snapshot.search(query, top_k=len(corpus))
+        actual = np.zeros(len(corpus))
+        actual[doc_indices] = scores
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-12)
+
+def test_top_k_matches_rank_bm25(tmp_path):
+    corpus = _corpus()
+    reference = rank_bm25.BM25Okapi(corpus)
+    snapshot = _snapshot(tmp_path, corpus, [100, 180])
+
+    for query in _queries(corpus):
+        expected = reference.get_scores(query)
+        doc_indices, scores = snapshot.search(query, top_k=5)
+        # Scores agree to rounding, so near-ties may swap; compare the scores, not the ids.
+        best = np.sort(expected[expected != 0])[::-1][:5]
+        np.testing.assert_allclose(scores, best, rtol=1e-9)
+        np.testing.assert_allclose(expected[doc_indices], scores, rtol=1e-9)
+
+def test_builder_collects_postings_in_insertion_order():
+    builder = IncrementalBM25()
+    assert builder.add_documents([["a", "b", "a"], ["b", "c"]]) == [0, 1]
+    assert builder.add_document(["a"]) == 2
+    assert builder.postings == {"a": ([0, 2], [2, 1]), "b": ([0, 1], [1, 1]), "c": ([1], [1])}
+    assert builder.doc_len == [3, 2, 1]
+
+def test_select_top_k_breaks_ties_by_candidate():
+    candidates = np.array([9, 4, 7, 1, 3, 8])
+    scores = np.array([1.0, 2.0, 1.0, 1.0, 3.0, 1.0])
+    for top_k, expected in [(1, [3]), (2, [3, 4]), (3, [3, 4, 1]), (4, [3, 4, 1, 7]), (10, [3, 4, 1, 7, 8, 9])]:
+        chosen, chosen_scores = select_top_k(candidates, scores, top_k)
+        assert chosen.tolist() == expected
+        np.testing.assert_array_equal(chosen_scores, np.sort(scores)[::-1][:len(expected)])
+
+    # Many equal scores at the cut-off: argpartition alone picks among them arbitrarily.
+    rng = np.random.default_rng(5)
+    candidates = rng.permutation(1000)
+    scores = np.where(candidates < 10, 2.0, 1.0)
+    assert select_top_k(candidates, scores, 15)[0].tolist() == list(range(15))
@@ -0,0 +1,88 @@
+import re
+import pytest
+from src.generation.context_packer import GAP_SEPARATOR, PASSAGE_SEPARATOR, ContextPacker
+
+def count_words(text):
+    return len(text.split())
+
+def _packer(token_budget=10_000):
+    return ContextPacker(token_budget=token_budget, max_overlap=40, min_overlap=5, count_tokens=count_words)
+
+# A document split with a repeated overlap between neighbours, as RecursiveCharacterTextSplitter does.
+DOCUMENT = ("Regulated entities shall disclose the annual percentage rate upfront. "
+            "The key fact statement must be given before the contract is executed. "
+            "Lending service providers may not access the borrower's contacts. "
+            "Cooling off periods of at least three days apply to every digital loan.")
+CHUNKS = [
+    {'id': "dl_0", 'text': "Regulated entities shall disclose the annual percentage rate upfront. The key fact"},
+    {'id': "dl_1", 'text': "The key fact statement must be given before the contract is executed."},
+    {'id': "dl_2", 'text': "is executed. Lending service providers may not access the borrower's contacts."},
+    {'id': "dl_3", 'text': "Cooling off periods of at least three days apply to every digital loan."},
+]
+
+def normalize(text):
+    return re.sub(r"\s+", " ", text).strip()
+
+def test_neighbouring_chunks_merge_without_their_overlap():
+    packed = _packer().pack(CHUNKS)
+    assert packed.text.count("The key fact") == 1
+    assert packed.text.count("is executed.") == 1
+    assert normalize(packed.text) == DOCUMENT
+    assert packed.chunk_ids == ["dl_0", "dl_1", "dl_2", "dl_3"]
+
+def test_passages_follow_rank_and_chunks_follow_document_order():
+    other = {'id': "kyc_4", 'text': "Periodic updation of KYC is risk based."}
+    packed = _packer().pack([CHUNKS[3], other, CHUNKS[0]])
+    first, second = packed.text.split(PASSAGE_SEPARATOR)
+    # dl_0 and dl_3 are not neighbours: they stay apart, in document order.
+    assert first == CHUNKS[0]['text'] + GAP_SEPARATOR + CHUNKS[3]['text']
+    assert second == other['text']
+
+def test_chunks_split_at_a_sentence_keep_the_separator():
+    # The splitter keeps ". " at the start of the next chunk and shares no overlap.
+    chunks = [{'id': "rbi_7", 'text': "Banks shall report frauds within a week"},
+              {'id': "rbi_8", 'text': ". Delays attract penalties under the Act"}]
+    assert _packer().pack(chunks).text == "Banks shall report frauds within a week. Delays attract penalties under the Act"
+
+def test_chunks_split_at_whitespace_are_joined_on_a_new_line():
+    chunks = [{'id': "rbi_7", 'text': "Banks shall report frauds within a week."},
+              {'id': "rbi_8", 'text': "Delays attract penalties under the Act."}]
+    assert _packer().pack(chunks).text == chunks[0]['text'] + "\n" + chunks[1]['text']
+
+def test_short_shared_spans_are_not_treated_as_overlap():
+    chunks = [{'id': "a_0", 'text': "the bank"}, {'id': "a_1", 'text': "bank rules apply"}]
+    assert _packer().pack(chunks).text == "the bank\nbank rules apply"
+
+def test_duplicates_are_included_once():
+    duplicate = {'id': "copy_0", 'text': CHUNKS[1]['text']}
+    packed = _packer().pack([CHUNKS[1], duplicate])
+    assert packed.chunk_ids == ["dl_1"]
+    assert packed.dropped_ids == []
+
+def test_budget_keeps_best_ranked_chunks_that_fit():
+    # The two chunks are not neighbours, so the gap marker costs a token too.
+    budget = count_words(CHUNKS[3]['text']) + count_words(CHUNKS[0]['text']) + 1
+    long_chunk = {'id': "long_0", 'text': " ".join(f"word{i}" for i in range(50))}
+    packed = _packer(budget).pack([CHUNKS[3], long_chunk, CHUNKS[0]])
+    assert packed.chunk_ids == ["dl_3", "dl_0"]
+    assert packed.dropped_ids == ["long_0"]
+    assert packed.tokens <= budget
+
+@pytest.mark.parametrize("budget", [1, 3, 7, 11])
+def test_over_budget_best_chunk_is_truncated_to_fit(budget):
+    chunks = [{'id': "long_0", 'text': " ".join(f"word{i}" for i in range(50))}, CHUNKS[0]]
+    packed = _packer(budget).pack(chunks)
+    assert packed.chunk_ids == ["long_0"]
+    assert packed.dropped_ids == ["dl_0"]
+    assert 0 < packed.tokens <= budget
+    assert packed.tokens == count_words(packed.text)
+    assert chunks[0]['text'].startswith(packed.text)
+
+def test_truncation_fits_a_token_counter_that_is_not_proportional_to_length():
+    # Digits cost a token each, letters a quarter: a character-ratio cut would overshoot.
+    count = lambda text: sum(1 if c.isdigit() else 0.25 for c in text)
+    text = "1" * 400 + "a" * 400
+    packer = ContextPacker(token_budget=150, count_tokens=count)
+    packed = packer.pack([{'id': "mixed_0", 'text': text}])
+    assert packed.tokens == 150
+    assert packed.text == text[:150]
@@ -0,0 +1,43 @@
+import threading
+import numpy as np
+from src.retrieval.embedding_cache import EmbeddingCache
+
+def _cache(tmp_path, max_entries=10):
+    return EmbeddingCache(str(tmp_path / "embeddings.db"), "test-model", max_entries)
+
+def _vectors(count):
+    return np.arange(count * 4, dtype=np.float32).reshape(count, 4)
+
+def _rows(cache):
+    return cache._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+def test_rows_are_only_counted_when_the_cache_may_be_full(tmp_path):
+    cache = _cache(tmp_path)
+    statements = []
+    cache._connection().set_trace_callback(statements.append)
+    for i in range(10):
+        cache.put_many([f"text {i}"], _vectors(1))
+    # Only the first write, which has no estimate yet, counts the rows.
+    assert sum("COUNT(*)" in s for s in statements) == 1
+
+    cache.get_many(["text 0"])  # text 0 is now the most recently used
+    cache.put_many(["text 10"], _vectors(1))
+    assert _rows(cache) == 9
+    found = cache.get_many([f"text {i}" for i in range(11)])
+    assert [i for i, v in enumerate(found) if v is None] == [1, 2]
+    np.testing.assert_array_equal(found[0], _vectors(1)[0])
+
+def test_hit_and_miss_counts_are_exact_under_concurrency(tmp_path):
+    cache = _cache(tmp_path, max_entries=1000)
+    cache.put_many([f"text {i}" for i in range(5)], _vectors(5))
+
+    def lookup():
+        for _ in range(50):
+            cache.get_many([f"text {i}" for i in range(8)])
+
+    threads = [threading.Thread(target=lookup) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (cache.hits, cache.misses) == (4 * 50 * 5, 4 * 50 * 3)
@@ -0,0 +1,71 @@
+import time
+import threading
+import multiprocessing
+from src.retrieval.file_lock import FileLock
+
+def _hold(path, held, release):
+    with FileLock(path):
+        held.set()
+        release.wait(10)
+
+def test_threads_sharing_one_lock_serialize(tmp_path):
+    lock = FileLock(tmp_path / "writer.lock")
+    inside, overlaps = [], []
+
+    def worker():
+        for _ in range(50):
+            with lock:
+                inside.append(1)
+                if len(inside) > 1:
+                    overlaps.append(1)
+                time.sleep(0.0005)
+                inside.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    assert not any(thread.is_alive() for thread in threads)
+    assert not overlaps
+
+def test_second_thread_gets_the_lock_after_the_first_releases(tmp_path):
+    lock = FileLock(tmp_path / "writer.lock")
+    acquired = threading.Event()
+
+    def second():
+        with lock:
+            acquired.set()
+
+    with lock:
+        thread = threading.Thread(target=second)
+        thread.start()
+        assert not acquired.wait(0.2)
+    assert acquired.wait(5)
+    thread.join(5)
+    # The lock is free again for this thread.
+    with lock:
+        pass
+
+def test_lock_excludes_other_processes(tmp_path):
+    path = tmp_path / "writer.lock"
+    context = multiprocessing.get_context("fork")
+    held, release = context.Event(), context.Event()
+    process = context.Process(target=_hold, args=(path, held, release))
+    process.start()
+    try:
+        assert held.wait(10)
+        acquired = threading.Event()
+
+        def acquire():
+            with FileLock(path):
+                acquired.set()
+
+        thread = threading.Thread(target=acquire, daemon=True)
+        thread.start()
+        assert not acquired.wait(0.2)
+        release.set()
+        assert acquired.wait(10)
+    finally:
+        release.set()
+        process.join(10)
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from src.retrieval.filters import FieldColumns, SearchFilter, document_type_for, filter_fields, parse_published
+
+# Titles and URLs of SEBI feed items in artifacts/bm25_index.pkl.
+SEBI_ITEMS = [
+    ("Appeal No. 6522 of 2025  filed by Pranab Kumar Das",
+     "https://www.sebi.gov.in/enforcement/orders/sep-2025/appeal-no-6522-of-2025-filed-by-pranab-kumar-das_96583.html",
+     "other"),
+    ("Final Order in the matter of NNM Securities Private Limited",
+     "https://www.sebi.gov.in/enforcement/orders/sep-2025/final-order-in-the-matter-of-nnm-securities-private-limited_96585.html",
+     "order"),
+    ("Order in the matter of Debprasad Nanda & Ors. v. The State of Maharashtra - Crl. W.P. No. 4101 of 2022 "
+     "before the Bombay High Court",
+     "https://www.sebi.gov.in/enforcement/orders/oct-2025/debaprasad-nanda-and-anr-vs-st-of-maha-w-p-no-no-4101-of-2022_97016.html",
+     "order"),
+    ("Release Order – Nitya Jain [Defaulter] PAN: BAMPJ9730R in the matter of Trading in Illiquid Stock Options "
+     "on BSE. Certificate No. 8794 of 2025.",
+     "https://www.sebi.gov.in/enforcement/recovery-proceedings/sep-2025/release-order-nitya-jain-defaulter-pan-"
+     "bampj9730r-in-the-matter-of-trading-in-illiquid-stock-options-on-bse-certificate-no-8794-of-2025-_96589.html",
+     "order"),
+    ("Remittance Advice against : Gaurav Singhal [Defaulter] PAN: AUFPK1050K in the matter of front running by "
+     "Alka Jain (Big Client – Sapphire Intrex Limited), under Recovery Certificate No. 8825 of 2025.",
+     "https://www.sebi.gov.in/enforcement/recovery-proceedings/sep-2025/remittance-advice-against-gaurav-singhal-"
+     "defaulter-pan-aufpk1050k-in-the-matter-of-front-running-by-alka-jain-big-client-sapphire-intrex-limited-"
+     "under-recovery-certificate-no-8825-of-2025-_96555.html",
+     "other"),
+    ("Revised regulatory framework for Angel Funds under AIF Regulations",
+     "https://www.sebi.gov.in/legal/circulars/sep-2025/revised-regulatory-framework-for-angel-funds-under-aif-regulations_96553.html",
+     "circular"),
+    ("Extension of timeline for implementation of SEBI Circular dated February 04, 2025 on ‘Safer participation of "
+     "retail investors in Algorithmic trading’",
+     "https://www.sebi.gov.in/legal/circulars/sep-2025/extension-of-timeline-for-implementation-of-sebi-circular-"
+     "dated-february-04-2025-on-safer-participation-of-retail-investors-in-algorithmic-trading-_96979.html",
+     "circular"),
+    ("SEBI Board Meeting",
+     "https://www.sebi.gov.in/media-and-notifications/press-releases/sep-2025/sebi-board-meeting_96601.html",
+     "press_release"),
+    ("Securities and Exchange Board of India (Alternative Investment Funds) Regulations 2012  "
+     "[Last amended on September 09, 2025]",
+     "https://www.sebi.gov.in/legal/regulations/sep-2025/securities-and-exchange-board-of-india-alternative-"
+     "investment-funds-regulations-2012-last-amended-on-september-09-2025-_96597.html",
+     "other"),
+]
+
+# Links in the form RBI's RSS feed uses.
+RBI_ITEMS = [
+    ("RBI imposes monetary penalty on a co-operative bank for non-compliance with certain directions",
+     "https://www.rbi.org.in/Scripts/BS_PressReleaseDisplay.aspx?prid=61234", "press_release"),
+    ("Reserve Bank of India (Digital Lending) Directions, 2025",
+     "https://www.rbi.org.in/Scripts/NotificationUser.aspx?Id=12848&Mode=0", "notification"),
+    ("Master Direction – Know Your Customer (KYC) Direction, 2016 (Updated)",
+     "https://www.rbi.org.in/Scripts/NotificationUser.aspx?Id=11566&Mode=0", "master_direction"),
+    ("Master Circular - Prudential norms on Income Recognition and Asset Classification",
+     "https://www.rbi.org.in/Scripts/BS_ViewMasCirculardetails.aspx?id=12345", "master_direction"),
+    ("Reorienting Banking for a Digital Future",
+     "https://www.rbi.org.in/Scripts/BS_SpeechesView.aspx?Id=1500", "speech"),
+    ("RBI cancels Certificate of Registration of NBFCs following an order of the Appellate Authority",
+     "https://www.rbi.org.in/Scripts/BS_PressReleaseDisplay.aspx?prid=61235", "press_release"),
+]
+
+@pytest.mark.parametrize("title,url,expected", SEBI_ITEMS + RBI_ITEMS, ids=lambda value: str(value)[:40])
+def test_document_type_for_real_titles_and_urls(title, url, expected):
+    assert document_type_for(url, title) == expected
+
+def test_document_type_needs_whole_words():
+    assert document_type_for("https://example.org/recorder", "Border checks and disordered markets") == "other"
+    assert document_type_for(None, "Circulars issued in September") == "circular"
+    assert document_type_for("", "") == "other"
+
+def test_filter_fields_derive_missing_fields():
+    title, url, _ = SEBI_ITEMS[1]
+    fields = filter_fields({'source': 'SEBI', 'title': title, 'url': url, 'published': "11 Sep, 2025 +0530"})
+    assert fields == {'source': 'sebi', 'doc_type': 'order', 'published_ts': parse_published("2025-09-11T00:00:00+05:30")}
+    assert filter_fields({'doc_type': 'circular', 'published_ts': 5}) == {'source': '', 'doc_type': 'circular',
+                                                                          'published_ts': 5}
+    assert filter_fields({})['published_ts'] == -1
+
+def test_field_columns_mask():
+    columns = FieldColumns.from_fields([filter_fields({'source': 'SEBI', 'title': t, 'url': u, 'published': p})
+                                        for (t, u, _), p in zip(SEBI_ITEMS[:3], ["11 Sep, 2025", "11 Sep, 2025", "bad"])])
+    assert columns.mask(SearchFilter()) is None
+    np.testing.assert_array_equal(columns.mask(SearchFilter(doc_types=["ORDER"])), [False, True, True])
+    np.testing.assert_array_equal(columns.mask(SearchFilter(sources=["rbi"])), [False, False, False])
+    after = parse_published("10 Sep, 2025")
+    np.testing.assert_array_equal(columns.mask(SearchFilter(published_after=after)), [True, True, False])
@@ -0,0 +1,36 @@
+import numpy as np
+from src.retrieval.filters import FieldColumns, SearchFilter
+from src.retrieval.growable_array import GrowableArray
+from src.retrieval.quantization import Int8Codes
+
+def test_extend_appends_in_place_and_leaves_earlier_instances_unchanged():
+    first = GrowableArray.empty(np.int32).extend([1, 2])
+    second = first.extend([3])
+    third = second.extend(np.arange(4, 40))
+    np.testing.assert_array_equal(first.array, [1, 2])
+    np.testing.assert_array_equal(second.array, [1, 2, 3])
+    np.testing.assert_array_equal(third.array, np.arange(1, 40))
+    # Appends within the capacity share the buffer instead of copying it.
+    assert np.shares_memory(first.array, second.array)
+    assert not third.array.flags.writeable
+
+def test_extending_an_older_instance_does_not_overwrite_a_newer_one():
+    base = GrowableArray.empty(np.int32).extend([1])
+    newer = base.extend([2, 3])
+    branch = base.extend([9])
+    np.testing.assert_array_equal(newer.array, [1, 2, 3])
+    np.testing.assert_array_equal(branch.array, [1, 9])
+    np.testing.assert_array_equal(newer.extend([4]).array, [1, 2, 3, 4])
+
+def test_codes_and_columns_grow_without_changing_earlier_snapshots():
+    rows = np.eye(4, dtype=np.float32)
+    codes = Int8Codes(4).extend(rows[:2])
+    grown = codes.extend(rows[2:])
+    assert len(codes.codes) == 2 and len(grown.codes) == 4
+    np.testing.assert_allclose(grown.scores(rows[3]), [0, 0, 0, 1], atol=1e-2)
+
+    columns = FieldColumns.from_fields([{'source': 'rbi', 'published_ts': 1}])
+    more = columns.extend([{'source': 'sebi', 'published_ts': 2}, {'source': 'rbi', 'published_ts': 3}])
+    assert len(columns) == 1
+    np.testing.assert_array_equal(more.mask(SearchFilter(sources=["rbi"])), [True, False, True])
+    np.testing.assert_array_equal(more.published_ts, [1, 2, 3])
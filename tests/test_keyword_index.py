@@ -0,0 +1,115 @@
+import threading
+from src.retrieval.document_store import DocumentStore
+from src.retrieval.keyword_index import KeywordIndex
+
+def _chunks(document_id, version, count=3):
+    return [{'id': f"{document_id}_{i}",
+             'text': f"circular {document_id} paragraph {i} revision {version} digital lending norms",
+             'metadata': {'source': 'RBI', 'title': document_id}}
+            for i in range(count)]
+
+def _index(tmp_path):
+    return KeywordIndex(index_dir=str(tmp_path / "bm25_index"), legacy_path=str(tmp_path / "missing.pkl"),
+                        document_store=DocumentStore(str(tmp_path / "documents.db")), retire_grace_seconds=0)
+
+def test_replace_document_tombstones_previous_chunks(tmp_path):
+    index = _index(tmp_path)
+    assert not index.is_current("doc", _chunks("doc", 1, count=3))
+    assert index.replace_document("doc", _chunks("doc", 1, count=3)).changed
+    assert index.is_current("doc", _chunks("doc", 1, count=3))
+    assert not index.is_current("doc", _chunks("doc", 2, count=3))
+    assert not index.replace_document("doc", _chunks("doc", 1, count=3)).changed
+
+    replaced = index.replace_document("doc", _chunks("doc", 2, count=2))
+    assert replaced.changed
+    assert replaced.stale_chunk_ids == ["doc_2"]
+    results = index.search("revision", top_k=10)
+    assert sorted(r['id'] for r in results) == ["doc_0", "doc_1"]
+    assert all("revision 2" in r['text'] for r in results)
+
+    assert index.compact()
+    assert sorted(r['id'] for r in index.search("revision", top_k=10)) == ["doc_0", "doc_1"]
+
+def test_compaction_and_replace_document_run_concurrently_on_one_index(tmp_path):
+    index = _index(tmp_path)
+    for d in range(4):
+        index.replace_document(f"doc{d}", _chunks(f"doc{d}", 0))
+    stop, errors = threading.Event(), []
+
+    def compact():
+        while not stop.is_set():
+            try:
+                index.compact()
+            except Exception as e:
+                errors.append(e)
+
+    def replace():
+        try:
+            for version in range(1, 16):
+                for d in range(4):
+                    index.replace_document(f"doc{d}", _chunks(f"doc{d}", version))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            stop.set()
+
+    threads = [threading.Thread(target=compact, daemon=True), threading.Thread(target=replace, daemon=True)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=120)
+
+    assert not any(thread.is_alive() for thread in threads), "ingestion and compaction deadlocked"
+    assert not errors
+    index.compact()
+    results = index.search("revision", top_k=50)
+    assert len(results) == 12
+    assert all("revision 15" in r['text'] for r in results)
+
+def test_writer_recovers_from_a_crash_before_publishing(tmp_path, monkeypatch):
+    index = _index(tmp_path)
+    index.replace_document("doc0", _chunks("doc0", 0))
+
+    # Crash after the segment is written but before its manifest is published.
+    publish = index._publish
+    def crash(*args, **kwargs):
+        raise OSError("simulated crash")
+    monkeypatch.setattr(index, "_publish", crash)
+    try:
+        index.replace_document("doc1", _chunks("doc1", 0))
+    except OSError:
+        pass
+    monkeypatch.setattr(index, "_publish", publish)
+    # A crash while staging leaves the hidden directory of the following name behind too.
+    (tmp_path / "bm25_index" / ".seg_000002.tmp").mkdir()
+
+    # A fresh writer, as after a restart, reuses both names.
+    index = _index(tmp_path)
+    assert index.replace_document("doc1", _chunks("doc1", 1)).changed
+    assert index.replace_document("doc2", _chunks("doc2", 1)).changed
+    index.replace_document("doc1", _chunks("doc1", 2))
+    assert index.compact()
+
+    results = index.search("revision", top_k=50)
+    assert sorted(r['id'] for r in results) == [f"doc{d}_{i}" for d in range(3) for i in range(3)]
+    assert {r['id']: r['text'] for r in results}["doc1_0"].endswith("revision 2 digital lending norms")
+    assert not list((tmp_path / "bm25_index").glob(".seg_*.tmp"))
+
+def test_same_writer_recovers_after_a_failed_publish(tmp_path, monkeypatch):
+    index = _index(tmp_path)
+    index.replace_document("doc0", _chunks("doc0", 0))
+    publish = index._publish
+    calls = []
+    def fail_once(*args, **kwargs):
+        if not calls:
+            calls.append(1)
+            raise OSError("simulated crash")
+        return publish(*args, **kwargs)
+    monkeypatch.setattr(index, "_publish", fail_once)
+
+    try:
+        index.update_index(_chunks("doc1", 0))
+    except OSError:
+        pass
+    index.replace_document("doc2", _chunks("doc2", 0))
+    assert sorted(r['id'] for r in index.search("doc2", top_k=50)) == ["doc2_0", "doc2_1", "doc2_2"]
@@ -0,0 +1,33 @@
+import pytest
+from types import SimpleNamespace
+from src.generation.context_packer import ContextPacker
+from src.generation.llm_generator import LLM_ERROR_MESSAGE, LLMGenerator, LLMStreamError
+
+pytest.importorskip("groq")
+
+def _generator(create):
+    generator = LLMGenerator(api_key="test", model="test-model",
+                             context_packer=ContextPacker(count_tokens=lambda text: len(text) // 4))
+    generator.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return generator
+
+def _delta(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+def test_stream_failure_after_some_fragments_raises():
+    def create(**kwargs):
+        yield _delta("The guidelines ")
+        raise ConnectionError("connection reset")
+
+    fragments = []
+    with pytest.raises(LLMStreamError, match=LLM_ERROR_MESSAGE):
+        for fragment in _generator(create).stream_answer("question", [{'id': "doc_0", 'text': "context"}]):
+            fragments.append(fragment)
+    assert fragments == ["The guidelines "]
+
+def test_stream_yields_every_fragment():
+    def create(**kwargs):
+        assert kwargs["stream"]
+        return iter([_delta("The "), _delta(None), _delta("guidelines.")])
+
+    assert list(_generator(create).stream_answer("question", [])) == ["The ", "guidelines."]
@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+from src.config import LocalVectorConfig
+from src.retrieval.filters import SearchFilter
+from src.retrieval.local_vector_index import LocalVectorIndex
+
+DIMENSION = 16
+MODES = {
+    "exact": {},
+    "int8": {'quantization': "int8"},
+    "binary": {'quantization': "binary", 'rescore_factor': 40},
+    "ivf": {'ann': "ivf", 'ivf_nlist': 4, 'ivf_nprobe': 4, 'ivf_min_rows': 50},
+}
+
+def _index(tmp_path, **overrides):
+    config = LocalVectorConfig(path=str(tmp_path / "vector_index"), dimension=DIMENSION, compact_min_rows=50,
+                               **overrides)
+    return LocalVectorIndex(config)
+
+def _unit(values):
+    values = np.asarray(values, dtype=np.float32)
+    return values / np.linalg.norm(values, axis=-1, keepdims=True)
+
+def _vectors(count, seed=3, prefix="doc"):
+    rows = _unit(np.random.default_rng(seed).normal(size=(count, DIMENSION)))
+    sources = ["RBI", "SEBI"]
+    return [{'id': f"{prefix}_{i}", 'values': rows[i],
+             'metadata': {'source': sources[i % 2], 'doc_type': "circular", 'published_ts': 1_700_000_000 + i}}
+            for i in range(count)]
+
+def _ids(matches):
+    return [m['id'] for m in matches]
+
+@pytest.mark.parametrize("mode", list(MODES))
+def test_each_vector_is_its_own_best_match(tmp_path, mode):
+    index = _index(tmp_path, **MODES[mode])
+    vectors = _vectors(120)
+    assert index.upsert_vectors(vectors[:70]).succeeded
+    # A second batch grows the codes, filter columns and IVF lists appended after training.
+    assert index.upsert_vectors(vectors[70:]).succeeded
+    if mode == "ivf":
+        index.compact(train=True)
+        assert list((tmp_path / "vector_index").glob("centroids.*.npy"))
+
+    for vector in vectors[::7]:
+        matches = index.query(vector['values'], top_k=3)
+        assert matches[0]['id'] == vector['id']
+        assert matches[0]['score'] == pytest.approx(1.0, abs=1e-5)
+        assert matches[0]['metadata']['source'] == vector['metadata']['source']
+        assert [m['score'] for m in matches] == sorted((m['score'] for m in matches), reverse=True)
+
+def test_exact_search_matches_brute_force(tmp_path):
+    index = _index(tmp_path)
+    vectors = _vectors(80)
+    index.upsert_vectors(vectors)
+    matrix = np.stack([v['values'] for v in vectors])
+    query = _unit(np.random.default_rng(9).normal(size=DIMENSION))
+
+    expected = np.argsort(-(matrix @ query))[:5]
+    assert _ids(index.query(query, top_k=5)) == [vectors[i]['id'] for i in expected]
+
+@pytest.mark.parametrize("mode", list(MODES))
+def test_deleted_and_replaced_vectors_are_not_returned(tmp_path, mode):
+    index = _index(tmp_path, **MODES[mode])
+    vectors = _vectors(60)
+    index.upsert_vectors(vectors)
+    if mode == "ivf":
+        index.compact(train=True)
+        assert list((tmp_path / "vector_index").glob("centroids.*.npy"))
+
+    assert index.delete_vectors(["doc_0", "doc_1", "missing"]) == []
+    # Re-upsert doc_2 with the values of doc_3's opposite, so the old row would still match its old query.
+    moved = {**vectors[2], 'values': -vectors[3]['values']}
+    assert index.upsert_vectors([moved]).succeeded
+
+    assert len(index) == 58
+    assert "doc_0" not in _ids(index.query(vectors[0]['values'], top_k=5))
+    assert index.query(vectors[2]['values'], top_k=1)[0]['id'] != "doc_2"
+    assert index.query(moved['values'], top_k=1)[0]['id'] == "doc_2"
+
+    # Deleted ids can be upserted again.
+    assert index.upsert_vectors([vectors[0]]).succeeded
+    assert index.query(vectors[0]['values'], top_k=1)[0]['id'] == "doc_0"
+    assert len(index) == 59
+
+def test_compaction_keeps_live_vectors(tmp_path):
+    index = _index(tmp_path)
+    vectors = _vectors(60)
+    index.upsert_vectors(vectors)
+    index.delete_vectors([v['id'] for v in vectors[:40]])
+    index.compact()
+
+    assert len(index) == 20
+    # Deleting most rows may already have compacted; either way only the newest generation is left.
+    files = [p.name for p in (tmp_path / "vector_index").glob("vectors.*")]
+    assert len(files) == 1 and files[0] != "vectors.000000.f32"
+    for vector in vectors[40:]:
+        assert index.query(vector['values'], top_k=1)[0]['id'] == vector['id']
+
+@pytest.mark.parametrize("mode", ["exact", "int8"])
+def test_a_second_instance_sees_the_same_state(tmp_path, mode):
+    writer = _index(tmp_path, **MODES[mode])
+    reader = _index(tmp_path, **MODES[mode])
+    vectors = _vectors(60)
+    writer.upsert_vectors(vectors[:30])
+    assert reader.query(vectors[5]['values'], top_k=1)[0]['id'] == "doc_5"
+
+    writer.upsert_vectors(vectors[30:])
+    writer.delete_vectors(["doc_5"])
+    assert len(reader) == len(writer) == 59
+    assert reader.query(vectors[45]['values'], top_k=1)[0]['id'] == "doc_45"
+    assert "doc_5" not in _ids(reader.query(vectors[5]['values'], top_k=5))
+
+    # The reader follows a compaction into the next generation, and a new instance opens it.
+    writer.delete_vectors([f"doc_{i}" for i in range(40)])
+    writer.compact()
+    for index in (reader, _index(tmp_path, **MODES[mode])):
+        assert len(index) == 20
+        assert index.query(vectors[50]['values'], top_k=1)[0]['id'] == "doc_50"
+
+@pytest.mark.parametrize("mode", list(MODES))
+def test_filters_are_applied_before_the_top_k(tmp_path, mode):
+    index = _index(tmp_path, **MODES[mode])
+    vectors = _vectors(100)
+    index.upsert_vectors(vectors)
+    if mode == "ivf":
+        index.compact(train=True)
+        assert list((tmp_path / "vector_index").glob("centroids.*.npy"))
+    query = vectors[0]['values']
+
+    # doc_0 is RBI; its best SEBI matches are ranked below RBI ones by a global top-k.
+    matches = index.query(query, top_k=5, search_filter=SearchFilter(sources=["sebi"]))
+    assert len(matches) == 5
+    assert all(m['metadata']['source'] == "SEBI" for m in matches)
+    sebi = [v for v in vectors if v['metadata']['source'] == "SEBI"]
+    best = max(sebi, key=lambda v: float(v['values'] @ query))
+    assert matches[0]['id'] == best['id']
+
+    late = index.query(query, top_k=50, search_filter=SearchFilter(published_after=1_700_000_090))
+    assert sorted(_ids(late)) == sorted(f"doc_{i}" for i in range(90, 100))
+    # Filtering a global top 3 afterwards would almost never leave three of the last three vectors.
+    latest = index.query(query, top_k=3, search_filter=SearchFilter(published_after=1_700_000_097))
+    assert sorted(_ids(latest)) == ["doc_97", "doc_98", "doc_99"]
+    assert index.query(query, top_k=5, search_filter=SearchFilter(doc_types=["order"])) == []
@@ -0,0 +1,39 @@
+import os
+import functools
+import numpy as np
+import pytest
+from pathlib import Path
+from src.config import OnnxEmbedderConfig
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("sentence_transformers")
+from src.retrieval.embedder import Embedder
+from src.retrieval.onnx_embedder import FP32_TOLERANCE, INT8_TOLERANCE, MODEL_FILE, QUANTIZED_MODEL_FILE, OnnxEmbedder
+
+MODEL_DIR = Path(os.getenv("ONNX_EMBEDDER_DIR", OnnxEmbedderConfig.model_dir))
+
+# Texts of very different lengths share a batch, so padding and truncation are exercised too.
+TEXTS = [
+    "UPI",
+    "Guidelines on digital lending",
+    "Master Direction on Know Your Customer (KYC) for regulated entities",
+    "What are the net worth requirements for payment aggregators?",
+    " ".join(["Regulated entities shall report cyber security incidents to the Reserve Bank within six hours."] * 40),
+]
+
+@functools.lru_cache(maxsize=None)
+def _torch_embedder(model_name):
+    # Loaded once for both exports.
+    return Embedder(model_name)
+
+@pytest.mark.parametrize("quantized,tolerance", [(False, FP32_TOLERANCE), (True, INT8_TOLERANCE)], ids=["fp32", "int8"])
+def test_onnx_embeddings_match_pytorch(quantized, tolerance):
+    if not (MODEL_DIR / (QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)).exists():
+        pytest.skip(f"No exported model in {MODEL_DIR}; run scripts/export_onnx_embedder.py --quantize first.")
+    onnx_embedder = OnnxEmbedder(OnnxEmbedderConfig(model_dir=str(MODEL_DIR), quantized=quantized))
+    expected = _torch_embedder(onnx_embedder.settings['model_name']).generate_embeddings(TEXTS)
+    actual = onnx_embedder.generate_embeddings(TEXTS)
+
+    assert actual.shape == expected.shape == (len(TEXTS), expected.shape[1])
+    np.testing.assert_allclose(np.linalg.norm(actual, axis=1), 1.0, rtol=1e-5)
+    assert (expected * actual).sum(axis=1).min() >= tolerance
@@ -0,0 +1,108 @@
+import numpy as np
+from src.generation.llm_generator import LLM_ERROR_MESSAGE, LLMStreamError
+from src.pipeline.rag_pipeline import RAGPipeline
+from src.retrieval.document_store import DocumentStore
+from src.retrieval.keyword_index import KeywordIndex
+
+GREETING = {"role": "assistant", "content": "Hi, ask me about Indian fintech regulations."}
+
+class FakeEmbedder:
+    def generate_embeddings(self, texts):
+        return np.ones((len(texts), 4), dtype=np.float32) / 2
+
+class FakeVectorIndex:
+    def query(self, vector, top_k, search_filter=None, include_metadata=False):
+        return [{'id': "rbi_0", 'score': 1.0, 'metadata': {}}]
+
+class FakeGenerator:
+    def __init__(self, fragments=("An ", "answer.")):
+        self.fragments = list(fragments)
+        self.calls = 0
+
+    def generate_answer(self, query, context_chunks, chat_history=None):
+        self.calls += 1
+        return "".join(self.fragments)
+
+    def stream_answer(self, query, context_chunks, chat_history=None):
+        self.calls += 1
+        yield from self.fragments
+
+def _pipeline(tmp_path, generator):
+    keyword_index = KeywordIndex(index_dir=str(tmp_path / "bm25_index"), legacy_path=str(tmp_path / "missing.pkl"),
+                                 document_store=DocumentStore(str(tmp_path / "documents.db")))
+    keyword_index.replace_document("rbi", [{'id': "rbi_0", 'text': "digital lending guidelines for regulated entities",
+                                            'metadata': {'source': 'RBI', 'url': "https://rbi.org.in/dl", 'title': "DL"}}])
+    return RAGPipeline(FakeEmbedder(), FakeVectorIndex(), generator, top_k=3, keyword_index=keyword_index)
+
+def test_answers_are_shared_only_between_conversations_with_the_same_history(tmp_path):
+    generator = FakeGenerator()
+    pipeline = _pipeline(tmp_path, generator)
+    query = "What are the digital lending guidelines?"
+
+    # A first question in two new conversations: the history differs only by the question itself.
+    for _ in range(2):
+        pipeline.execute(query, chat_history=[GREETING, {"role": "user", "content": query}])
+    assert generator.calls == 1
+
+    follow_up = [GREETING, {"role": "user", "content": "Tell me about P2P lending."},
+                 {"role": "assistant", "content": "P2P lending platforms are NBFCs."},
+                 {"role": "user", "content": query}]
+    pipeline.execute(query, chat_history=follow_up)
+    assert generator.calls == 2
+    pipeline.execute(query, chat_history=follow_up)
+    assert generator.calls == 2
+
+    other_follow_up = follow_up[:2] + [{"role": "assistant", "content": "Something else entirely."}, follow_up[3]]
+    pipeline.execute(query, chat_history=other_follow_up)
+    assert generator.calls == 3
+
+class FailingStreamGenerator(FakeGenerator):
+    def stream_answer(self, query, context_chunks, chat_history=None):
+        self.calls += 1
+        yield "A partial "
+        raise LLMStreamError(LLM_ERROR_MESSAGE)
+
+def test_failed_streams_are_reported_and_never_cached(tmp_path):
+    generator = FailingStreamGenerator()
+    pipeline = _pipeline(tmp_path, generator)
+    query = "What are the digital lending guidelines?"
+
+    events = list(pipeline.stream_execute(query))
+    assert [e['type'] for e in events] == ["sources", "token", "token", "done"]
+    done = events[-1]
+    assert done['failed'] and not done['cached']
+    assert done['answer'].startswith("A partial") and done['answer'].endswith(LLM_ERROR_MESSAGE)
+
+    events = list(pipeline.stream_execute(query))
+    assert not events[-1]['cached']
+    assert generator.calls == 2
+
+def test_complete_streams_are_cached(tmp_path):
+    generator = FakeGenerator()
+    pipeline = _pipeline(tmp_path, generator)
+    query = "What are the digital lending guidelines?"
+
+    first = list(pipeline.stream_execute(query))[-1]
+    second = list(pipeline.stream_execute(query))[-1]
+    assert not first['failed'] and first['answer'] == "An answer."
+    assert second['cached'] and second['answer'] == "An answer."
+    assert generator.calls == 1
+
+def test_results_of_a_search_overtaken_by_a_new_generation_are_not_served(tmp_path):
+    pipeline = _pipeline(tmp_path, FakeGenerator())
+    keyword_index = pipeline.keyword_index
+    search = keyword_index.search
+    updated = {'id': "rbi_0", 'text': "revised digital lending guidelines", 'metadata': {'source': 'RBI'}}
+
+    def search_then_publish(*args, **kwargs):
+        # The old snapshot is searched; before its result is cached, the realtime processor publishes
+        # and a concurrent request notices the new generation and clears the cache.
+        results = search(*args, **kwargs)
+        keyword_index.replace_document("rbi", [updated])
+        pipeline._current_bm25_generation()
+        return results
+
+    keyword_index.search = search_then_publish
+    assert pipeline._keyword_search("digital lending", None)[0]['text'].startswith("digital lending")
+    keyword_index.search = search
+    assert pipeline._keyword_search("digital lending", None)[0]['text'] == updated['text']
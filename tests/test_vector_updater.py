@@ -0,0 +1,74 @@
+import numpy as np
+from src.retrieval.vector_backend import UpsertResult
+from streaming.vector_updater import RealTimeVectorUpdater
+
+class FakeEmbedder:
+    def generate_embeddings(self, texts):
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+class FlakyIndex:
+    """Fails the given ids on the first `failures` upserts that include them."""
+    def __init__(self, failing_ids, failures):
+        self.failing_ids = set(failing_ids)
+        self.failures = failures
+        self.calls = []
+        self.stored = {}
+
+    def upsert_vectors(self, vectors, batch_size=100):
+        self.calls.append([v['id'] for v in vectors])
+        failed = [v['id'] for v in vectors if v['id'] in self.failing_ids and self.failures > 0]
+        if failed:
+            self.failures -= 1
+        for v in vectors:
+            if v['id'] not in failed:
+                self.stored[v['id']] = v
+        return UpsertResult(upserted_count=len(vectors) - len(failed), failed_ids=failed)
+
+def _chunks(count):
+    return [{'id': f"doc_{i}", 'text': f"chunk {i}", 'metadata': {'source': 'RBI'}} for i in range(count)]
+
+def test_failed_ids_are_retried_until_they_succeed():
+    index = FlakyIndex(["doc_1", "doc_3"], failures=2)
+    updater = RealTimeVectorUpdater(index, FakeEmbedder(), max_retries=2, retry_backoff_seconds=0)
+
+    result = updater.update_vectors(_chunks(5))
+
+    assert result.succeeded
+    assert result.upserted_count == 5
+    assert index.calls[1:] == [["doc_1", "doc_3"], ["doc_1", "doc_3"]]
+    assert sorted(index.stored) == [f"doc_{i}" for i in range(5)]
+
+def test_ids_still_failing_after_the_retries_are_reported():
+    index = FlakyIndex(["doc_2"], failures=10)
+    updater = RealTimeVectorUpdater(index, FakeEmbedder(), max_retries=1, retry_backoff_seconds=0)
+
+    result = updater.update_vectors(_chunks(3))
+
+    assert result.failed_ids == ["doc_2"]
+    assert result.upserted_count == 2
+    assert len(index.calls) == 2
+
+class FlakyDeleteIndex:
+    """Fails to delete the given ids on the first `failures` deletes that include them."""
+    def __init__(self, failing_ids, failures):
+        self.failing_ids = set(failing_ids)
+        self.failures = failures
+        self.calls = []
+
+    def delete_vectors(self, ids, batch_size=1000):
+        self.calls.append(list(ids))
+        failed = [i for i in ids if i in self.failing_ids and self.failures > 0]
+        if failed:
+            self.failures -= 1
+        return failed
+
+def test_failed_deletes_are_retried_and_reported():
+    index = FlakyDeleteIndex(["doc_1"], failures=1)
+    updater = RealTimeVectorUpdater(index, FakeEmbedder(), max_retries=2, retry_backoff_seconds=0)
+    assert updater.delete_vectors(["doc_0", "doc_1"]) == []
+    assert index.calls == [["doc_0", "doc_1"], ["doc_1"]]
+
+    index = FlakyDeleteIndex(["doc_1"], failures=10)
+    updater = RealTimeVectorUpdater(index, FakeEmbedder(), max_retries=2, retry_backoff_seconds=0)
+    assert updater.delete_vectors(["doc_0", "doc_1"]) == ["doc_1"]
+    assert len(index.calls) == 3